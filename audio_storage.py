@@ -99,20 +99,30 @@ class AudioStorageService:
         os.makedirs(self.local_storage_path, exist_ok=True)
         print("✅ Local storage initialized")
     
+    def build_filename(self, user_id: str, provider: str, text_hash: Optional[str] = None) -> str:
+        """Generate the storage filename for a new audio file"""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        if text_hash:
+            return f"tts_{user_id}_{provider}_{text_hash[:8]}_{timestamp}.mp3"
+        return f"tts_{user_id}_{provider}_{timestamp}.mp3"
+    
+    def get_file_url(self, user_id: str, filename: str) -> str:
+        """Public URL a file will have once saved (computed locally, no upload needed)"""
+        if self.storage_type == "s3":
+            return f"https://{self.bucket_name}.s3.amazonaws.com/tts/{user_id}/{filename}"
+        elif self.storage_type == "gcs":
+            return self.bucket.blob(f"tts/{user_id}/{filename}").public_url
+        elif self.storage_type == "supabase":
+            return self.supabase_client.storage.from_(self.bucket_name).get_public_url(f"{user_id}/{filename}")
+        else:
+            return f"/audio/{user_id}/{filename}"
+    
     async def save_audio_file(self, user_id: str, audio_data: bytes, provider: str, 
                             text_hash: Optional[str] = None, custom_filename: Optional[str] = None) -> Dict[str, Any]:
         """Save audio file and return metadata"""
         try:
             # Use custom filename if provided, otherwise generate one
-            if custom_filename:
-                filename = custom_filename
-            else:
-                # Generate filename
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                if text_hash:
-                    filename = f"tts_{user_id}_{provider}_{text_hash[:8]}_{timestamp}.mp3"
-                else:
-                    filename = f"tts_{user_id}_{provider}_{timestamp}.mp3"
+            filename = custom_filename or self.build_filename(user_id, provider, text_hash)
             
             # Save based on storage type
             if self.storage_type == "s3":
@@ -335,6 +345,7 @@ class AudioStorageService:
     
     def generate_text_hash(self, text: str) -> str:
         """Generate hash for text to enable caching"""
+        # Persisted in filenames and stored rows, so it must stay MD5 to match existing data
         return hashlib.md5(text.encode()).hexdigest()
     
     async def get_audio_file_info(self, user_id: str, filename: str) -> Optional[Dict[str, Any]]:
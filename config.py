@@ -12,6 +12,7 @@ class Config:
     # LangSmith Configuration
     LANGSMITH_PROJECT = os.getenv("LANGSMITH_PROJECT", "polynot")
     LANGSMITH_API_KEY = os.getenv("LANGSMITH_API_KEY")
+    ENABLE_TRACING = os.getenv("ENABLE_TRACING", "false").lower() == "true"  # Send every LLM call to LangSmith (adds a request per call)
     
     # Tavily Search Configuration
     TAVILY_API_KEY = os.getenv("TAVILY_API_KEY")
@@ -38,6 +39,12 @@ class Config:
     DEFAULT_PHRASAL_VERBS_PER_BATCH = int(os.getenv("DEFAULT_PHRASAL_VERBS_PER_BATCH", "10"))  # Reduced from 25
     DEFAULT_IDIOMS_PER_BATCH = int(os.getenv("DEFAULT_IDIOMS_PER_BATCH", "5"))  # Reduced from 25
     DEFAULT_DELAY_SECONDS = int(os.getenv("DEFAULT_DELAY_SECONDS", "3"))
+    GENERATION_CONCURRENCY = int(os.getenv("GENERATION_CONCURRENCY", "8"))  # Topics generated at once by continuous generation
+    LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "0"))  # Continuous generation request budget (0 = unlimited)
+    TOPICS_PER_REQUEST = int(os.getenv("TOPICS_PER_REQUEST", "4"))  # Topics covered by one continuous generation LLM request
+    INSERT_FLUSH_THRESHOLD = int(os.getenv("INSERT_FLUSH_THRESHOLD", "200"))  # Entries buffered across topics before one bulk save
+    LLM_RESPONSE_CACHE_SIZE = int(os.getenv("LLM_RESPONSE_CACHE_SIZE", "0"))  # Generation responses kept for identical prompts (0 = no cache)
+    BATCH_POLL_INTERVAL_SECONDS = int(os.getenv("BATCH_POLL_INTERVAL_SECONDS", "30"))  # Status checks while waiting on an OpenAI batch
     
     # TTS Configuration
     # Google TTS
@@ -47,14 +54,31 @@ class Config:
     # ElevenLabs
     ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY")
     ELEVENLABS_BASE_URL = os.getenv("ELEVENLABS_BASE_URL", "https://api.elevenlabs.io/v1")
+    ELEVENLABS_CONCURRENCY = int(os.getenv("ELEVENLABS_CONCURRENCY", "8"))  # Max concurrent SDK calls per service
     
     # TTS Settings
     DEFAULT_TTS_LANGUAGE = os.getenv("DEFAULT_TTS_LANGUAGE", "en-US")
     MAX_FREE_TTS_REQUESTS_PER_DAY = int(os.getenv("MAX_FREE_TTS_REQUESTS_PER_DAY", "50"))
     MAX_PREMIUM_TTS_REQUESTS_PER_DAY = int(os.getenv("MAX_PREMIUM_TTS_REQUESTS_PER_DAY", "500"))
+    MAX_TTS_CHARS = int(os.getenv("MAX_TTS_CHARS", "5000"))
+    BATCH_PRONUNCIATION_CONCURRENCY = int(os.getenv("BATCH_PRONUNCIATION_CONCURRENCY", "8"))  # Entries processed at once by batch pronunciation
     TTS_AUDIO_FORMAT = os.getenv("TTS_AUDIO_FORMAT", "mp3")
     TTS_AUDIO_QUALITY = os.getenv("TTS_AUDIO_QUALITY", "high")  # low, medium, high
     
+    # TTS Cache (Redis is optional; an in-memory cache is used when REDIS_URL is unset)
+    REDIS_URL = os.getenv("REDIS_URL")
+    TTS_CACHE_TTL_GOOGLE_SECONDS = int(os.getenv("TTS_CACHE_TTL_GOOGLE_SECONDS", str(24 * 3600)))  # 1 day
+    TTS_CACHE_TTL_ELEVENLABS_SECONDS = int(os.getenv("TTS_CACHE_TTL_ELEVENLABS_SECONDS", str(7 * 24 * 3600)))  # 7 days
+    SUBSCRIPTION_CACHE_TTL_SECONDS = int(os.getenv("SUBSCRIPTION_CACHE_TTL_SECONDS", "60"))
+    SUBSCRIPTION_STALE_TTL_SECONDS = int(os.getenv("SUBSCRIPTION_STALE_TTL_SECONDS", str(24 * 3600)))  # Served only when the database is unreachable
+    VOICE_PROFILE_CACHE_TTL_SECONDS = int(os.getenv("VOICE_PROFILE_CACHE_TTL_SECONDS", "300"))
+    
+    # Direct Postgres pool for hot TTS lookups (optional; the Supabase REST client is used when unset)
+    DATABASE_URL = os.getenv("DATABASE_URL")
+    DATABASE_POOL_MIN_SIZE = int(os.getenv("DATABASE_POOL_MIN_SIZE", "10"))
+    DATABASE_POOL_MAX_SIZE = int(os.getenv("DATABASE_POOL_MAX_SIZE", "50"))
+    DATABASE_STATEMENT_CACHE_SIZE = int(os.getenv("DATABASE_STATEMENT_CACHE_SIZE", "100"))  # Set to 0 behind Supavisor transaction mode
+    
     # Voice Clone Limits
     MAX_FREE_VOICE_CLONES = int(os.getenv("MAX_FREE_VOICE_CLONES", "1"))
     MAX_PREMIUM_VOICE_CLONES = int(os.getenv("MAX_PREMIUM_VOICE_CLONES", "5"))
@@ -105,6 +129,7 @@ class Config:
         print(f"Phrasal verbs per batch: {cls.DEFAULT_PHRASAL_VERBS_PER_BATCH}")
         print(f"Idioms per batch: {cls.DEFAULT_IDIOMS_PER_BATCH}")
         print(f"Delay seconds: {cls.DEFAULT_DELAY_SECONDS}")
+        print(f"LangSmith tracing: {'Enabled' if cls.ENABLE_TRACING else 'Disabled'}")
         print(f"Supabase URL: {cls.SUPABASE_URL[:20]}..." if cls.SUPABASE_URL else "Not set")
         print(f"OpenAI API Key: {'Set' if cls.OPENAI_API_KEY else 'Not set'}")
         print("====================") 
\ No newline at end of file
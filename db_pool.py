@@ -0,0 +1,99 @@
+"""
+Database Pool
+Optional direct Postgres connection pool for high-frequency TTS lookups.
+Uses asyncpg when DATABASE_URL is configured; callers fall back to the Supabase REST client otherwise.
+"""
+
+import asyncio
+from typing import Any, List, Optional
+
+import orjson
+
+try:
+    import asyncpg
+    ASYNCPG_AVAILABLE = True
+except ImportError:
+    ASYNCPG_AVAILABLE = False
+
+from config import Config
+
+
+class AsyncDatabasePool:
+    """Lazily created asyncpg pool shared by the TTS services"""
+
+    def __init__(self, dsn: Optional[str] = None, min_size: int = 10, max_size: int = 50,
+                 statement_cache_size: int = 100):
+        """
+        Initialize the pool settings (no connection is opened until first use)
+
+        Args:
+            dsn: Postgres connection string (pool disabled if not set or asyncpg isn't installed)
+            min_size: Minimum number of pooled connections
+            max_size: Maximum number of pooled connections
+            statement_cache_size: Prepared statement cache size per connection (use 0 behind a transaction pooler)
+        """
+        self.dsn = dsn
+        self.min_size = min_size
+        self.max_size = max_size
+        self.statement_cache_size = statement_cache_size
+        self._pool = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        """Whether direct Postgres access is configured"""
+        return bool(self.dsn) and ASYNCPG_AVAILABLE
+
+    @staticmethod
+    def _encode_json(value: Any) -> str:
+        return orjson.dumps(value).decode()
+
+    @staticmethod
+    async def _init_connection(conn):
+        # Decode json/jsonb columns to Python objects like the REST client does
+        for type_name in ("json", "jsonb"):
+            await conn.set_type_codec(
+                type_name, encoder=AsyncDatabasePool._encode_json, decoder=orjson.loads, schema="pg_catalog"
+            )
+
+    async def get_pool(self):
+        """Get the pool, creating it on first use"""
+        if self._pool is None:
+            async with self._lock:
+                if self._pool is None:
+                    self._pool = await asyncpg.create_pool(
+                        self.dsn,
+                        min_size=self.min_size,
+                        max_size=self.max_size,
+                        statement_cache_size=self.statement_cache_size,
+                        init=self._init_connection
+                    )
+                    print("✅ Postgres connection pool initialized")
+        return self._pool
+
+    async def fetch(self, query: str, *args) -> List[dict]:
+        """Run a query and return its rows as dicts"""
+        pool = await self.get_pool()
+        rows = await pool.fetch(query, *args)
+        return [dict(row) for row in rows]
+
+    async def fetchrow(self, query: str, *args) -> Optional[dict]:
+        """Run a query and return its first row as a dict, or None"""
+        pool = await self.get_pool()
+        row = await pool.fetchrow(query, *args)
+        return dict(row) if row is not None else None
+
+    async def aclose(self):
+        """Close the pool (call on application shutdown)"""
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+
+# Global pool instance
+db_pool = AsyncDatabasePool(
+    Config.DATABASE_URL,
+    min_size=Config.DATABASE_POOL_MIN_SIZE,
+    max_size=Config.DATABASE_POOL_MAX_SIZE,
+    statement_cache_size=Config.DATABASE_STATEMENT_CACHE_SIZE
+)
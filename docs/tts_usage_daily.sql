@@ -0,0 +1,39 @@
+-- Daily TTS usage rollup
+-- Keeps one row per (user_id, date) with the number of tts_usage rows for that day,
+-- so quota lookups read a single primary-key row instead of counting tts_usage.
+
+CREATE TABLE IF NOT EXISTS tts_usage_daily (
+    user_id UUID NOT NULL,
+    date DATE NOT NULL,
+    count INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, date)
+);
+
+CREATE OR REPLACE FUNCTION bump_daily_count()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO tts_usage_daily (user_id, date, count)
+    VALUES (NEW.user_id, NEW.date, 1)
+    ON CONFLICT (user_id, date)
+    DO UPDATE SET count = tts_usage_daily.count + 1;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql SECURITY DEFINER;
+
+DROP TRIGGER IF EXISTS tts_usage_rollup ON tts_usage;
+CREATE TRIGGER tts_usage_rollup
+    AFTER INSERT ON tts_usage
+    FOR EACH ROW EXECUTE FUNCTION bump_daily_count();
+
+-- Backfill from existing usage rows
+INSERT INTO tts_usage_daily (user_id, date, count)
+SELECT user_id, date, COUNT(*)
+FROM tts_usage
+GROUP BY user_id, date
+ON CONFLICT (user_id, date) DO UPDATE SET count = EXCLUDED.count;
+
+-- Users may read their own counts; writes only happen through the trigger
+ALTER TABLE tts_usage_daily ENABLE ROW LEVEL SECURITY;
+
+CREATE POLICY "Users can view own daily usage" ON tts_usage_daily
+    FOR SELECT USING (auth.uid() = user_id);
@@ -0,0 +1,11 @@
+-- Indexes for active voice profile lookups
+-- Voice profile reads always filter on (user_id, is_active) and optionally voice_id.
+-- CREATE INDEX CONCURRENTLY cannot run inside a transaction block, so run these statements one at a time.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_uvp_user_active
+    ON user_voice_profiles (user_id)
+    WHERE is_active = true;
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_uvp_user_voice_active
+    ON user_voice_profiles (user_id, voice_id)
+    WHERE is_active = true;
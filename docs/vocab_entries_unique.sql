@@ -0,0 +1,66 @@
+-- Unique index backing the ON CONFLICT upsert in SupabaseVocabDatabase.insert_vocab_entries
+-- A word is a duplicate within a topic when (lowercased word, level, part_of_speech) match, the same
+-- key the generators filter on; the insert skips conflicting rows instead of checking each entry from Python.
+-- PostgREST's on_conflict takes plain column names, so the lowercased word is a stored generated column.
+-- Until this has been applied, inserts fall back to one request per entry (see _upsert_vocab_chunk).
+-- Adding a stored generated column rewrites the table, so run this outside peak hours.
+-- CREATE/DROP INDEX CONCURRENTLY cannot run inside a transaction block, so run the steps one at a time.
+
+-- 1. Lowercased word column
+ALTER TABLE vocab_entries
+    ADD COLUMN IF NOT EXISTS word_lower text GENERATED ALWAYS AS (lower(word)) STORED;
+
+-- 2. Remove existing duplicates, keeping the oldest row of each group (ties broken by id).
+-- Rows in other tables that point at a removed duplicate (user lists, flashcards, pronunciations, ...)
+-- are re-pointed at the kept row first, so ON DELETE CASCADE doesn't take user data with them.
+-- Only foreign keys are followed: check any table that stores vocab entry ids without one.
+-- If re-pointing hits a unique constraint (e.g. a user saved both copies of a word), the whole step
+-- rolls back and nothing is deleted; remove the redundant dependent row and run it again.
+BEGIN;
+
+CREATE TEMP TABLE vocab_entry_duplicates ON COMMIT DROP AS
+SELECT id AS duplicate_id, keep_id
+FROM (
+    SELECT id,
+           first_value(id) OVER duplicate_group AS keep_id,
+           row_number() OVER duplicate_group AS position
+    FROM vocab_entries
+    WINDOW duplicate_group AS (
+        PARTITION BY topic_id, word_lower, level, part_of_speech
+        ORDER BY created_at, id
+    )
+) ranked
+WHERE position > 1;
+
+DO $$
+DECLARE
+    fk record;
+BEGIN
+    FOR fk IN
+        SELECT c.conrelid::regclass AS referencing_table, a.attname AS referencing_column
+        FROM pg_constraint c
+        JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = c.conkey[1]
+        WHERE c.contype = 'f'
+          AND c.confrelid = 'vocab_entries'::regclass
+          AND array_length(c.conkey, 1) = 1
+    LOOP
+        EXECUTE format(
+            'UPDATE %s t SET %I = d.keep_id FROM vocab_entry_duplicates d WHERE t.%I = d.duplicate_id',
+            fk.referencing_table, fk.referencing_column, fk.referencing_column
+        );
+    END LOOP;
+END $$;
+
+DELETE FROM vocab_entries v
+    USING vocab_entry_duplicates d
+    WHERE v.id = d.duplicate_id;
+
+COMMIT;
+
+-- 3. The index itself (NULLS NOT DISTINCT so entries without a part of speech are deduplicated too)
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS uq_vocab_entries_topic_word_lower_level_pos
+    ON vocab_entries (topic_id, word_lower, level, part_of_speech)
+    NULLS NOT DISTINCT;
+
+-- 4. Replaced by the case-insensitive index above
+DROP INDEX CONCURRENTLY IF EXISTS uq_vocab_entries_topic_word_level_pos;
@@ -1,5 +1,6 @@
 from pydantic import BaseModel
 from enum import Enum
+from functools import cached_property
 from typing import List, Optional, Dict
 from datetime import datetime
 
@@ -44,6 +45,11 @@ class VocabEntry(BaseModel):
     pronunciations: Optional[Dict[str, str]] = None  # {"slow": "url1", "fast": "url2", "custom": "url3"}
     pronunciation_status: Optional[str] = "pending"  # pending, generating, completed, failed
 
+    @cached_property
+    def word_lower(self) -> str:
+        """Lowercased word, computed once (entries aren't modified after generation)"""
+        return self.word.lower()
+
 class VocabGenerationResponse(BaseModel):
     """
     Structured response containing multiple vocab entries for AI generation
@@ -52,6 +58,21 @@ class VocabGenerationResponse(BaseModel):
     phrasal_verbs: List[VocabEntry]
     idioms: List[VocabEntry]
 
+class TopicVocabGeneration(BaseModel):
+    """
+    Generated vocab entries for one topic of a multi-topic request
+    """
+    topic: str
+    vocabularies: List[VocabEntry]
+    phrasal_verbs: List[VocabEntry]
+    idioms: List[VocabEntry]
+
+class MultiTopicVocabGenerationResponse(BaseModel):
+    """
+    Structured response for AI generation covering several topics in one request
+    """
+    topics: List[TopicVocabGeneration]
+
 class TopicList(BaseModel):
     """
     List of topics to process
@@ -414,6 +435,7 @@ class TTSResponse(BaseModel):
     duration_seconds: Optional[float] = None
     provider: Optional[VoiceProvider] = None
     voice_id: Optional[str] = None
+    cache_hit: Optional[bool] = None  # True when served from the TTS audio cache
     
     class Config:
         # Exclude audio_data from JSON serialization to avoid Unicode errors
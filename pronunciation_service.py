@@ -12,7 +12,7 @@ from models import (
     PronunciationRequest, PronunciationResponse, VoiceProvider,
     TTSRequest, TTSResponse
 )
-from tts_service import TTSService
+from tts_service import tts_service
 from supabase_database import SupabaseVocabDatabase
 
 
@@ -20,7 +20,7 @@ class PronunciationService:
     """Service for managing multiple pronunciation versions of vocabulary entries"""
     
     def __init__(self):
-        self.tts_service = TTSService()
+        self.tts_service = tts_service
         self.db = SupabaseVocabDatabase()
         
         # Use service role database from TTS service if available
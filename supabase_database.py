@@ -1,5 +1,6 @@
 from supabase import create_client, Client
-from typing import List, Dict, Any, Optional, Tuple
+from postgrest.exceptions import APIError
+from typing import List, Dict, Any, Iterable, Optional, Tuple, FrozenSet
 from models import (
     VocabEntry, CEFRLevel, UserVocabList, UserVocabEntry, VocabEntryWithUserData,
     FlashcardSession, FlashcardProgress, FlashcardStats, FlashcardCard, 
@@ -15,6 +16,16 @@ import re
 
 load_dotenv(override=True)
 
+# Unique index columns used to skip duplicate vocab entries on insert
+VOCAB_ENTRY_CONFLICT_COLUMNS = "topic_id,word_lower,level,part_of_speech"
+# Rows sent per upsert request, so large batches don't become one huge payload
+VOCAB_INSERT_CHUNK_SIZE = 100
+# Postgres errors meaning docs/vocab_entries_unique.sql hasn't been applied yet
+# (undefined word_lower column / no unique index matching the ON CONFLICT columns)
+MISSING_UNIQUE_INDEX_ERROR_CODES = frozenset({"42703", "42P10"})
+# Rows fetched per page when reading existing entries (PostgREST caps unpaginated responses)
+EXISTING_COMBINATIONS_PAGE_SIZE = 1000
+
 class SupabaseVocabDatabase:
     def __init__(self):
         """Initialize Supabase client"""
@@ -25,6 +36,9 @@ class SupabaseVocabDatabase:
             raise ValueError("SUPABASE_URL and SUPABASE_ANON_KEY must be set in environment variables")
         
         self.client: Client = create_client(self.supabase_url, self.supabase_key)
+        
+        # Cleared on the first upsert that finds the vocab_entries unique index missing
+        self._vocab_upsert_available = True
     
     def _parse_date(self, date_str: str) -> Optional[datetime]:
         """Parse various date formats from Supabase"""
@@ -111,10 +125,10 @@ class SupabaseVocabDatabase:
             print(f"Error creating topic '{topic_name}': {e}")
             raise
 
-    def insert_vocab_entries(self, entries: List[VocabEntry], topic_name: str = None, 
+    def insert_vocab_entries(self, entries: Iterable[VocabEntry], topic_name: str = None, 
                            category_name: str = None, target_language: str = None, 
                            original_language: str = None):
-        """Insert multiple vocab entries into Supabase, skipping duplicates"""
+        """Insert vocab entries (any iterable, consumed once) into Supabase, skipping duplicates"""
         inserted_count = 0
         skipped_count = 0
         inserted_entries = []  # Store inserted entries with their IDs
@@ -129,45 +143,20 @@ class SupabaseVocabDatabase:
             # Defensive: create_topic_if_not_exists should return an ID or raise
             raise RuntimeError(f"Failed to resolve topic_id for topic '{topic_name}'")
         
+        total_count = 0
+        chunk = []
         for entry in entries:
-            try:
-                # Prepare data for insertion
-                data = {
-                    "word": entry.word,
-                    "definition": entry.definition,
-                    "translation": entry.translation,
-                    "example": entry.example,
-                    "example_translation": entry.example_translation,
-                    "level": entry.level.value,
-                    "part_of_speech": entry.part_of_speech.value if entry.part_of_speech else None,
-                    "topic_id": topic_id,
-                    "target_language": target_language,
-                    "original_language": original_language
-                }
-                
-                # Insert into Supabase
-                result = self.client.table("vocab_entries").insert(data).execute()
-                
-                if result.data:
-                    inserted_count += 1
-                    # Store the entry with its database ID
-                    inserted_entry = result.data[0]
-                    inserted_entries.append({
-                        "entry": entry,
-                        "id": inserted_entry["id"],
-                        "database_data": inserted_entry
-                    })
-                else:
-                    skipped_count += 1
-                    
-            except Exception as e:
-                # Check if it's a unique constraint violation
-                if "duplicate key" in str(e).lower() or "unique" in str(e).lower():
-                    skipped_count += 1
-                    print(f"Skipped duplicate: {entry.word} (topic: {topic_name}, level: {entry.level.value})")
-                else:
-                    print(f"Error inserting {entry.word}: {e}")
-                    raise
+            chunk.append((topic_id, entry))
+            if len(chunk) == VOCAB_INSERT_CHUNK_SIZE:
+                inserted_entries.extend(self._upsert_vocab_chunk(chunk, target_language, original_language))
+                total_count += len(chunk)
+                chunk = []
+        if chunk:
+            inserted_entries.extend(self._upsert_vocab_chunk(chunk, target_language, original_language))
+            total_count += len(chunk)
+        
+        inserted_count = len(inserted_entries)
+        skipped_count = total_count - inserted_count
         
         print(f"Inserted {inserted_count} new vocab entries, skipped {skipped_count} duplicates")
         return {
@@ -176,6 +165,121 @@ class SupabaseVocabDatabase:
             "inserted_entries": inserted_entries
         }
     
+    def insert_vocab_entries_bulk(self, entries_by_topic: Dict[str, List[VocabEntry]], category_name: str = None,
+                                  target_language: str = None, original_language: str = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Insert entries for several topics with as few upserts as possible, skipping duplicates
+        
+        Returns a result per topic, shaped like insert_vocab_entries' return value.
+        """
+        entries_by_topic = {topic_name: entries for topic_name, entries in entries_by_topic.items() if entries}
+        if not entries_by_topic:
+            return {}
+        
+        # Resolve every topic ID in one query, creating only the topics that don't exist yet
+        topic_ids = self._get_topic_ids(list(entries_by_topic), category_name)
+        for topic_name in entries_by_topic:
+            if topic_name not in topic_ids:
+                topic_ids[topic_name] = self.create_topic_if_not_exists(topic_name, category_name)
+        
+        rows = [
+            (topic_ids[topic_name], entry)
+            for topic_name, entries in entries_by_topic.items()
+            for entry in entries
+        ]
+        inserted_by_topic_id = {topic_id: [] for topic_id in topic_ids.values()}
+        for start in range(0, len(rows), VOCAB_INSERT_CHUNK_SIZE):
+            for inserted in self._upsert_vocab_chunk(rows[start:start + VOCAB_INSERT_CHUNK_SIZE], target_language, original_language):
+                inserted_by_topic_id[inserted["database_data"]["topic_id"]].append(inserted)
+        
+        results = {}
+        for topic_name, entries in entries_by_topic.items():
+            inserted_entries = inserted_by_topic_id[topic_ids[topic_name]]
+            results[topic_name] = {
+                "inserted_count": len(inserted_entries),
+                "skipped_count": len(entries) - len(inserted_entries),
+                "inserted_entries": inserted_entries
+            }
+        
+        inserted_count = sum(result["inserted_count"] for result in results.values())
+        print(f"Inserted {inserted_count} new vocab entries across {len(results)} topics, "
+              f"skipped {len(rows) - inserted_count} duplicates")
+        return results
+    
+    def _upsert_vocab_chunk(self, chunk: List[Tuple[str, VocabEntry]],
+                            target_language: str, original_language: str) -> List[Dict[str, Any]]:
+        """Upsert one chunk of (topic_id, entry) pairs in a single request; returns the inserted ones with their IDs"""
+        rows = [
+            {
+                "word": entry.word,
+                "definition": entry.definition,
+                "translation": entry.translation,
+                "example": entry.example,
+                "example_translation": entry.example_translation,
+                "level": entry.level.value,
+                "part_of_speech": entry.part_of_speech.value if entry.part_of_speech else None,
+                "topic_id": topic_id,
+                "target_language": target_language,
+                "original_language": original_language
+            }
+            for topic_id, entry in chunk
+        ]
+        
+        inserted_rows = None
+        if self._vocab_upsert_available:
+            # Rows that hit the unique index (see docs/vocab_entries_unique.sql) are skipped by the database
+            try:
+                inserted_rows = self.client.table("vocab_entries").upsert(
+                    rows,
+                    on_conflict=VOCAB_ENTRY_CONFLICT_COLUMNS,
+                    ignore_duplicates=True
+                ).execute().data or []
+            except APIError as e:
+                if e.code not in MISSING_UNIQUE_INDEX_ERROR_CODES:
+                    print(f"Error inserting vocab entries: {e}")
+                    raise
+                self._vocab_upsert_available = False
+                print("⚠️ vocab_entries unique index is missing (apply docs/vocab_entries_unique.sql); "
+                      f"inserting entries one at a time instead: {e.message}")
+        if inserted_rows is None:
+            inserted_rows = self._insert_vocab_rows_individually(rows)
+        
+        # Only inserted rows are returned; match them back to their entries
+        entries_by_key = {
+            (row["topic_id"], row["word"], row["level"], row["part_of_speech"]): entry
+            for row, (_, entry) in zip(rows, chunk)
+        }
+        inserted_entries = []
+        for inserted_entry in inserted_rows:
+            entry = entries_by_key.get((
+                inserted_entry["topic_id"], inserted_entry["word"],
+                inserted_entry["level"], inserted_entry["part_of_speech"]
+            ))
+            if entry is None:
+                continue
+            inserted_entries.append({
+                "entry": entry,
+                "id": inserted_entry["id"],
+                "database_data": inserted_entry
+            })
+        return inserted_entries
+    
+    def _insert_vocab_rows_individually(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Insert rows one request at a time, skipping unique violations; returns the inserted rows"""
+        inserted_rows = []
+        for row in rows:
+            try:
+                result = self.client.table("vocab_entries").insert(row).execute()
+                inserted_rows.extend(result.data or [])
+            except Exception as e:
+                # Check if it's a unique constraint violation
+                if "duplicate key" in str(e).lower() or "unique" in str(e).lower():
+                    print(f"Skipped duplicate: {row['word']} (level: {row['level']})")
+                else:
+                    print(f"Error inserting {row['word']}: {e}")
+                    raise
+        return inserted_rows
+    
     def get_vocab_entries(self, topic_name: str = None, category_name: str = None, 
                          level: CEFRLevel = None, limit: int = 100) -> List[Dict[str, Any]]:
         """Retrieve vocab entries from Supabase with optional filters"""
@@ -194,8 +298,22 @@ class SupabaseVocabDatabase:
         result = query.execute()
         return result.data if result.data else []
     
-    def get_existing_combinations(self, topic_name: str = None, category_name: str = None) -> List[tuple]:
-        """Get existing word combinations for a topic to avoid duplicates"""
+    def count_vocab_entries(self, topic_name: str = None, category_name: str = None) -> int:
+        """Count vocab entries (optionally for one topic) without fetching the rows"""
+        query = self.client.table("vocab_entries").select("id", count="exact")
+        
+        if topic_name:
+            topic_id = self.get_topic_id(topic_name, category_name)
+            if not topic_id:
+                # Unknown topic has no entries (don't fall through to counting the whole table)
+                return 0
+            query = query.eq("topic_id", topic_id)
+        
+        result = query.limit(1).execute()
+        return result.count or 0
+    
+    def get_existing_combinations(self, topic_name: str = None, category_name: str = None) -> FrozenSet[tuple]:
+        """Get existing (lowercased word, level, part_of_speech) combinations for a topic to avoid duplicates"""
         query = self.client.table("vocab_entries").select("word, level, part_of_speech")
         
         if topic_name:
@@ -206,18 +324,56 @@ class SupabaseVocabDatabase:
         result = query.execute()
         
         if not result.data:
-            return []
+            return frozenset()
         
-        # Convert to tuple format for compatibility
-        combinations = []
-        for row in result.data:
-            combinations.append((
-                row["word"],
-                row["level"],
-                row["part_of_speech"]
-            ))
+        # Normalized once here so callers can test membership directly
+        return frozenset(
+            (row["word"].lower(), row["level"], row["part_of_speech"])
+            for row in result.data
+        )
+    
+    def _get_topic_ids(self, topic_names: List[str], category_name: str = None) -> Dict[str, str]:
+        """
+        Get topic IDs for several names in one query, keyed by name (missing topics are left out)
+        
+        Picks one topic per name: the one in category_name when there is one, otherwise the
+        first match, as get_topic_id does.
+        """
+        if not topic_names:
+            return {}
+        
+        result = self.client.table("topics").select("id, name, category_id").in_("name", list(topic_names)).execute()
+        category_id = self.get_category_id(category_name) if category_name else None
+        
+        topic_ids = {}
+        for row in result.data or []:
+            if row["name"] not in topic_ids or (category_id and row["category_id"] == category_id):
+                topic_ids[row["name"]] = row["id"]
+        return topic_ids
+    
+    def get_existing_combinations_bulk(self, topic_names: List[str], category_name: str = None) -> Dict[str, FrozenSet[tuple]]:
+        """Get existing combinations (as in get_existing_combinations) for several topics, keyed by topic name"""
+        combinations_by_topic = {topic_name: set() for topic_name in topic_names}
+        topic_names_by_id = {topic_id: topic_name for topic_name, topic_id in self._get_topic_ids(topic_names, category_name).items()}
+        
+        if topic_names_by_id:
+            # Page through the rows: a single response is silently capped by PostgREST
+            offset = 0
+            while True:
+                rows = self.client.table("vocab_entries").select(
+                    "word, level, part_of_speech, topic_id"
+                ).in_("topic_id", list(topic_names_by_id)).order("id").range(
+                    offset, offset + EXISTING_COMBINATIONS_PAGE_SIZE - 1
+                ).execute().data or []
+                for row in rows:
+                    combinations_by_topic[topic_names_by_id[row["topic_id"]]].add(
+                        (row["word"].lower(), row["level"], row["part_of_speech"])
+                    )
+                if len(rows) < EXISTING_COMBINATIONS_PAGE_SIZE:
+                    break
+                offset += EXISTING_COMBINATIONS_PAGE_SIZE
         
-        return combinations
+        return {topic_name: frozenset(combinations) for topic_name, combinations in combinations_by_topic.items()}
     
     def save_topic_list(self, topics: List[str], list_name: str = None, 
                        category: str = None, level: CEFRLevel = CEFRLevel.A2,
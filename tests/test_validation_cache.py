@@ -0,0 +1,60 @@
+"""
+Tests for the pre-AI shortcuts in ValidationCache.get_cached_result
+
+Answers that reach the similarity threshold are accepted as correct without the AI
+validator, so near-miss spellings that change the meaning must not reach it.
+Run with pytest or directly: python tests/test_validation_cache.py
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from validation_cache import ValidationCache
+
+# (user answer, correct answer) pairs that differ in meaning but share most characters
+WRONG_ANSWER_PAIRS = [
+    ("it is possible", "it is not possible"),
+    ("loose", "lose"),
+    ("desert", "dessert"),
+    ("a person who teaches", "a person who preaches"),
+    ("to accept something", "to except something"),
+]
+
+
+def _make_cache(directory: str) -> ValidationCache:
+    return ValidationCache(cache_db_path=os.path.join(directory, "validation_cache.db"))
+
+
+def test_near_miss_answers_are_not_accepted_without_ai():
+    with tempfile.TemporaryDirectory() as directory:
+        cache = _make_cache(directory)
+        try:
+            for user_answer, correct_answer in WRONG_ANSWER_PAIRS:
+                result = cache.get_cached_result(user_answer, correct_answer, "definition", "practice")
+                assert result is None, f"{user_answer!r} accepted for {correct_answer!r}: {result.reasoning}"
+            assert cache.stats['similarity_matches'] == 0
+        finally:
+            cache.close()
+
+
+def test_reordered_and_exact_answers_are_accepted():
+    with tempfile.TemporaryDirectory() as directory:
+        cache = _make_cache(directory)
+        try:
+            exact = cache.get_cached_result("  Desert ", "desert", "definition", "practice")
+            assert exact is not None and exact.is_correct
+
+            reordered = cache.get_cached_result("hot and dry", "dry and hot", "definition", "practice")
+            assert reordered is not None and reordered.is_correct
+            assert cache.stats['similarity_matches'] == 1
+        finally:
+            cache.close()
+
+
+if __name__ == "__main__":
+    test_near_miss_answers_are_not_accepted_without_ai()
+    test_reordered_and_exact_answers_are_accepted()
+    print("✅ validation cache tests passed")
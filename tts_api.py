@@ -3,29 +3,76 @@ TTS API endpoints for Flutter app integration
 Supports both Google TTS (free) and ElevenLabs (premium) with voice cloning
 """
 
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Form, Request, Response, BackgroundTasks
+from fastapi.responses import StreamingResponse
 from typing import List, Optional
 import asyncio
+import hashlib
+import itertools
+import json
+import logging
+import operator
+import os
+import tempfile
 from datetime import datetime
 
-from tts_service import TTSService
+from tts_service import tts_service, TTSStreamError
 from voice_cloning_service import VoiceCloningService
 from supabase_database import SupabaseVocabDatabase
 from audio_storage import AudioStorageService
+from config import Config
 from models import (
     TTSRequest, TTSResponse, VoiceCloneRequest, VoiceCloneResponse, 
-    UserVoiceProfile, UserSubscription, SubscriptionPlan, VoiceProvider
+    UserVoiceProfile, UserSubscription, VoiceProvider
 )
 
+logger = logging.getLogger(__name__)
+
 # Create router
 router = APIRouter(prefix="/tts", tags=["Text-to-Speech"])
 
 # Initialize services
 db = SupabaseVocabDatabase()
 audio_storage = AudioStorageService()
-tts_service = TTSService()
 voice_cloning_service = VoiceCloningService(db, audio_storage)
 
+# HTTP cache settings for read-mostly endpoints
+VOICES_CACHE_CONTROL = "public, max-age=3600"
+VOICES_ETAG = 'W/"voices-v1"'
+QUOTA_CACHE_CONTROL = "private, max-age=30"
+
+# Fields returned per pronunciation version by get_vocab_pronunciations
+PRONUNCIATION_VERSION_FIELDS = (
+    "id", "provider", "voice_id", "speed", "language",
+    "audio_url", "duration_seconds", "created_at"
+)
+_pronunciation_version_getter = operator.itemgetter(*PRONUNCIATION_VERSION_FIELDS)
+
+# Explicit column projections for list endpoints (avoid shipping unused columns)
+TTS_USAGE_COLUMNS = "id,provider,text_length,date,created_at"
+AUDIO_FILE_COLUMNS = "id,filename,file_url,file_size,mime_type,created_at"
+PRONUNCIATION_LIST_COLUMNS = ",".join(("vocab_entry_id", "pronunciation_type") + PRONUNCIATION_VERSION_FIELDS)
+
+# Speed used for each named version in batch pronunciation generation
+BATCH_VERSION_SPEEDS = {"slow": 0.75, "normal": 1.0, "fast": 1.25}
+
+# Voice clone upload limits
+UPLOAD_CHUNK_SIZE = 1 << 20  # 1 MiB
+MAX_VOICE_SAMPLE_SIZE = 10 * 1024 * 1024  # 10MB
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    """Check whether the client's If-None-Match header matches the given ETag"""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    # Weak comparison: ignore the W/ prefix on both sides
+    bare_etag = etag[2:] if etag.startswith("W/") else etag
+    return "*" in candidates or any(
+        (tag[2:] if tag.startswith("W/") else tag) == bare_etag for tag in candidates
+    )
+
 
 # ============================================================================
 # TTS GENERATION ENDPOINTS
@@ -37,7 +84,9 @@ async def generate_tts(
     user_id: str = Form(...),
     voice_id: Optional[str] = Form(None),
     language: str = Form("en"),
-    speed: float = Form(1.0)
+    speed: float = Form(1.0),
+    stream: bool = Form(False),
+    response: Response = None
 ):
     """
     Generate TTS audio for text
@@ -48,17 +97,20 @@ async def generate_tts(
         voice_id: Specific voice ID (optional, uses default based on subscription)
         language: Language code (en, vi, etc.)
         speed: Speech speed multiplier (0.5-2.0)
+        stream: Stream ElevenLabs audio (audio/mpeg) as it is synthesized instead of
+            returning a stored file URL; useful for long texts
+        response: Outgoing response (used for the X-TTS-Cache header)
         
     Returns:
-        TTSResponse with audio URL and metadata
+        TTSResponse with audio URL and metadata, or a streaming audio response
     """
     try:
         # Validate input
         if not text.strip():
             raise HTTPException(status_code=400, detail="Text cannot be empty")
         
-        if len(text) > 5000:
-            raise HTTPException(status_code=400, detail="Text too long (max 5000 characters)")
+        if len(text) > Config.MAX_TTS_CHARS:
+            raise HTTPException(status_code=400, detail=f"Text too long (max {Config.MAX_TTS_CHARS} characters)")
         
         if speed < 0.5 or speed > 2.0:
             raise HTTPException(status_code=400, detail="Speed must be between 0.5 and 2.0")
@@ -71,12 +123,24 @@ async def generate_tts(
             speed=speed
         )
         
+        if stream:
+            # Checks and the upstream request happen before streaming starts: once bytes
+            # are sent the status code is fixed
+            try:
+                audio_stream = await tts_service.open_tts_stream(request, user_id)
+            except TTSStreamError as e:
+                raise HTTPException(status_code=e.status_code, detail=e.message)
+            return StreamingResponse(audio_stream, media_type="audio/mpeg")
+        
         # Generate TTS
         result = await tts_service.generate_tts(request, user_id)
         
         if not result.success:
             raise HTTPException(status_code=500, detail=result.message)
         
+        if response is not None and result.cache_hit is not None:
+            response.headers["X-TTS-Cache"] = "HIT" if result.cache_hit else "MISS"
+        
         return result
         
     except HTTPException:
@@ -93,11 +157,12 @@ async def generate_vocab_pronunciation(
     provider: Optional[str] = Form(None),  # "google_tts" or "elevenlabs"
     language: str = Form("en"),
     speed: float = Form(1.0),  # Single speed value (0.25 to 4.0)
-    pronunciation_type: str = Form("normal")  # "slow", "normal", "fast", "custom"
+    pronunciation_type: str = Form("normal"),  # "slow", "normal", "fast", "custom"
+    background_tasks: BackgroundTasks = None
 ):
     """
     Generate a single pronunciation for a vocabulary entry
-    Saves pronunciation data to database for real app usage
+    Saves pronunciation data to database for real app usage (after the response is sent)
     
     Args:
         vocab_entry_id: ID of the vocabulary entry (can be UUID or simple text for testing)
@@ -107,6 +172,7 @@ async def generate_vocab_pronunciation(
         language: Language code
         speed: Speech speed (0.25 to 4.0)
         pronunciation_type: Type of pronunciation ("slow", "normal", "fast", "custom")
+        background_tasks: Injected by FastAPI; when absent (direct calls) the save is awaited inline
         
     Returns:
         TTSResponse for the generated pronunciation
@@ -146,7 +212,7 @@ async def generate_vocab_pronunciation(
         
         # Save pronunciation data to database (only for real UUID vocab entries)
         if is_uuid:
-            await _save_single_pronunciation_to_database(
+            save_kwargs = dict(
                 vocab_entry_id=vocab_entry_id,
                 word=word,
                 user_id=user_id,
@@ -158,11 +224,17 @@ async def generate_vocab_pronunciation(
                 audio_url=result.audio_url,
                 duration_seconds=result.duration_seconds
             )
+            if background_tasks is not None:
+                # Persist after the response is flushed so the client doesn't wait on the DB
+                background_tasks.add_task(_save_single_pronunciation_to_database, **save_kwargs)
+            else:
+                await _save_single_pronunciation_to_database(**save_kwargs)
         else:
-            print(f"ℹ️  Skipping pronunciation data saving for non-UUID vocab_entry_id: {vocab_entry_id}")
-            print(f"   For production use, provide a real vocabulary entry UUID")
+            logger.info("Skipping pronunciation data saving for non-UUID vocab_entry_id: %s "
+                        "(for production use, provide a real vocabulary entry UUID)", vocab_entry_id)
         
-        print(f"✅ Generated {pronunciation_type} pronunciation for '{word}' with {result.provider.value if result.provider else 'elevenlabs'}")
+        logger.info("Generated %s pronunciation for '%s' with %s", pronunciation_type, word,
+                    result.provider.value if result.provider else "elevenlabs")
         
         return result
         
@@ -180,8 +252,6 @@ async def _save_pronunciation_to_database(pronunciation_data: dict):
         
         if not db_client:
             # Fallback to regular database client
-            from supabase_database import SupabaseVocabDatabase
-            db = SupabaseVocabDatabase()
             db_client = db.client
         
         # Prepare data for vocab_pronunciations table
@@ -200,16 +270,17 @@ async def _save_pronunciation_to_database(pronunciation_data: dict):
         if existing.data:
             # Update existing record
             db_client.table("vocab_pronunciations").update(vocab_pronunciation_record).eq("vocab_entry_id", pronunciation_data["vocab_entry_id"]).execute()
-            print(f"✅ Updated pronunciation record for vocab_entry_id: {pronunciation_data['vocab_entry_id']}")
+            logger.info("Updated pronunciation record for vocab_entry_id: %s", pronunciation_data["vocab_entry_id"])
         else:
             # Insert new record
             db_client.table("vocab_pronunciations").insert(vocab_pronunciation_record).execute()
-            print(f"✅ Created pronunciation record for vocab_entry_id: {pronunciation_data['vocab_entry_id']}")
+            logger.info("Created pronunciation record for vocab_entry_id: %s", pronunciation_data["vocab_entry_id"])
         
         # Also save individual pronunciation versions to a separate table if it exists
         # This is optional - depends on your database schema
-        for version_type, version_data in pronunciation_data["versions"].items():
-            version_record = {
+        created_at = datetime.now().isoformat()
+        version_records = [
+            {
                 "vocab_entry_id": pronunciation_data["vocab_entry_id"],
                 "user_id": pronunciation_data["user_id"],
                 "pronunciation_type": version_type,
@@ -218,20 +289,22 @@ async def _save_pronunciation_to_database(pronunciation_data: dict):
                 "provider": version_data["provider"],
                 "voice_id": version_data["voice_id"],
                 "speed": version_data["speed"],
-                "created_at": datetime.now().isoformat()
+                "created_at": created_at
             }
-            
-            # Try to insert into vocab_pronunciation_versions table (if it exists)
+            for version_type, version_data in pronunciation_data["versions"].items()
+        ]
+        
+        # Insert all versions in a single request (one multi-row INSERT)
+        if version_records:
             try:
-                db_client.table("vocab_pronunciation_versions").insert(version_record).execute()
-                print(f"✅ Saved {version_type} pronunciation version to database")
+                db_client.table("vocab_pronunciation_versions").insert(version_records).execute()
+                logger.info("Saved %d pronunciation versions to database", len(version_records))
             except Exception as e:
                 # Table might not exist, that's okay
-                print(f"ℹ️  Note: vocab_pronunciation_versions table not found (this is optional)")
-                break
+                logger.info("Note: vocab_pronunciation_versions table not found (this is optional)")
                 
     except Exception as e:
-        print(f"❌ Error saving pronunciation to database: {e}")
+        logger.error("Error saving pronunciation to database: %s", e)
         # Don't raise exception - pronunciation generation succeeded, just database save failed
 
 
@@ -254,8 +327,6 @@ async def _save_single_pronunciation_to_database(
         
         if not db_client:
             # Fallback to regular database client
-            from supabase_database import SupabaseVocabDatabase
-            db = SupabaseVocabDatabase()
             db_client = db.client
         
         # Save to the new secure vocab_pronunciation_versions table
@@ -279,11 +350,11 @@ async def _save_single_pronunciation_to_database(
         if existing.data:
             # Update existing version
             db_client.table("vocab_pronunciation_versions").update(version_record).eq("id", existing.data[0]["id"]).execute()
-            print(f"✅ Updated {pronunciation_type} pronunciation for user {user_id} with {provider}")
+            logger.info("Updated %s pronunciation for user %s with %s", pronunciation_type, user_id, provider)
         else:
             # Insert new version
             db_client.table("vocab_pronunciation_versions").insert(version_record).execute()
-            print(f"✅ Created {pronunciation_type} pronunciation for user {user_id} with {provider}")
+            logger.info("Created %s pronunciation for user %s with %s", pronunciation_type, user_id, provider)
         
         # Also update the main vocab_pronunciations table for backward compatibility
         # Check if main record exists
@@ -307,7 +378,7 @@ async def _save_single_pronunciation_to_database(
             }
             
             db_client.table("vocab_pronunciations").update(update_record).eq("vocab_entry_id", vocab_entry_id).eq("user_id", user_id).execute()
-            print(f"✅ Updated main pronunciation record for user {user_id}")
+            logger.info("Updated main pronunciation record for user %s", user_id)
         else:
             # Create new main record
             new_versions = {
@@ -332,10 +403,10 @@ async def _save_single_pronunciation_to_database(
             }
             
             db_client.table("vocab_pronunciations").insert(new_record).execute()
-            print(f"✅ Created main pronunciation record for user {user_id}")
+            logger.info("Created main pronunciation record for user %s", user_id)
                 
     except Exception as e:
-        print(f"❌ Error saving pronunciation to database: {e}")
+        logger.error("Error saving pronunciation to database: %s", e)
         # Don't raise exception - pronunciation generation succeeded, just database save failed
 
 
@@ -361,29 +432,42 @@ async def generate_batch_vocab_pronunciations(
         Dictionary mapping vocab_entry_id to list of TTSResponse
     """
     try:
-        # Parse vocab entry IDs
-        entry_ids = [id.strip() for id in vocab_entry_ids.split(",")]
-        
-        results = {}
-        
-        for vocab_entry_id in entry_ids:
-            print(f"🔄 Processing vocabulary entry: {vocab_entry_id}")
-            
-            # Generate pronunciations for this entry
-            try:
-                pronunciations = await generate_vocab_pronunciation(
-                    vocab_entry_id=vocab_entry_id,
-                    user_id=user_id,
-                    voice_id=voice_id,
-                    language=language,
-                    versions=versions
-                )
-                results[vocab_entry_id] = pronunciations
-                print(f"✅ Completed {vocab_entry_id}: {len(pronunciations)} pronunciations")
+        # Parse vocab entry IDs, dropping blanks and repeats (order preserved)
+        entry_ids = list(dict.fromkeys(
+            entry_id for entry_id in (part.strip() for part in vocab_entry_ids.split(",")) if entry_id
+        ))
+        version_types = [v.strip() for v in (versions or "normal").split(",") if v.strip()]
+        
+        # Bounds the Supabase/TTS calls a large batch fans out at once
+        semaphore = asyncio.Semaphore(Config.BATCH_PRONUNCIATION_CONCURRENCY)
+        
+        async def process_entry(vocab_entry_id: str):
+            async with semaphore:
+                logger.debug("Processing vocabulary entry: %s", vocab_entry_id)
                 
-            except Exception as e:
-                print(f"❌ Failed {vocab_entry_id}: {e}")
-                results[vocab_entry_id] = {"error": str(e)}
+                # Generate pronunciations for this entry
+                try:
+                    pronunciations = []
+                    for version_type in version_types:
+                        pronunciations.append(await generate_vocab_pronunciation(
+                            vocab_entry_id=vocab_entry_id,
+                            user_id=user_id,
+                            voice_id=voice_id,
+                            provider=None,
+                            language=language,
+                            speed=BATCH_VERSION_SPEEDS.get(version_type, 1.0),
+                            pronunciation_type=version_type
+                        ))
+                    logger.debug("Completed %s: %d pronunciations", vocab_entry_id, len(pronunciations))
+                    return pronunciations
+                    
+                except Exception as e:
+                    logger.error("Failed %s: %s", vocab_entry_id, e)
+                    return {"error": str(e)}
+        
+        # Each unique entry is generated once, up to BATCH_PRONUNCIATION_CONCURRENCY entries at a time
+        entry_results = await asyncio.gather(*(process_entry(entry_id) for entry_id in entry_ids))
+        results = dict(zip(entry_ids, entry_results))
         
         return {
             "success": True,
@@ -403,8 +487,6 @@ async def _get_vocab_word(vocab_entry_id: str) -> Optional[str]:
         
         if not db_client:
             # Fallback to regular database client
-            from supabase_database import SupabaseVocabDatabase
-            db = SupabaseVocabDatabase()
             db_client = db.client
         
         result = db_client.table("vocab_entries").select("word").eq("id", vocab_entry_id).execute()
@@ -414,7 +496,7 @@ async def _get_vocab_word(vocab_entry_id: str) -> Optional[str]:
         return None
         
     except Exception as e:
-        print(f"❌ Error getting vocab word: {e}")
+        logger.error("Error getting vocab word: %s", e)
         return None
 
 
@@ -452,33 +534,45 @@ async def create_voice_clone(
         if len(audio_files) > 10:
             raise HTTPException(status_code=400, detail="Maximum 10 audio files allowed")
         
-        # Validate and read audio files
-        audio_data_list = []
-        for audio_file in audio_files:
-            # Validate file type
-            if not audio_file.content_type.startswith('audio/'):
-                raise HTTPException(
-                    status_code=400, 
-                    detail=f"Invalid file type: {audio_file.content_type}. Only audio files are allowed."
-                )
-            
-            # Check file size (max 10MB per file)
-            audio_data = await audio_file.read()
-            if len(audio_data) > 10 * 1024 * 1024:  # 10MB
-                raise HTTPException(
-                    status_code=400, 
-                    detail=f"File {audio_file.filename} is too large. Maximum size is 10MB."
-                )
+        # Validate and stream audio files to disk in chunks so we never hold
+        # every upload in memory at once
+        audio_file_paths = []
+        try:
+            for audio_file in audio_files:
+                # Validate file type
+                if not audio_file.content_type.startswith('audio/'):
+                    raise HTTPException(
+                        status_code=400, 
+                        detail=f"Invalid file type: {audio_file.content_type}. Only audio files are allowed."
+                    )
+                
+                temp_file = tempfile.NamedTemporaryFile(delete=False)
+                audio_file_paths.append(temp_file.name)
+                with temp_file:
+                    total_size = 0
+                    while chunk := await audio_file.read(UPLOAD_CHUNK_SIZE):
+                        total_size += len(chunk)
+                        # Check file size (max 10MB per file)
+                        if total_size > MAX_VOICE_SAMPLE_SIZE:
+                            raise HTTPException(
+                                status_code=400, 
+                                detail=f"File {audio_file.filename} is too large. Maximum size is 10MB."
+                            )
+                        temp_file.write(chunk)
             
-            audio_data_list.append(audio_data)
-        
-        # Create voice clone
-        result = await voice_cloning_service.create_voice_clone(
-            user_id=user_id,
-            voice_name=voice_name,
-            audio_files=audio_data_list,
-            description=description
-        )
+            # Create voice clone
+            result = await voice_cloning_service.create_voice_clone(
+                user_id=user_id,
+                voice_name=voice_name,
+                audio_files=audio_file_paths,
+                description=description
+            )
+        finally:
+            for path in audio_file_paths:
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
         
         if not result.success:
             raise HTTPException(status_code=500, detail=result.message)
@@ -588,33 +682,53 @@ async def get_user_subscription(user_id: str):
         raise HTTPException(status_code=500, detail=f"Error fetching subscription: {str(e)}")
 
 
+def _get_daily_usage_count(db_client, user_id: str, date: str) -> int:
+    """
+    Get a user's TTS request count for a day
+    
+    Reads the tts_usage_daily rollup (see docs/tts_usage_daily.sql) and falls back
+    to counting tts_usage rows if the rollup table has not been created yet.
+    """
+    try:
+        row = db_client.table("tts_usage_daily").select("count").eq("user_id", user_id).eq("date", date).maybe_single().execute()
+        return row.data["count"] if row and row.data else 0
+    except Exception as e:
+        logger.debug("tts_usage_daily unavailable, counting tts_usage instead: %s", e)
+    
+    # Let PostgREST count the rows (Content-Range) instead of shipping them all;
+    # limit(1) keeps the body to a single id (HEAD requests lose the count in this client)
+    result = db_client.table("tts_usage").select("id", count="exact").eq("user_id", user_id).eq("date", date).limit(1).execute()
+    return result.count or 0
+
+
 @router.get("/quota/{user_id}")
-async def get_tts_quota(user_id: str):
+async def get_tts_quota(user_id: str, request: Request, response: Response):
     """
     Get user's TTS quota information
     
     Args:
         user_id: User ID
+        request: Incoming request (used for If-None-Match)
+        response: Outgoing response (used for cache headers)
         
     Returns:
-        Quota information
+        Quota information, or 304 if the client's cached copy is current
     """
     try:
-        subscription = await tts_service.get_user_subscription(user_id)
-        quota_ok = await tts_service.check_tts_quota(user_id)
-        
-        # Get today's usage
         today = datetime.now().date()
-        result = tts_service.service_db.table("tts_usage").select("*").eq("user_id", user_id).eq("date", today.isoformat()).execute()
-        usage_count = len(result.data) if result.data else 0
         
-        # Calculate limits based on subscription
-        if subscription.plan == SubscriptionPlan.FREE:
-            daily_limit = 50  # Free users get 50 TTS requests per day
-        else:
-            daily_limit = 1000  # Premium users get 1000 TTS requests per day
+        # The two lookups are independent, so run them concurrently
+        subscription, usage_count = await asyncio.gather(
+            tts_service.get_user_subscription(user_id),
+            asyncio.to_thread(_get_daily_usage_count, tts_service.service_db, user_id, today.isoformat())
+        )
         
-        return {
+        # quota_ok, daily_usage and remaining_quota all come from this one count and limit,
+        # so they never contradict each other (or change the ETag by drifting apart)
+        daily_limit = tts_service.get_daily_limit(subscription)
+        quota_ok = usage_count < daily_limit
+        
+        quota_info = {
             "user_id": user_id,
             "subscription_plan": subscription.plan.value,
             "quota_ok": quota_ok,
@@ -624,6 +738,16 @@ async def get_tts_quota(user_id: str):
             "features": subscription.features
         }
         
+        # Stable across workers (unlike hash()), so any instance can answer a 304
+        digest = hashlib.md5(json.dumps(quota_info, sort_keys=True, default=str).encode()).hexdigest()
+        etag = f'W/"quota-{digest}"'
+        if _etag_matches(request, etag):
+            return Response(status_code=304, headers={"ETag": etag, "Cache-Control": QUOTA_CACHE_CONTROL})
+        
+        response.headers["Cache-Control"] = QUOTA_CACHE_CONTROL
+        response.headers["ETag"] = etag
+        return quota_info
+        
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error fetching quota: {str(e)}")
 
@@ -647,7 +771,7 @@ async def get_user_usage(user_id: str, limit: int = 50):
         if not db_client:
             raise HTTPException(status_code=500, detail="Service role not available")
         
-        result = db_client.table('tts_usage').select('*').eq('user_id', user_id).order('date', desc=True).limit(limit).execute()
+        result = db_client.table('tts_usage').select(TTS_USAGE_COLUMNS).eq('user_id', user_id).order('date', desc=True).limit(limit).execute()
         
         return {
             "user_id": user_id,
@@ -677,7 +801,7 @@ async def get_user_audio_files(user_id: str, limit: int = 50):
         if not db_client:
             raise HTTPException(status_code=500, detail="Service role not available")
         
-        result = db_client.table('audio_files').select('*').eq('user_id', user_id).order('created_at', desc=True).limit(limit).execute()
+        result = db_client.table('audio_files').select(AUDIO_FILE_COLUMNS).eq('user_id', user_id).order('created_at', desc=True).limit(limit).execute()
         
         return {
             "user_id": user_id,
@@ -709,30 +833,24 @@ async def get_vocab_pronunciations(user_id: str, vocab_entry_id: str, provider:
             raise HTTPException(status_code=500, detail="Service role not available")
         
         # Build query with user-specific filtering
-        query = db_client.table('vocab_pronunciation_versions').select('*').eq('user_id', user_id).eq('vocab_entry_id', vocab_entry_id)
+        query = db_client.table('vocab_pronunciation_versions').select(','.join(('pronunciation_type',) + PRONUNCIATION_VERSION_FIELDS)).eq('user_id', user_id).eq('vocab_entry_id', vocab_entry_id)
         
         if provider:
             query = query.eq('provider', provider)
         
-        result = query.order('created_at', desc=True).execute()
+        # Order by type first so rows arrive already grouped
+        result = query.order('pronunciation_type').order('created_at', desc=True).execute()
         
         # Group by pronunciation type for easier frontend consumption
-        pronunciations = {}
-        for record in result.data:
-            pronunciation_type = record.get('pronunciation_type')
-            if pronunciation_type not in pronunciations:
-                pronunciations[pronunciation_type] = []
-            
-            pronunciations[pronunciation_type].append({
-                "id": record.get('id'),
-                "provider": record.get('provider'),
-                "voice_id": record.get('voice_id'),
-                "speed": record.get('speed'),
-                "language": record.get('language'),
-                "audio_url": record.get('audio_url'),
-                "duration_seconds": record.get('duration_seconds'),
-                "created_at": record.get('created_at')
-            })
+        pronunciations = {
+            pronunciation_type: [
+                dict(zip(PRONUNCIATION_VERSION_FIELDS, _pronunciation_version_getter(record)))
+                for record in records
+            ]
+            for pronunciation_type, records in itertools.groupby(
+                result.data, key=operator.itemgetter('pronunciation_type')
+            )
+        }
         
         return {
             "user_id": user_id,
@@ -763,7 +881,7 @@ async def get_all_user_pronunciations(user_id: str, limit: int = 100):
         if not db_client:
             raise HTTPException(status_code=500, detail="Service role not available")
         
-        result = db_client.table('vocab_pronunciation_versions').select('*').eq('user_id', user_id).order('created_at', desc=True).limit(limit).execute()
+        result = db_client.table('vocab_pronunciation_versions').select(PRONUNCIATION_LIST_COLUMNS).eq('user_id', user_id).order('created_at', desc=True).limit(limit).execute()
         
         return {
             "user_id": user_id,
@@ -779,14 +897,24 @@ async def get_all_user_pronunciations(user_id: str, limit: int = 100):
 # ============================================================================
 
 @router.get("/voices/available")
-async def get_available_voices():
+async def get_available_voices(request: Request, response: Response):
     """
     Get list of available voices
     
+    Args:
+        request: Incoming request (used for If-None-Match)
+        response: Outgoing response (used for cache headers)
+    
     Returns:
-        List of available voices
+        List of available voices, or 304 if the client's cached copy is current
     """
     try:
+        if _etag_matches(request, VOICES_ETAG):
+            return Response(status_code=304, headers={"ETag": VOICES_ETAG, "Cache-Control": VOICES_CACHE_CONTROL})
+        
+        response.headers["Cache-Control"] = VOICES_CACHE_CONTROL
+        response.headers["ETag"] = VOICES_ETAG
+        
         # Standard ElevenLabs voices
         standard_voices = [
             {
@@ -826,40 +954,41 @@ async def get_available_voices():
 # HEALTH & STATUS ENDPOINTS
 # ============================================================================
 
+# Provider flags only change when the process restarts, so build the
+# status payloads once instead of on every probe
+TTS_FEATURES = {
+    "google_tts": hasattr(tts_service, '_google_api_key') and tts_service._google_api_key is not None,
+    "elevenlabs": tts_service._elevenlabs_configured,
+    "voice_cloning": voice_cloning_service.is_configured
+}
+TTS_STATUS = {
+    "tts_service": "operational",
+    **TTS_FEATURES,
+    "audio_storage": "operational",
+    "message": "TTS service is ready"
+}
+STATUS_CACHE_CONTROL = "public, max-age=10"
+
+
 @router.get("/status")
-async def get_tts_status():
+async def get_tts_status(response: Response):
     """
     Get TTS service status
     
     Returns:
         Service status information
     """
-    try:
-        return {
-            "tts_service": "operational",
-            "google_tts": hasattr(tts_service, '_google_api_key') and tts_service._google_api_key is not None,
-            "elevenlabs": tts_service._elevenlabs_configured,
-            "voice_cloning": voice_cloning_service.is_configured,
-            "audio_storage": "operational",
-            "message": "TTS service is ready"
-        }
-        
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error getting service status: {str(e)}")
+    response.headers["Cache-Control"] = STATUS_CACHE_CONTROL
+    return TTS_STATUS
 
 
 @router.get("/health")
-async def health_check():
+async def health_check(response: Response):
     """Health check for TTS service"""
+    response.headers["Cache-Control"] = STATUS_CACHE_CONTROL
     return {
         "status": "healthy",
         "service": "text-to-speech",
         "timestamp": datetime.now().isoformat(),
-        "features": {
-            "google_tts": hasattr(tts_service, '_google_api_key') and tts_service._google_api_key is not None,
-            "elevenlabs": tts_service._elevenlabs_configured,
-            "voice_cloning": voice_cloning_service.is_configured
-        }
+        "features": TTS_FEATURES
     }
-
-
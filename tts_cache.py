@@ -0,0 +1,161 @@
+"""
+TTS Cache
+Shared async key/value cache for TTS results and lookups.
+Uses Redis when REDIS_URL is configured and falls back to an in-process cache otherwise.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import orjson
+
+try:
+    import redis.asyncio as redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+from config import Config
+
+
+# INCR only when the key already exists, so a missing counter is never created without a TTL
+_INCR_EXISTING_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return redis.call('INCR', KEYS[1])
+end
+return nil
+"""
+
+
+class TTSCache:
+    """Async JSON cache with a Redis backend and an in-memory LRU fallback"""
+
+    def __init__(self, redis_url: Optional[str] = None, max_memory_entries: int = 10000):
+        """
+        Initialize the cache
+
+        Args:
+            redis_url: Redis connection URL (in-memory only if not set or redis isn't installed)
+            max_memory_entries: Maximum entries kept by the in-memory fallback
+        """
+        self.max_memory_entries = max_memory_entries
+        self._redis = None
+
+        # In-memory fallback: key -> (expires_at, value), kept in LRU order
+        self._memory_cache: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+        if redis_url and REDIS_AVAILABLE:
+            try:
+                pool = redis.ConnectionPool.from_url(redis_url, max_connections=20, decode_responses=True)
+                self._redis = redis.Redis(connection_pool=pool)
+                print("✅ TTS cache using Redis")
+            except Exception as e:
+                print(f"❌ Failed to initialize Redis cache, using in-memory cache: {e}")
+                self._redis = None
+
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'errors': 0
+        }
+
+    @property
+    def backend(self) -> str:
+        """Name of the active backend"""
+        return "redis" if self._redis is not None else "memory"
+
+    def _memory_get(self, key: str) -> Optional[Any]:
+        item = self._memory_cache.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self._memory_cache[key]
+            return None
+        self._memory_cache.move_to_end(key)
+        return value
+
+    def _memory_set(self, key: str, value: Any, ttl_seconds: int):
+        self._memory_cache[key] = (time.monotonic() + ttl_seconds, value)
+        self._memory_cache.move_to_end(key)
+        while len(self._memory_cache) > self.max_memory_entries:
+            self._memory_cache.popitem(last=False)
+
+    async def get(self, key: str) -> Optional[Any]:
+        """Get a cached value, or None on miss (backend errors count as misses)"""
+        try:
+            if self._redis is not None:
+                raw = await self._redis.get(key)
+                value = orjson.loads(raw) if raw is not None else None
+            else:
+                value = self._memory_get(key)
+        except Exception as e:
+            print(f"⚠️ TTS cache get failed for {key}: {e}")
+            self.stats['errors'] += 1
+            value = None
+
+        self.stats['hits' if value is not None else 'misses'] += 1
+        return value
+
+    async def set(self, key: str, value: Any, ttl_seconds: int):
+        """Cache a JSON-serializable value for ttl_seconds"""
+        try:
+            if self._redis is not None:
+                await self._redis.set(key, orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS), ex=ttl_seconds)
+            else:
+                self._memory_set(key, value, ttl_seconds)
+        except Exception as e:
+            print(f"⚠️ TTS cache set failed for {key}: {e}")
+            self.stats['errors'] += 1
+
+    async def incr_existing(self, key: str) -> Optional[int]:
+        """
+        Atomically increment an integer value if the key exists (its TTL is kept)
+
+        Returns the new value, or None if the key is missing or the backend failed,
+        so callers can seed the counter from the source of truth.
+        """
+        try:
+            if self._redis is not None:
+                return await self._redis.eval(_INCR_EXISTING_SCRIPT, 1, key)
+            value = self._memory_get(key)
+            if value is None:
+                return None
+            expires_at, _ = self._memory_cache[key]
+            self._memory_cache[key] = (expires_at, value + 1)
+            return value + 1
+        except Exception as e:
+            print(f"⚠️ TTS cache incr failed for {key}: {e}")
+            self.stats['errors'] += 1
+            return None
+
+    async def delete(self, key: str):
+        """Remove a cached value"""
+        try:
+            if self._redis is not None:
+                await self._redis.delete(key)
+            else:
+                self._memory_cache.pop(key, None)
+        except Exception as e:
+            print(f"⚠️ TTS cache delete failed for {key}: {e}")
+            self.stats['errors'] += 1
+
+    async def aclose(self):
+        """Close the Redis connection pool (call on application shutdown)"""
+        if self._redis is not None:
+            await self._redis.aclose()
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        total = self.stats['hits'] + self.stats['misses']
+        return {
+            **self.stats,
+            'backend': self.backend,
+            'hit_rate': (self.stats['hits'] / total) * 100 if total else 0.0,
+            'memory_cache_size': len(self._memory_cache)
+        }
+
+
+# Global cache instance
+tts_cache = TTSCache(Config.REDIS_URL)
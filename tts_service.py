@@ -4,13 +4,26 @@ Handles TTS generation using Google TTS for free users and ElevenLabs for paid u
 """
 
 import os
+import asyncio
 import base64
+import hashlib
 import io
 import tempfile
-from typing import Optional, Dict, Any, List
+from functools import lru_cache
+from typing import Optional, Dict, Any, List, AsyncIterator
 from datetime import datetime, timedelta
 import requests
 import json
+import httpx
+import orjson
+from pydantic import TypeAdapter
+
+# HTTP/2 for provider calls needs the optional h2 package
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
 
 # Google TTS
 from google.cloud import texttospeech
@@ -18,7 +31,7 @@ from google.oauth2 import service_account
 
 # ElevenLabs
 from elevenlabs.client import ElevenLabs
-from elevenlabs import Voice, VoiceSettings
+from elevenlabs import VoiceSettings
 
 # Audio processing
 from pydub import AudioSegment
@@ -32,15 +45,125 @@ from models import (
 from config import Config
 from supabase_database import SupabaseVocabDatabase
 from audio_storage import audio_storage
+from tts_cache import tts_cache
+from db_pool import db_pool
+
+
+# Key for TTS audio cache digests; bump the version to invalidate cached audio
+_CACHE_KEY = b"vocab-tts-v1"
+
+# How long a cached daily usage counter is trusted before re-counting tts_usage
+QUOTA_COUNTER_TTL_SECONDS = 300
+
+# Bulk validator for voice profile rows
+_PROFILES_ADAPTER = TypeAdapter(List[UserVoiceProfile])
+
+# tts_usage rows are buffered and written in batches every interval (or sooner once a batch is full)
+USAGE_FLUSH_INTERVAL_SECONDS = 1.0
+USAGE_FLUSH_MAX_ROWS = 500
+
+# Standard ElevenLabs voice used when the request doesn't name one
+DEFAULT_ELEVENLABS_VOICE_ID = "JBFqnCBsd6RMkjVDRZzb"
+
+# Voice settings for cloned-voice synthesis (only for models that support them)
+_DEFAULT_VOICE_SETTINGS = VoiceSettings(
+    stability=0.5,
+    similarity_boost=0.5,
+    style=0.0,
+    use_speaker_boost=True
+)
+
+# Speeds accepted by ElevenLabs voice_settings, used by streamed synthesis
+STREAM_SPEED_RANGE = (0.7, 1.2)
+
+# Columns selected when loading voice profiles over the direct Postgres pool
+VOICE_PROFILE_SQL_COLUMNS = (
+    "id::text, user_id::text, voice_name, provider, voice_id, status, "
+    "audio_samples, created_at, updated_at, is_active"
+)
+
+
+class TTSStreamError(Exception):
+    """A streamed TTS request that can't be served, with the HTTP status to report"""
+    
+    def __init__(self, status_code: int, message: str):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+
+
+def tts_cache_key(text: str, voice: Optional[str], provider: Optional[str], language: str, speed: float,
+                  pitch: float = 0.0, volume: float = 1.0, plan: Optional[str] = None,
+                  user_id: Optional[str] = None, cloned_voice: bool = False) -> bytes:
+    """
+    Build a compact cache key for generated TTS audio
+    
+    Returns a 16-byte keyed BLAKE2b digest rather than the raw text, so long
+    inputs (up to Config.MAX_TTS_CHARS characters) don't bloat cache keys.
+    """
+    header = f"{user_id}|{int(cloned_voice)}|{voice}|{provider}|{language}|{speed:.2f}|{pitch:.2f}|{volume:.2f}|{plan}".encode()
+    return hashlib.blake2b(
+        header + b"\x00" + text.encode("utf-8"),
+        digest_size=16,
+        key=_CACHE_KEY
+    ).digest()
+
+
+@lru_cache(maxsize=256)
+def _google_voice_config(language: str, speed: float, pitch: float, volume: float) -> tuple:
+    """
+    Voice and audioConfig sections of a Google TTS request
+    
+    Shared between calls with the same settings, so callers must not mutate them.
+    """
+    voice = {
+        "languageCode": language,
+        "ssmlGender": "NEUTRAL"
+    }
+    audio_config = {
+        "audioEncoding": "MP3",
+        "speakingRate": speed,
+        "pitch": pitch,
+        "volumeGainDb": 20 * volume - 20
+    }
+    return voice, audio_config
+
+
+@lru_cache(maxsize=1)
+def _get_vocab_db() -> SupabaseVocabDatabase:
+    """Shared anon-key database wrapper"""
+    return SupabaseVocabDatabase()
+
+
+@lru_cache(maxsize=1)
+def get_service_client():
+    """Shared service role Supabase client (keeps its connection pool across requests)"""
+    from supabase import create_client
+    return create_client(Config.SUPABASE_URL, Config.SUPABASE_SERVICE_ROLE_KEY)
 
 
 class TTSService:
     """Text-to-Speech service with support for Google TTS and ElevenLabs voice cloning"""
     
     def __init__(self):
-        self.db = SupabaseVocabDatabase()
+        self.db = _get_vocab_db()
         self._google_client = None
         self._elevenlabs_configured = False
+        self._http_client: Optional[httpx.AsyncClient] = None
+        
+        # In-flight synthesis keyed by the per-user audio cache key, so identical concurrent
+        # requests from one user share one provider call
+        self._inflight: Dict[str, asyncio.Future] = {}
+        
+        # Detached database writes (kept referenced until they finish)
+        self._background_tasks: set = set()
+        
+        # Pending tts_usage rows and the task that flushes them
+        self._usage_buffer: List[Dict[str, Any]] = []
+        self._usage_flusher: Optional[asyncio.Task] = None
+        
+        # Caps concurrent blocking ElevenLabs SDK calls (each one occupies a worker thread)
+        self._elevenlabs_semaphore = asyncio.Semaphore(Config.ELEVENLABS_CONCURRENCY)
         
         # Create service role database for TTS operations
         self._init_service_role_db()
@@ -56,8 +179,7 @@ class TTSService:
         # - Backend: Service role key for system operations (TTS generation, file storage, etc.)
         try:
             if Config.SUPABASE_SERVICE_ROLE_KEY:
-                from supabase import create_client
-                service_client = create_client(Config.SUPABASE_URL, Config.SUPABASE_SERVICE_ROLE_KEY)
+                service_client = get_service_client()
                 
                 # Use service role for backend operations (TTS generation, file storage, usage tracking)
                 self.service_db = service_client
@@ -79,6 +201,7 @@ class TTSService:
                 self._google_client = None  # We'll use REST API instead
                 self._google_api_key = Config.GOOGLE_TTS_API_KEY
                 self._google_project_id = Config.GOOGLE_TTS_PROJECT_ID
+                self._google_url = f"https://texttospeech.googleapis.com/v1/text:synthesize?key={self._google_api_key}"
                 print("Google TTS configured for API key authentication (REST API)")
             else:
                 print("Google TTS API key not found")
@@ -105,73 +228,199 @@ class TTSService:
             print(f"❌ Failed to initialize ElevenLabs: {e}")
             self._elevenlabs_configured = False
     
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        """Shared pooled HTTP client for provider calls (keeps TLS connections alive)"""
+        if self._http_client is None or self._http_client.is_closed:
+            self._http_client = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,  # Multiplex concurrent requests over one connection
+                limits=httpx.Limits(max_keepalive_connections=50, max_connections=100),
+                timeout=httpx.Timeout(30.0)
+            )
+        return self._http_client
+    
+    async def aclose(self):
+        """Finish pending background writes and close the shared HTTP client (call on application shutdown)"""
+        if self._usage_flusher is not None:
+            self._usage_flusher.cancel()
+        await self._flush_usage()
+        if self._background_tasks:
+            await asyncio.gather(*self._background_tasks, return_exceptions=True)
+        if self._http_client is not None and not self._http_client.is_closed:
+            await self._http_client.aclose()
+        self._http_client = None
+    
+    def _spawn(self, coro, description: str):
+        """Run a coroutine in the background, logging (not raising) its failure"""
+        task = asyncio.create_task(coro)
+        self._background_tasks.add(task)
+        
+        def _done(t: asyncio.Task):
+            self._background_tasks.discard(t)
+            if not t.cancelled() and t.exception() is not None:
+                print(f"❌ Background task failed ({description}): {t.exception()}")
+        
+        task.add_done_callback(_done)
+        return task
+    
+    async def _insert_row(self, table: str, row: Dict[str, Any]):
+        """Insert a row with the service role client without blocking the event loop"""
+        await asyncio.to_thread(self.service_db.table(table).insert(row).execute)
+    
+    async def _delete_audio_metadata(self, insert_task: asyncio.Task, user_id: str, filename: str):
+        """Remove the audio_files row written for an upload that failed"""
+        try:
+            await insert_task
+        except Exception:
+            return  # Nothing was written
+        await asyncio.to_thread(
+            self.service_db.table("audio_files").delete().eq("user_id", user_id).eq("filename", filename).execute
+        )
+    
+    async def _flush_usage(self):
+        """Write all buffered tts_usage rows, in batches of up to USAGE_FLUSH_MAX_ROWS"""
+        while self._usage_buffer:
+            batch = self._usage_buffer[:USAGE_FLUSH_MAX_ROWS]
+            del self._usage_buffer[:USAGE_FLUSH_MAX_ROWS]
+            try:
+                await asyncio.to_thread(self.service_db.table("tts_usage").insert(batch).execute)
+            except Exception as e:
+                print(f"❌ Failed to write {len(batch)} TTS usage rows: {e}")
+    
+    async def _usage_flush_loop(self):
+        # Exits once the buffer is empty; record_tts_usage restarts it on the next row
+        while self._usage_buffer:
+            await asyncio.sleep(USAGE_FLUSH_INTERVAL_SECONDS)
+            await self._flush_usage()
+    
     async def get_user_subscription(self, user_id: str) -> UserSubscription:
-        """Get user's subscription information"""
+        """Get user's subscription information (cached briefly per user)"""
+        cached = await tts_cache.get(f"sub:{user_id}")
+        if cached:
+            return UserSubscription(**cached)
+        
+        subscription = await self._fetch_user_subscription(user_id)
+        if subscription is not None:
+            payload = subscription.model_dump(mode="json")
+            await asyncio.gather(
+                tts_cache.set(f"sub:{user_id}", payload, Config.SUBSCRIPTION_CACHE_TTL_SECONDS),
+                # Longer-lived copy served if the database is unreachable later
+                tts_cache.set(f"sub-stale:{user_id}", payload, Config.SUBSCRIPTION_STALE_TTL_SECONDS)
+            )
+            return subscription
+        
+        # Lookup failed: serve the last known subscription rather than downgrading paid users
+        stale = await tts_cache.get(f"sub-stale:{user_id}")
+        if stale:
+            print(f"⚠️ Subscription lookup failed, serving last known plan for user {user_id} (cache_fallback=true)")
+            return UserSubscription(**stale)
+        
+        # Return free plan as fallback (not cached, so the next call retries the database)
+        return self._free_subscription(user_id)
+    
+    def _free_subscription(self, user_id: str) -> UserSubscription:
+        """Default subscription for users without a subscription row"""
+        return UserSubscription(
+            user_id=user_id,
+            plan=SubscriptionPlan.FREE,
+            features={
+                "voice_cloning": False,
+                "unlimited_tts": False,
+                "custom_voices": False,
+                "high_quality_audio": False
+            }
+        )
+    
+    def _subscription_from_row(self, data: Dict[str, Any]) -> UserSubscription:
+        """Build a subscription from a user_subscriptions row (pydantic parses the timestamps and plan)"""
+        if data.get("features") is None:
+            data = {key: value for key, value in data.items() if key != "features"}
+        return UserSubscription(**data)
+    
+    async def invalidate_user_subscription(self, user_id: str):
+        """Drop the cached subscription for a user (call after changing their plan)"""
+        await tts_cache.delete(f"sub:{user_id}")
+        await tts_cache.delete(f"sub-stale:{user_id}")
+    
+    async def _fetch_user_subscription(self, user_id: str) -> Optional[UserSubscription]:
+        """Load a user's subscription from the database, or None if the lookup failed"""
         try:
             print(f"🔍 DEBUG: Looking up subscription for user_id: '{user_id}'")
+            if db_pool.enabled:
+                row = await db_pool.fetchrow(
+                    "SELECT user_id::text, plan, is_active, expires_at, created_at, updated_at, features "
+                    "FROM user_subscriptions WHERE user_id = $1 LIMIT 1",
+                    user_id
+                )
+                if row is None:
+                    return self._free_subscription(user_id)
+                return self._subscription_from_row(row)
+            
             # Use service role database for backend operations (bypasses RLS)
             db_client = self.service_db if self.service_db else self.db.client
-            result = db_client.table("user_subscriptions").select("*").eq("user_id", user_id).execute()
+            # Off the event loop so it can overlap with other lookups
+            result = await asyncio.to_thread(db_client.table("user_subscriptions").select("*").eq("user_id", user_id).execute)
             print(f"🔍 DEBUG: Subscription query returned {len(result.data) if result.data else 0} results")
             
             if result.data:
                 data = result.data[0]
                 print(f"🔍 DEBUG: Found subscription data: {data}")
-                subscription = UserSubscription(
-                    user_id=data["user_id"],
-                    plan=SubscriptionPlan(data["plan"]),
-                    is_active=data["is_active"],
-                    expires_at=datetime.fromisoformat(data["expires_at"]) if data["expires_at"] else None,
-                    created_at=datetime.fromisoformat(data["created_at"]) if data["created_at"] else None,
-                    updated_at=datetime.fromisoformat(data["updated_at"]) if data["updated_at"] else None,
-                    features=data.get("features", {})
-                )
+                subscription = self._subscription_from_row(data)
                 print(f"🔍 DEBUG: Parsed subscription: plan={subscription.plan}, is_active={subscription.is_active}")
                 return subscription
             else:
                 # Default to free plan
                 print(f"🔍 DEBUG: No subscription found, defaulting to FREE plan")
-                return UserSubscription(
-                    user_id=user_id,
-                    plan=SubscriptionPlan.FREE,
-                    features={
-                        "voice_cloning": False,
-                        "unlimited_tts": False,
-                        "custom_voices": False,
-                        "high_quality_audio": False
-                    }
-                )
+                return self._free_subscription(user_id)
         except Exception as e:
             print(f"Error getting user subscription: {e}")
-            # Return free plan as fallback
-            return UserSubscription(
-                user_id=user_id,
-                plan=SubscriptionPlan.FREE,
-                features={
-                    "voice_cloning": False,
-                    "unlimited_tts": False,
-                    "custom_voices": False,
-                    "high_quality_audio": False
-                }
-            )
+            return None
     
-    async def check_tts_quota(self, user_id: str) -> bool:
+    async def _get_today_usage_count(self, user_id: str, today: Optional[str] = None) -> int:
+        """Get today's TTS usage count from the cached counter, seeding it from the database on a miss"""
+        today = today or datetime.now().date().isoformat()
+        counter_key = f"ttsq:{user_id}:{today}"
+        
+        cached = await tts_cache.get(counter_key)
+        if cached is not None:
+            return cached
+        
+        # PRODUCTION: Use anon key with RLS for user data operations
+        # This ensures users can only access their own usage data
+        result = await asyncio.to_thread(
+            self.db.client.table("tts_usage").select("id", count="exact").eq("user_id", user_id).eq("date", today).limit(1).execute
+        )
+        usage_count = result.count or 0
+        
+        # Short TTL: the counter is re-seeded from tts_usage regularly, which also
+        # corrects drift between workers when the in-memory backend is used
+        await tts_cache.set(counter_key, usage_count, QUOTA_COUNTER_TTL_SECONDS)
+        return usage_count
+    
+    def get_daily_limit(self, subscription: UserSubscription) -> int:
+        """Daily TTS request limit for the subscription plan"""
+        if subscription.plan == SubscriptionPlan.FREE:
+            return Config.MAX_FREE_TTS_REQUESTS_PER_DAY
+        else:
+            return Config.MAX_PREMIUM_TTS_REQUESTS_PER_DAY
+    
+    def _has_quota(self, subscription: UserSubscription, usage_count: int) -> bool:
+        """Check today's usage against the daily limit for the subscription plan"""
+        return usage_count < self.get_daily_limit(subscription)
+    
+    async def check_tts_quota(self, user_id: str, subscription: Optional[UserSubscription] = None) -> bool:
         """Check if user has remaining TTS quota using anon key with RLS"""
         try:
-            subscription = await self.get_user_subscription(user_id)
-            
-            # PRODUCTION: Use anon key with RLS for user data operations
-            # This ensures users can only access their own usage data
-            today = datetime.now().date()
-            result = self.db.client.table("tts_usage").select("*").eq("user_id", user_id).eq("date", today.isoformat()).execute()
-            
-            usage_count = len(result.data) if result.data else 0
+            if subscription is None:
+                subscription, usage_count = await asyncio.gather(
+                    self.get_user_subscription(user_id),
+                    self._get_today_usage_count(user_id)
+                )
+            else:
+                usage_count = await self._get_today_usage_count(user_id)
             
             # Check quota based on subscription
-            if subscription.plan == SubscriptionPlan.FREE:
-                return usage_count < Config.MAX_FREE_TTS_REQUESTS_PER_DAY
-            else:
-                return usage_count < Config.MAX_PREMIUM_TTS_REQUESTS_PER_DAY
+            return self._has_quota(subscription, usage_count)
                 
         except Exception as e:
             print(f"Error checking TTS quota: {e}")
@@ -180,19 +429,25 @@ class TTSService:
     async def record_tts_usage(self, user_id: str, provider: VoiceProvider, text_length: int, authenticated_client=None):
         """Record TTS usage for quota tracking using service role key"""
         try:
+            now = datetime.now()
             usage_data = {
                 "user_id": user_id,
                 "provider": provider.value,
                 "text_length": text_length,
-                "date": datetime.now().date().isoformat(),
-                "created_at": datetime.now().isoformat()
+                "date": now.date().isoformat(),
+                "created_at": now.isoformat()
             }
             
             # PRODUCTION: Use service role key for backend operations
             # This bypasses RLS policies for legitimate system operations
             if hasattr(self, 'service_db') and self.service_db:
-                self.service_db.table("tts_usage").insert(usage_data).execute()
-                print(f"✅ TTS usage recorded for user {user_id}")
+                # Count against the quota right away; the audit row is written with the next batch
+                await tts_cache.incr_existing(f"ttsq:{user_id}:{usage_data['date']}")
+                self._usage_buffer.append(usage_data)
+                if len(self._usage_buffer) >= USAGE_FLUSH_MAX_ROWS:
+                    self._spawn(self._flush_usage(), "flush TTS usage rows")
+                elif self._usage_flusher is None or self._usage_flusher.done():
+                    self._usage_flusher = asyncio.create_task(self._usage_flush_loop())
             else:
                 print("❌ Service role database not available for usage tracking")
                 
@@ -201,84 +456,95 @@ class TTSService:
     
     async def generate_tts(self, request: TTSRequest, user_id: str, authenticated_client=None) -> TTSResponse:
         """Generate TTS audio based on user's subscription"""
+        # Reject unusable text before any database or provider calls
+        if not request.text or not request.text.strip():
+            return TTSResponse(success=False, message="Text cannot be empty")
+        if len(request.text) > Config.MAX_TTS_CHARS:
+            return TTSResponse(success=False, message=f"Text too long (max {Config.MAX_TTS_CHARS} characters)")
+        
         try:
             # Ensure user exists in profiles table
             from vocab_api import ensure_user_exists
             await ensure_user_exists(user_id)
             
+            # Get user subscription and today's usage concurrently (the subscription
+            # is fetched once and reused for both the quota and provider choice)
+            today = datetime.now().date().isoformat()
+            subscription, usage_count = await asyncio.gather(
+                self.get_user_subscription(user_id),
+                self._get_today_usage_count(user_id, today)
+            )
+            
             # Check quota
-            if not await self.check_tts_quota(user_id):
+            if not self._has_quota(subscription, usage_count):
                 return TTSResponse(
                     success=False,
                     message="Daily TTS quota exceeded. Please upgrade your plan or try again tomorrow."
                 )
             
-            # Get user subscription
-            subscription = await self.get_user_subscription(user_id)
+            # Resolve the voice against the user's own profiles before the cache lookup, so cached
+            # cloned-voice audio is only served to its owner while the profile is still active
+            cloned_voice = False
+            if request.voice_id and not request.voice_id.startswith('google_'):
+                voice_profile = await self._get_user_voice_profile(user_id, request.voice_id)
+                cloned_voice = voice_profile is not None and voice_profile.status == VoiceCloneStatus.COMPLETED
             
-            # Choose provider based on subscription and request
-            print(f"🔍 DEBUG: User ID: '{user_id}'")
-            print(f"🔍 DEBUG: User subscription plan: {subscription.plan}")
-            print(f"🔍 DEBUG: Request voice_id: '{request.voice_id}'")
-            print(f"🔍 DEBUG: Request provider: {request.provider}")
-            
-            if subscription.plan == SubscriptionPlan.FREE:
-                # Free users: Check if they have a custom voice first
-                if request.voice_id:
-                    voice_profile = await self._get_user_voice_profile(user_id, request.voice_id)
-                    if voice_profile and voice_profile.status == VoiceCloneStatus.COMPLETED:
-                        # User has their own custom voice, allow them to use it
-                        print(f"🔍 DEBUG: FREE user using their own custom voice")
-                        return await self._generate_elevenlabs_tts(request, user_id, authenticated_client)
-                    elif request.voice_id.startswith('google_') or request.voice_id == 'google_default':
-                        # Explicitly request Google TTS
-                        print(f"🔍 DEBUG: FREE user using Google TTS (explicit request)")
-                        return await self._generate_google_tts(request, user_id, authenticated_client)
-                    else:
-                        # Try to use ElevenLabs standard voice (may fail if not premium)
-                        print(f"🔍 DEBUG: FREE user trying ElevenLabs standard voice")
-                        return await self._generate_elevenlabs_standard_tts(request, user_id, authenticated_client)
-                else:
-                    # No voice_id specified, use Google TTS
-                    print(f"🔍 DEBUG: FREE user using Google TTS (default)")
-                    return await self._generate_google_tts(request, user_id, authenticated_client)
-            else:
-                # Premium users: Choice between Google TTS and ElevenLabs
-                if request.provider:
-                    # User explicitly specified provider
-                    if request.provider == VoiceProvider.GOOGLE_TTS:
-                        return await self._generate_google_tts(request, user_id, authenticated_client)
-                    elif request.provider == VoiceProvider.ELEVENLABS:
-                        if request.voice_id:
-                            # Check if it's a custom cloned voice
-                            voice_profile = await self._get_user_voice_profile(user_id, request.voice_id)
-                            if voice_profile and voice_profile.status == VoiceCloneStatus.COMPLETED:
-                                return await self._generate_elevenlabs_tts(request, user_id, authenticated_client)
-                        return await self._generate_elevenlabs_standard_tts(request, user_id, authenticated_client)
-                elif request.voice_id:
-                    # No provider specified, but voice_id given - auto-detect
-                    print(f"🔍 DEBUG: Auto-detecting provider for voice_id: '{request.voice_id}'")
-                    voice_profile = await self._get_user_voice_profile(user_id, request.voice_id)
-                    print(f"🔍 DEBUG: Voice profile found: {voice_profile is not None}")
-                    if voice_profile:
-                        print(f"🔍 DEBUG: Voice profile status: {voice_profile.status}")
-                        print(f"🔍 DEBUG: Voice profile provider: {voice_profile.provider}")
-                    
-                    if voice_profile and voice_profile.status == VoiceCloneStatus.COMPLETED:
-                        # Use cloned voice (ElevenLabs)
-                        print(f"🔍 DEBUG: Using ElevenLabs cloned voice")
-                        return await self._generate_elevenlabs_tts(request, user_id, authenticated_client)
-                    elif request.voice_id.startswith('google_') or request.voice_id == 'google_default':
-                        # Explicitly request Google TTS
-                        print(f"🔍 DEBUG: Using Google TTS (explicit request)")
-                        return await self._generate_google_tts(request, user_id, authenticated_client)
-                    else:
-                        # Use ElevenLabs with standard voice
-                        print(f"🔍 DEBUG: Using ElevenLabs standard voice")
-                        return await self._generate_elevenlabs_standard_tts(request, user_id, authenticated_client)
-                else:
-                    # No provider or voice_id specified - use Google TTS as default for premium users
-                    return await self._generate_google_tts(request, user_id, authenticated_client)
+            # Serve identical requests from the audio cache
+            cache_key = self._audio_cache_key(request, subscription, user_id, cloned_voice)
+            cached = await tts_cache.get(cache_key)
+            if cached:
+                return TTSResponse(
+                    success=True,
+                    message="TTS generated successfully (cached)",
+                    cache_hit=True,
+                    **cached
+                )
+            
+            # An identical request from the same user is already being synthesized: share its result.
+            # In-flight requests are keyed like the audio cache (per user and cloned-voice status),
+            # so a follower never receives another user's file or voice
+            flight = self._inflight.get(cache_key)
+            if flight is not None:
+                try:
+                    result = await asyncio.shield(flight)
+                    if result.success:
+                        result = result.model_copy(update={"cache_hit": True})
+                    return result
+                except asyncio.CancelledError:
+                    if not flight.cancelled():
+                        raise  # We were cancelled ourselves
+                    # The leader was cancelled; synthesize on our own below
+            
+            # No await between the lookup above and registering here, so there is
+            # exactly one leader per key
+            flight = asyncio.get_running_loop().create_future()
+            self._inflight[cache_key] = flight
+            try:
+                result = await self._generate_for_subscription(request, user_id, subscription, authenticated_client)
+                
+                if result.success and result.audio_url:
+                    ttl = (Config.TTS_CACHE_TTL_ELEVENLABS_SECONDS if result.provider == VoiceProvider.ELEVENLABS
+                           else Config.TTS_CACHE_TTL_GOOGLE_SECONDS)
+                    await tts_cache.set(cache_key, {
+                        "audio_url": result.audio_url,
+                        "duration_seconds": result.duration_seconds,
+                        "provider": result.provider.value if result.provider else None,
+                        "voice_id": result.voice_id
+                    }, ttl)
+                    result.cache_hit = False
+            except asyncio.CancelledError:
+                flight.cancel()
+                raise
+            except Exception as e:
+                result = TTSResponse(
+                    success=False,
+                    message=f"TTS generation failed: {str(e)}"
+                )
+            finally:
+                self._inflight.pop(cache_key, None)
+            
+            flight.set_result(result)
+            return result
                 
         except Exception as e:
             return TTSResponse(
@@ -286,6 +552,95 @@ class TTSService:
                 message=f"TTS generation failed: {str(e)}"
             )
     
+    def _audio_cache_key(self, request: TTSRequest, subscription: UserSubscription, user_id: str,
+                         cloned_voice: bool) -> str:
+        """
+        Cache key for generated audio
+        
+        Scoped to the user, since the cached URL points at their own stored file, and to
+        the plan and cloned-voice status, since both decide which provider is used.
+        """
+        digest = tts_cache_key(
+            request.text,
+            request.voice_id,
+            request.provider.value if request.provider else None,
+            request.language,
+            request.speed,
+            request.pitch,
+            request.volume,
+            subscription.plan.value,
+            user_id,
+            cloned_voice
+        )
+        return f"tts:{digest.hex()}"
+    
+    async def _generate_for_subscription(self, request: TTSRequest, user_id: str, subscription: UserSubscription,
+                                         authenticated_client=None) -> TTSResponse:
+        """Pick a provider for the user's plan and request, then synthesize"""
+        # Choose provider based on subscription and request
+        print(f"🔍 DEBUG: User ID: '{user_id}'")
+        print(f"🔍 DEBUG: User subscription plan: {subscription.plan}")
+        print(f"🔍 DEBUG: Request voice_id: '{request.voice_id}'")
+        print(f"🔍 DEBUG: Request provider: {request.provider}")
+        
+        if subscription.plan == SubscriptionPlan.FREE:
+            # Free users: Check if they have a custom voice first
+            if request.voice_id:
+                voice_profile = await self._get_user_voice_profile(user_id, request.voice_id)
+                if voice_profile and voice_profile.status == VoiceCloneStatus.COMPLETED:
+                    # User has their own custom voice, allow them to use it
+                    print(f"🔍 DEBUG: FREE user using their own custom voice")
+                    return await self._generate_elevenlabs_tts(request, user_id, authenticated_client)
+                elif request.voice_id.startswith('google_') or request.voice_id == 'google_default':
+                    # Explicitly request Google TTS
+                    print(f"🔍 DEBUG: FREE user using Google TTS (explicit request)")
+                    return await self._generate_google_tts(request, user_id, authenticated_client)
+                else:
+                    # Try to use ElevenLabs standard voice (may fail if not premium)
+                    print(f"🔍 DEBUG: FREE user trying ElevenLabs standard voice")
+                    return await self._generate_elevenlabs_standard_tts(request, user_id, authenticated_client)
+            else:
+                # No voice_id specified, use Google TTS
+                print(f"🔍 DEBUG: FREE user using Google TTS (default)")
+                return await self._generate_google_tts(request, user_id, authenticated_client)
+        else:
+            # Premium users: Choice between Google TTS and ElevenLabs
+            if request.provider:
+                # User explicitly specified provider
+                if request.provider == VoiceProvider.GOOGLE_TTS:
+                    return await self._generate_google_tts(request, user_id, authenticated_client)
+                elif request.provider == VoiceProvider.ELEVENLABS:
+                    if request.voice_id:
+                        # Check if it's a custom cloned voice
+                        voice_profile = await self._get_user_voice_profile(user_id, request.voice_id)
+                        if voice_profile and voice_profile.status == VoiceCloneStatus.COMPLETED:
+                            return await self._generate_elevenlabs_tts(request, user_id, authenticated_client)
+                    return await self._generate_elevenlabs_standard_tts(request, user_id, authenticated_client)
+            elif request.voice_id:
+                # No provider specified, but voice_id given - auto-detect
+                print(f"🔍 DEBUG: Auto-detecting provider for voice_id: '{request.voice_id}'")
+                voice_profile = await self._get_user_voice_profile(user_id, request.voice_id)
+                print(f"🔍 DEBUG: Voice profile found: {voice_profile is not None}")
+                if voice_profile:
+                    print(f"🔍 DEBUG: Voice profile status: {voice_profile.status}")
+                    print(f"🔍 DEBUG: Voice profile provider: {voice_profile.provider}")
+                
+                if voice_profile and voice_profile.status == VoiceCloneStatus.COMPLETED:
+                    # Use cloned voice (ElevenLabs)
+                    print(f"🔍 DEBUG: Using ElevenLabs cloned voice")
+                    return await self._generate_elevenlabs_tts(request, user_id, authenticated_client)
+                elif request.voice_id.startswith('google_') or request.voice_id == 'google_default':
+                    # Explicitly request Google TTS
+                    print(f"🔍 DEBUG: Using Google TTS (explicit request)")
+                    return await self._generate_google_tts(request, user_id, authenticated_client)
+                else:
+                    # Use ElevenLabs with standard voice
+                    print(f"🔍 DEBUG: Using ElevenLabs standard voice")
+                    return await self._generate_elevenlabs_standard_tts(request, user_id, authenticated_client)
+            else:
+                # No provider or voice_id specified - use Google TTS as default for premium users
+                return await self._generate_google_tts(request, user_id, authenticated_client)
+    
     async def _generate_google_tts(self, request: TTSRequest, user_id: str, authenticated_client=None) -> TTSResponse:
         """Generate TTS using Google TTS REST API"""
         try:
@@ -301,34 +656,25 @@ class TTSService:
             
             print(f"✅ DEBUG: Google TTS API key available")
             
-            import httpx
-            import base64
-            
             # Prepare the request payload
+            voice, audio_config = _google_voice_config(request.language, request.speed, request.pitch, request.volume)
             payload = {
                 "input": {"text": request.text},
-                "voice": {
-                    "languageCode": request.language,
-                    "ssmlGender": "NEUTRAL"
-                },
-                "audioConfig": {
-                    "audioEncoding": "MP3",
-                    "speakingRate": request.speed,
-                    "pitch": request.pitch,
-                    "volumeGainDb": 20 * request.volume - 20
-                }
+                "voice": voice,
+                "audioConfig": audio_config
             }
             
             # Make the API request
-            url = f"https://texttospeech.googleapis.com/v1/text:synthesize?key={self._google_api_key}"
-            
-            async with httpx.AsyncClient() as client:
-                response = await client.post(url, json=payload)
-                response.raise_for_status()
-                result = response.json()
+            response = await self.http_client.post(
+                self._google_url,
+                content=orjson.dumps(payload),
+                headers={"Content-Type": "application/json"}
+            )
+            response.raise_for_status()
             
-            # Decode the audio content
-            audio_content = base64.b64decode(result["audioContent"])
+            # Decode the audio content straight from the raw body (no intermediate text decode),
+            # dropping the parsed JSON as soon as the audio bytes exist
+            audio_content = base64.b64decode(orjson.loads(response.content)["audioContent"])
             
             # Record usage
             await self.record_tts_usage(user_id, VoiceProvider.GOOGLE_TTS, len(request.text), authenticated_client)
@@ -357,6 +703,15 @@ class TTSService:
                 message=f"Google TTS generation failed: {str(e)}"
             )
     
+    async def _elevenlabs_convert(self, **kwargs) -> bytes:
+        """Run a blocking ElevenLabs synthesis in a worker thread and return the audio bytes"""
+        def _convert() -> bytes:
+            # The SDK returns a lazy generator; the HTTP work happens while joining it
+            return b''.join(self._elevenlabs_client.text_to_speech.convert(**kwargs))
+        
+        async with self._elevenlabs_semaphore:
+            return await asyncio.to_thread(_convert)
+    
     async def _generate_elevenlabs_tts(self, request: TTSRequest, user_id: str, authenticated_client=None) -> TTSResponse:
         """Generate TTS using ElevenLabs"""
         try:
@@ -374,26 +729,15 @@ class TTSService:
                     message="Custom voice not available or not ready"
                 )
             
-            # Configure voice settings (only for models that support them)
-            voice_settings = VoiceSettings(
-                stability=0.5,
-                similarity_boost=0.5,
-                style=0.0,
-                use_speaker_boost=True
-            )
-            
             # Generate audio using ElevenLabs API
-            audio_generator = self._elevenlabs_client.text_to_speech.convert(
+            audio = await self._elevenlabs_convert(
                 text=request.text,
                 voice_id=voice_profile.voice_id,
                 model_id="eleven_multilingual_v2",
-                voice_settings=voice_settings,
+                voice_settings=_DEFAULT_VOICE_SETTINGS,
                 output_format="mp3_44100_128"
             )
             
-            # Convert generator to bytes
-            audio = b''.join(audio_generator)
-            
             # Record usage
             await self.record_tts_usage(user_id, VoiceProvider.ELEVENLABS, len(request.text), authenticated_client)
             
@@ -425,19 +769,16 @@ class TTSService:
                 )
             
             # Use default voice if none specified
-            voice_id = request.voice_id or "JBFqnCBsd6RMkjVDRZzb"  # Default ElevenLabs voice
+            voice_id = request.voice_id or DEFAULT_ELEVENLABS_VOICE_ID
             
             # Generate audio using ElevenLabs API
-            audio_generator = self._elevenlabs_client.text_to_speech.convert(
+            audio = await self._elevenlabs_convert(
                 text=request.text,
                 voice_id=voice_id,
                 model_id="eleven_multilingual_v2",
                 output_format="mp3_44100_128"
             )
             
-            # Convert generator to bytes
-            audio = b''.join(audio_generator)
-            
             # Record usage
             await self.record_tts_usage(user_id, VoiceProvider.ELEVENLABS, len(request.text), authenticated_client)
             
@@ -459,10 +800,121 @@ class TTSService:
                 message=f"ElevenLabs standard TTS generation failed: {str(e)}"
             )
     
+    async def open_tts_stream(self, request: TTSRequest, user_id: str) -> AsyncIterator[bytes]:
+        """
+        Start streaming ElevenLabs TTS audio chunks as they are synthesized
+        
+        Runs the plan, voice-ownership and quota checks of generate_tts and opens the
+        upstream request before returning, so every failure surfaces as a TTSStreamError
+        while the HTTP status can still change. Streaming is ElevenLabs-only: Google voices
+        are rejected, and free plans may only stream their own cloned voices. The text's
+        language is detected by the multilingual model, as for non-streamed ElevenLabs audio.
+        """
+        if not self._elevenlabs_configured:
+            raise TTSStreamError(503, "ElevenLabs service not available")
+        if request.provider == VoiceProvider.GOOGLE_TTS or (request.voice_id or "").startswith('google_'):
+            raise TTSStreamError(400, "Streaming is only available for ElevenLabs voices")
+        if not STREAM_SPEED_RANGE[0] <= request.speed <= STREAM_SPEED_RANGE[1]:
+            raise TTSStreamError(
+                400, f"Streaming speed must be between {STREAM_SPEED_RANGE[0]} and {STREAM_SPEED_RANGE[1]}"
+            )
+        
+        # Ensure user exists in profiles table
+        from vocab_api import ensure_user_exists
+        await ensure_user_exists(user_id)
+        
+        today = datetime.now().date().isoformat()
+        subscription, usage_count = await asyncio.gather(
+            self.get_user_subscription(user_id),
+            self._get_today_usage_count(user_id, today)
+        )
+        if not self._has_quota(subscription, usage_count):
+            raise TTSStreamError(429, "Daily TTS quota exceeded. Please upgrade your plan or try again tomorrow.")
+        
+        # Same voice resolution as _generate_for_subscription: a voice_id is a cloned voice
+        # only if it is one of this user's completed profiles
+        voice_profile = None
+        if request.voice_id:
+            voice_profile = await self._get_user_voice_profile(user_id, request.voice_id)
+            if voice_profile is not None and voice_profile.status != VoiceCloneStatus.COMPLETED:
+                voice_profile = None
+        
+        if voice_profile is not None:
+            voice_id = voice_profile.voice_id
+            voice_settings = {**_DEFAULT_VOICE_SETTINGS.model_dump(exclude_none=True), "speed": request.speed}
+        elif subscription.plan == SubscriptionPlan.FREE:
+            raise TTSStreamError(403, "Streaming standard ElevenLabs voices requires a premium plan")
+        else:
+            voice_id = request.voice_id or DEFAULT_ELEVENLABS_VOICE_ID
+            voice_settings = {"speed": request.speed}
+        
+        url = f"{Config.ELEVENLABS_BASE_URL.rstrip('/')}/text-to-speech/{voice_id}/stream"
+        upstream_request = self.http_client.build_request(
+            "POST",
+            url,
+            params={"output_format": "mp3_44100_128"},
+            headers={"xi-api-key": Config.ELEVENLABS_API_KEY},
+            json={
+                "text": request.text,
+                "model_id": "eleven_multilingual_v2",
+                "voice_settings": voice_settings
+            },
+            timeout=httpx.Timeout(30.0, read=None)  # Long texts can take a while to finish synthesizing
+        )
+        response = await self.http_client.send(upstream_request, stream=True)
+        try:
+            response.raise_for_status()
+        except httpx.HTTPStatusError as e:
+            await response.aread()
+            await response.aclose()
+            raise TTSStreamError(502, f"ElevenLabs streaming failed: {e.response.status_code} {e.response.text}")
+        except BaseException:
+            await response.aclose()
+            raise
+        
+        return self._stream_audio(response, user_id, len(request.text))
+    
+    async def _stream_audio(self, response: httpx.Response, user_id: str, text_length: int) -> AsyncIterator[bytes]:
+        """Relay an opened ElevenLabs stream, recording usage once it has been fully delivered"""
+        try:
+            async for chunk in response.aiter_bytes():
+                yield chunk
+        finally:
+            await response.aclose()
+        
+        await self.record_tts_usage(user_id, VoiceProvider.ELEVENLABS, text_length)
+    
     async def _get_user_voice_profile(self, user_id: str, voice_id: Optional[str] = None) -> Optional[UserVoiceProfile]:
-        """Get user's voice profile using service role key for backend operations"""
+        """Get user's voice profile (cached per user and voice)"""
+        cache_key = f"uvp:{user_id}:{voice_id or ''}"
+        cached = await tts_cache.get(cache_key)
+        if cached:
+            return UserVoiceProfile(**cached)
+        
+        profile = await self._fetch_user_voice_profile(user_id, voice_id)
+        if profile is not None:
+            await tts_cache.set(cache_key, profile.model_dump(mode="json"), Config.VOICE_PROFILE_CACHE_TTL_SECONDS)
+        return profile
+    
+    async def invalidate_user_voice_profile(self, user_id: str, voice_id: Optional[str] = None):
+        """Drop cached voice profiles for a user (call after a profile is created, updated or deactivated)"""
+        await tts_cache.delete(f"uvp:{user_id}:")
+        if voice_id:
+            await tts_cache.delete(f"uvp:{user_id}:{voice_id}")
+    
+    async def _fetch_user_voice_profile(self, user_id: str, voice_id: Optional[str] = None) -> Optional[UserVoiceProfile]:
+        """Load a user's voice profile from the database using service role key for backend operations"""
         try:
             print(f"🔍 DEBUG: Looking up voice profile for user_id: '{user_id}', voice_id: '{voice_id}'")
+            if db_pool.enabled:
+                query = f"SELECT {VOICE_PROFILE_SQL_COLUMNS} FROM user_voice_profiles WHERE user_id = $1 AND is_active"
+                args = [user_id]
+                if voice_id:
+                    query += " AND voice_id = $2"
+                    args.append(voice_id)
+                row = await db_pool.fetchrow(query + " LIMIT 1", *args)
+                return UserVoiceProfile(**row) if row is not None else None
+            
             # Use service role database for backend operations (bypasses RLS)
             db_client = self.service_db if self.service_db else self.db.client
             query = db_client.table("user_voice_profiles").select("*").eq("user_id", user_id).eq("is_active", True)
@@ -470,23 +922,14 @@ class TTSService:
             if voice_id:
                 query = query.eq("voice_id", voice_id)
             
-            result = query.execute()
-            print(f"🔍 DEBUG: Voice profile query returned {len(result.data) if result.data else 0} results")
+            # maybe_single returns no row instead of raising when nothing matches
+            result = await asyncio.to_thread(query.limit(1).maybe_single().execute)
+            data = result.data if result is not None else None
+            print(f"🔍 DEBUG: Voice profile found: {data is not None}")
             
-            if result.data:
-                data = result.data[0]
-                return UserVoiceProfile(
-                    id=data["id"],
-                    user_id=data["user_id"],
-                    voice_name=data["voice_name"],
-                    provider=VoiceProvider(data["provider"]),
-                    voice_id=data["voice_id"],
-                    status=VoiceCloneStatus(data["status"]),
-                    audio_samples=data.get("audio_samples"),
-                    created_at=datetime.fromisoformat(data["created_at"]) if data["created_at"] else None,
-                    updated_at=datetime.fromisoformat(data["updated_at"]) if data["updated_at"] else None,
-                    is_active=data["is_active"]
-                )
+            if data:
+                # pydantic parses the timestamps and enums while validating
+                return UserVoiceProfile(**data)
             
             return None
             
@@ -500,37 +943,43 @@ class TTSService:
             # Generate text hash for caching
             text_hash = audio_storage.generate_text_hash(text) if text else None
             
-            # Save audio file using storage service
-            storage_result = await audio_storage.save_audio_file(
-                user_id=user_id,
-                audio_data=audio_data,
-                provider=provider,
-                text_hash=text_hash
-            )
-            
-            if not storage_result["success"]:
-                print(f"Failed to save audio file: {storage_result.get('error')}")
-                return ""
-            
-            # Store metadata in database
+            # Filename and URL are deterministic, so the metadata row doesn't have to wait for the upload
+            filename = audio_storage.build_filename(user_id, provider, text_hash)
+            file_url = audio_storage.get_file_url(user_id, filename)
             audio_metadata = {
                 "user_id": user_id,
-                "filename": storage_result["filename"],
-                "file_url": storage_result["file_url"],
-                "file_size": storage_result["file_size"],
+                "filename": filename,
+                "file_url": file_url,
+                "file_size": len(audio_data),
                 "mime_type": "audio/mpeg",
                 "created_at": datetime.now().isoformat()
             }
             
             # PRODUCTION: Use service role key for backend operations
             # This bypasses RLS policies for legitimate system operations
+            insert_task = None
             if hasattr(self, 'service_db') and self.service_db:
-                self.service_db.table("audio_files").insert(audio_metadata).execute()
-                print(f"✅ Audio file metadata saved for user {user_id}")
+                # Write the metadata in the background while the audio uploads
+                insert_task = self._spawn(self._insert_row("audio_files", audio_metadata), f"save audio metadata for user {user_id}")
             else:
                 print("❌ Service role database not available for audio metadata")
             
-            return storage_result["file_url"]
+            # Save audio file using storage service
+            storage_result = await audio_storage.save_audio_file(
+                user_id=user_id,
+                audio_data=audio_data,
+                provider=provider,
+                text_hash=text_hash,
+                custom_filename=filename
+            )
+            
+            if not storage_result["success"]:
+                print(f"Failed to save audio file: {storage_result.get('error')}")
+                if insert_task is not None:
+                    self._spawn(self._delete_audio_metadata(insert_task, user_id, filename), f"roll back audio metadata for user {user_id}")
+                return ""
+            
+            return file_url
             
         except Exception as e:
             print(f"Error saving audio file: {e}")
@@ -554,14 +1003,15 @@ class TTSService:
                 }
             
             # Create voice profile in database
+            now_iso = datetime.now().isoformat()
             voice_profile_data = {
                 "user_id": user_id,
                 "voice_name": voice_name,
                 "provider": VoiceProvider.ELEVENLABS.value,
                 "status": VoiceCloneStatus.PROCESSING.value,
                 "audio_samples": audio_files,
-                "created_at": datetime.now().isoformat(),
-                "updated_at": datetime.now().isoformat(),
+                "created_at": now_iso,
+                "updated_at": now_iso,
                 "is_active": True
             }
             
@@ -581,6 +1031,7 @@ class TTSService:
                     "status": VoiceCloneStatus.COMPLETED.value,
                     "updated_at": datetime.now().isoformat()
                 }).eq("id", voice_profile_id).execute()
+                await self.invalidate_user_voice_profile(user_id, voice_id)
                 
                 return {
                     "success": True,
@@ -595,6 +1046,7 @@ class TTSService:
                     "status": VoiceCloneStatus.FAILED.value,
                     "updated_at": datetime.now().isoformat()
                 }).eq("id", voice_profile_id).execute()
+                await self.invalidate_user_voice_profile(user_id)
                 
                 return {
                     "success": False,
@@ -610,26 +1062,22 @@ class TTSService:
     async def get_user_voice_profiles(self, user_id: str) -> List[UserVoiceProfile]:
         """Get all voice profiles for a user"""
         try:
-            result = self.service_db.table("user_voice_profiles").select("*").eq("user_id", user_id).eq("is_active", True).execute()
-            
-            profiles = []
-            for data in result.data:
-                profile = UserVoiceProfile(
-                    id=data["id"],
-                    user_id=data["user_id"],
-                    voice_name=data["voice_name"],
-                    provider=VoiceProvider(data["provider"]),
-                    voice_id=data["voice_id"],
-                    status=VoiceCloneStatus(data["status"]),
-                    audio_samples=data.get("audio_samples"),
-                    created_at=datetime.fromisoformat(data["created_at"]) if data["created_at"] else None,
-                    updated_at=datetime.fromisoformat(data["updated_at"]) if data["updated_at"] else None,
-                    is_active=data["is_active"]
+            if db_pool.enabled:
+                rows = await db_pool.fetch(
+                    f"SELECT {VOICE_PROFILE_SQL_COLUMNS} FROM user_voice_profiles WHERE user_id = $1 AND is_active",
+                    user_id
                 )
-                profiles.append(profile)
+                return _PROFILES_ADAPTER.validate_python(rows)
+            
+            result = self.service_db.table("user_voice_profiles").select("*").eq("user_id", user_id).eq("is_active", True).execute()
             
-            return profiles
+            # Validate the whole list in one pydantic-core call
+            return _PROFILES_ADAPTER.validate_python(result.data)
             
         except Exception as e:
             print(f"Error getting user voice profiles: {e}")
             return []
+
+
+# Global TTS service instance
+tts_service = TTSService()
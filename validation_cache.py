@@ -4,18 +4,71 @@ This module provides multiple layers of caching to optimize AI validation perfor
 and reduce API costs while maintaining accuracy.
 """
 
-import hashlib
 import json
+import xxhash
+import zstandard as zstd
 import time
+import math
+import random
 from typing import Dict, Any, Optional, Tuple, List
-from datetime import datetime, timedelta
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, replace
 from functools import lru_cache
 import sqlite3
+import threading
+import atexit
 import os
 from pathlib import Path
+from collections import OrderedDict
 
-@dataclass
+# Bump when the validation_cache table layout changes; older cache tables are dropped and rebuilt
+SCHEMA_VERSION = 4
+
+# New entries and access-stat bumps are buffered and written in one transaction per batch
+WRITE_BATCH_SIZE = 50
+WRITE_FLUSH_INTERVAL_SECONDS = 0.5
+
+_INSERT_SQL = '''
+    INSERT OR REPLACE INTO validation_cache 
+    (cache_key, user_answer, correct_answer, question_type, study_mode, 
+     word, context, is_correct, confidence_score, reasoning, 
+     semantic_similarity, is_meaningful, suggested_correction, 
+     feedback, encouragement, created_at, access_count, last_accessed, expires_at)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+# Entry fields in table column order (timestamps are stored as epoch seconds)
+_ENTRY_COLUMNS = (
+    'user_answer, correct_answer, question_type, study_mode, word, context, '
+    'is_correct, confidence_score, reasoning, semantic_similarity, is_meaningful, '
+    'suggested_correction, feedback, encouragement, created_at, access_count, last_accessed'
+)
+
+_SELECT_SQL = f'SELECT {_ENTRY_COLUMNS} FROM validation_cache WHERE cache_key = ?'
+
+_UPDATE_ACCESS_SQL = 'UPDATE validation_cache SET access_count = ?, last_accessed = ? WHERE cache_key = ?'
+
+_DELETE_EXPIRED_SQL = 'DELETE FROM validation_cache WHERE expires_at < ?'
+
+# cache_key is the rowid and is a uniformly distributed hash, so the first row at or after
+# a random key is a uniform sample found with one index seek
+_KEY_RANGE_SQL = 'SELECT MIN(cache_key), MAX(cache_key) FROM validation_cache'
+_QUALITY_SAMPLE_SQL = (
+    'SELECT cache_key, is_correct, confidence_score, semantic_similarity, question_type, study_mode, word '
+    'FROM validation_cache WHERE cache_key >= ? ORDER BY cache_key LIMIT 1'
+)
+
+# Free-text columns at least this long (in UTF-8 bytes) are stored zstd-compressed;
+# shorter values don't shrink enough to be worth it and stay plain TEXT
+COMPRESS_MIN_BYTES = 128
+_COMPRESSED_COLUMNS = ('context', 'reasoning', 'feedback', 'encouragement')
+
+# Initial number of keys the database key filter is sized for (it grows as the table does)
+KEY_FILTER_MIN_CAPACITY = 100_000
+
+# Size of sqlite3's per-connection prepared statement cache (the default is 128)
+STATEMENT_CACHE_SIZE = 256
+
+@dataclass(slots=True)
 class ValidationCacheEntry:
     """Cache entry for validation results"""
     user_answer: str
@@ -32,9 +85,116 @@ class ValidationCacheEntry:
     suggested_correction: Optional[str]
     feedback: Optional[str]
     encouragement: Optional[str]
-    created_at: datetime
+    created_at: int  # Epoch seconds
     access_count: int = 0
-    last_accessed: Optional[datetime] = None
+    last_accessed: Optional[int] = None  # Epoch seconds
+
+# Shared templates for the exact/similarity short-circuits; these results are never stored,
+# so only the per-request fields are filled in (see get_cached_result)
+_EXACT_MATCH_TEMPLATE = ValidationCacheEntry(
+    user_answer="",
+    correct_answer="",
+    question_type="",
+    study_mode="",
+    word=None,
+    context=None,
+    is_correct=True,
+    confidence_score=1.0,
+    reasoning="Exact match found",
+    semantic_similarity=1.0,
+    is_meaningful=True,
+    suggested_correction=None,
+    feedback="Perfect! Exact match.",
+    encouragement="Excellent! You got it exactly right!",
+    created_at=int(time.time())
+)
+
+_SIMILARITY_MATCH_TEMPLATE = replace(
+    _EXACT_MATCH_TEMPLATE,
+    feedback="Great! Very close to the correct answer.",
+    encouragement="You're doing well! Keep it up!"
+)
+
+class FrequencySketch:
+    """
+    Count-min sketch of recent key frequencies, used for TinyLFU admission
+    
+    Counters saturate at 15 and are halved periodically so that popularity
+    from the distant past fades.
+    """
+    
+    DEPTH = 4
+    MAX_COUNT = 15
+    
+    def __init__(self, capacity: int):
+        width = 16
+        while width < capacity * 4:
+            width <<= 1
+        self._mask = width - 1
+        self._rows = [bytearray(width) for _ in range(self.DEPTH)]
+        self._sample_size = max(capacity, 1) * 10
+        self._additions = 0
+    
+    def _indexes(self, key):
+        h = hash(key)
+        return [hash((h, i)) & self._mask for i in range(self.DEPTH)]
+    
+    def increment(self, key):
+        """Record one access of key"""
+        for row, index in zip(self._rows, self._indexes(key)):
+            if row[index] < self.MAX_COUNT:
+                row[index] += 1
+        
+        self._additions += 1
+        if self._additions >= self._sample_size:
+            self._rows = [bytearray(count >> 1 for count in row) for row in self._rows]
+            self._additions //= 2
+    
+    def frequency(self, key) -> int:
+        """Estimated recent access count of key (never underestimates)"""
+        return min(row[index] for row, index in zip(self._rows, self._indexes(key)))
+    
+    def clear(self):
+        for row in self._rows:
+            row[:] = bytes(len(row))
+        self._additions = 0
+
+class KeyBloomFilter:
+    """
+    Bloom filter over integer cache keys, used to skip database lookups for certain misses
+    
+    Keys are already uniform 64-bit hashes, so bit positions are derived from the key
+    itself by double hashing. Deleted keys are never removed (they only cost a
+    lookup); the owner rebuilds the filter once more than capacity keys are added.
+    """
+    
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        self.capacity = max(capacity, 1)
+        bits = int(-self.capacity * math.log(error_rate) / (math.log(2) ** 2))
+        size = 64
+        while size < bits:
+            size <<= 1
+        self._mask = size - 1
+        self._hashes = max(1, round(size / self.capacity * math.log(2)))
+        self._bits = bytearray(size // 8)
+        self.count = 0
+    
+    def _indexes(self, key: int):
+        h1 = key & 0xFFFFFFFF
+        h2 = (key >> 32) | 1
+        return [(h1 + i * h2) & self._mask for i in range(self._hashes)]
+    
+    @property
+    def is_full(self) -> bool:
+        return self.count > self.capacity
+    
+    def add(self, key: int):
+        for index in self._indexes(key):
+            self._bits[index >> 3] |= 1 << (index & 7)
+        self.count += 1
+    
+    def __contains__(self, key: int) -> bool:
+        return all(self._bits[index >> 3] & (1 << (index & 7)) for index in self._indexes(key))
 
 class ValidationCache:
     """Multi-layer caching system for validation results"""
@@ -59,12 +219,41 @@ class ValidationCache:
         self.similarity_threshold = similarity_threshold
         
         # In-memory LRU cache for frequently accessed entries
-        self._memory_cache = {}
-        self._access_times = {}
+        self._memory_cache: "OrderedDict[int, ValidationCacheEntry]" = OrderedDict()
+        # Admission filter: a new entry only evicts the LRU entry if it is requested at least as often
+        self._frequency = FrequencySketch(max_memory_entries)
+        
+        # One long-lived connection shared by all calls (guarded by a lock, since
+        # FastAPI may call in from worker threads)
+        self._lock = threading.RLock()
+        Path(self.cache_db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(
+            self.cache_db_path,
+            check_same_thread=False,
+            isolation_level=None,
+            cached_statements=STATEMENT_CACHE_SIZE
+        )
+        self._conn.row_factory = sqlite3.Row
+        self._configure_connection()
+        
+        # Used only with the lock held (zstd contexts aren't thread-safe)
+        self._compressor = zstd.ZstdCompressor(level=3)
+        self._decompressor = zstd.ZstdDecompressor()
+        
+        # Entries waiting to be written, keyed by cache key
+        self._write_buffer: Dict[int, ValidationCacheEntry] = {}
+        # Pending access stats for already-written entries: cache key -> (access_count, last_accessed)
+        self._access_updates: Dict[int, Tuple[int, int]] = {}
+        self._flush_timer: Optional[threading.Timer] = None
+        atexit.register(self.flush)
         
         # Initialize database
         self._init_database()
         
+        # Keys known to be in the database; a miss here skips the SELECT entirely
+        self._key_filter = KeyBloomFilter(KEY_FILTER_MIN_CAPACITY)
+        self._rebuild_key_filter()
+        
         # Cache statistics
         self.stats = {
             'memory_hits': 0,
@@ -76,44 +265,135 @@ class ValidationCache:
             'total_requests': 0
         }
     
+    def _configure_connection(self):
+        """Apply connection PRAGMAs once (WAL lets readers proceed during writes)"""
+        for pragma in (
+            "PRAGMA page_size=4096",  # Only takes effect on a new database, so set before WAL
+            "PRAGMA journal_mode=WAL",
+            "PRAGMA synchronous=NORMAL",  # Safe with WAL; fsync only at checkpoints
+            "PRAGMA temp_store=MEMORY",
+            "PRAGMA cache_size=-64000",  # ~64 MB page cache
+            "PRAGMA mmap_size=2147483648",
+            "PRAGMA busy_timeout=5000",
+        ):
+            self._conn.execute(pragma)
+    
+    def close(self):
+        """Write pending entries and close the database connection"""
+        with self._lock:
+            self.flush()
+            self._conn.close()
+    
+    def flush(self):
+        """Write buffered cache entries and access stats to the database in a single transaction"""
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if not self._write_buffer and not self._access_updates:
+                return
+            
+            # Rows are built at flush time so access stats gathered meanwhile are included
+            ttl_seconds = self.cache_ttl_hours * 3600
+            rows = []
+            for cache_key, entry in self._write_buffer.items():
+                rows.append((
+                    cache_key, entry.user_answer, entry.correct_answer, entry.question_type,
+                    entry.study_mode, entry.word, self._pack_text(entry.context), entry.is_correct,
+                    entry.confidence_score, self._pack_text(entry.reasoning), entry.semantic_similarity,
+                    entry.is_meaningful, entry.suggested_correction, self._pack_text(entry.feedback),
+                    self._pack_text(entry.encouragement), entry.created_at, entry.access_count, entry.last_accessed,
+                    entry.created_at + ttl_seconds
+                ))
+            access_rows = [
+                (access_count, last_accessed, cache_key)
+                for cache_key, (access_count, last_accessed) in self._access_updates.items()
+            ]
+            self._write_buffer.clear()
+            self._access_updates.clear()
+            
+            try:
+                self._conn.execute("BEGIN IMMEDIATE")
+                if rows:
+                    self._conn.executemany(_INSERT_SQL, rows)
+                if access_rows:
+                    self._conn.executemany(_UPDATE_ACCESS_SQL, access_rows)
+                self._conn.execute("COMMIT")
+            except Exception as e:
+                if self._conn.in_transaction:
+                    self._conn.execute("ROLLBACK")
+                print(f"⚠️ Failed to write {len(rows)} validation cache entries "
+                      f"and {len(access_rows)} access updates: {e}")
+            
+            # Resize once the table has outgrown the filter (everything is written at this point)
+            if self._key_filter.is_full:
+                self._rebuild_key_filter()
+    
+    def _pack_text(self, value: Optional[str]):
+        """Compress a long text value for storage (short values are stored as-is)"""
+        if value is None:
+            return None
+        data = value.encode()
+        if len(data) < COMPRESS_MIN_BYTES:
+            return value
+        return self._compressor.compress(data)
+    
+    def _unpack_text(self, value) -> Optional[str]:
+        """Inverse of _pack_text: BLOB values are compressed, TEXT values are plain"""
+        if isinstance(value, bytes):
+            return self._decompressor.decompress(value).decode()
+        return value
+    
+    def _schedule_flush(self):
+        """Flush now if enough writes are pending, otherwise make sure a flush is scheduled (call with the lock held)"""
+        if len(self._write_buffer) + len(self._access_updates) >= WRITE_BATCH_SIZE:
+            self.flush()
+        elif self._flush_timer is None:
+            self._flush_timer = threading.Timer(WRITE_FLUSH_INTERVAL_SECONDS, self.flush)
+            self._flush_timer.daemon = True
+            self._flush_timer.start()
+    
     def _init_database(self):
         """Initialize SQLite database for persistent cache"""
-        Path(self.cache_db_path).parent.mkdir(parents=True, exist_ok=True)
-        
-        with sqlite3.connect(self.cache_db_path) as conn:
+        with self._lock:
+            conn = self._conn
+            
+            # The table only holds cached results, so an outdated layout is simply rebuilt
+            if conn.execute('PRAGMA user_version').fetchone()[0] != SCHEMA_VERSION:
+                conn.execute('DROP TABLE IF EXISTS validation_cache')
+                conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+            
             conn.execute('''
                 CREATE TABLE IF NOT EXISTS validation_cache (
-                    cache_key TEXT PRIMARY KEY,
+                    cache_key INTEGER PRIMARY KEY,
                     user_answer TEXT NOT NULL,
                     correct_answer TEXT NOT NULL,
                     question_type TEXT NOT NULL,
                     study_mode TEXT NOT NULL,
                     word TEXT,
-                    context TEXT,
+                    context BLOB,
                     is_correct BOOLEAN NOT NULL,
                     confidence_score REAL NOT NULL,
-                    reasoning TEXT NOT NULL,
+                    reasoning BLOB NOT NULL,
                     semantic_similarity REAL NOT NULL,
                     is_meaningful BOOLEAN NOT NULL,
                     suggested_correction TEXT,
-                    feedback TEXT,
-                    encouragement TEXT,
-                    created_at TIMESTAMP NOT NULL,
+                    feedback BLOB,
+                    encouragement BLOB,
+                    created_at INTEGER NOT NULL,
                     access_count INTEGER DEFAULT 0,
-                    last_accessed TIMESTAMP
+                    last_accessed INTEGER,
+                    expires_at INTEGER NOT NULL
                 )
             ''')
             
-            # Create index for faster lookups
-            conn.execute('''
-                CREATE INDEX IF NOT EXISTS idx_cache_lookup 
-                ON validation_cache(user_answer, correct_answer, question_type, study_mode)
-            ''')
+            # Lookups go through the cache_key primary key; the old column index only slowed inserts
+            conn.execute('DROP INDEX IF EXISTS idx_cache_lookup')
             
-            # Create index for cleanup
+            # Create index for cleanup (expiry is precomputed so pruning is a single range scan)
             conn.execute('''
-                CREATE INDEX IF NOT EXISTS idx_cache_created_at 
-                ON validation_cache(created_at)
+                CREATE INDEX IF NOT EXISTS idx_cache_expires_at 
+                ON validation_cache(expires_at)
             ''')
     
     def _generate_cache_key(self, 
@@ -122,7 +402,7 @@ class ValidationCache:
                           question_type: str, 
                           study_mode: str,
                           word: Optional[str] = None,
-                          context: Optional[str] = None) -> str:
+                          context: Optional[str] = None) -> int:
         """
         Generate a unique cache key for the validation request
         
@@ -133,24 +413,48 @@ class ValidationCache:
         4. No cross-contamination between different validation scenarios
         """
         # Normalize inputs for consistent caching while preserving context differences
-        normalized_user = user_answer.strip().lower()
-        normalized_correct = correct_answer.strip().lower()
-        normalized_word = word.strip().lower() if word else ""
-        normalized_context = context.strip() if context else ""
-        
+        return self._normalized_cache_key(
+            *self._normalize(user_answer, correct_answer, word, context), question_type, study_mode
+        )
+    
+    def _normalize(self,
+                   user_answer: str,
+                   correct_answer: str,
+                   word: Optional[str] = None,
+                   context: Optional[str] = None) -> Tuple[str, str, str, str]:
+        """Normalize request strings once so the match checks and cache key can share them"""
+        return (
+            user_answer.strip().lower(),
+            correct_answer.strip().lower(),
+            word.strip().lower() if word else "",
+            context.strip() if context else ""
+        )
+    
+    def _normalized_cache_key(self,
+                              normalized_user: str,
+                              normalized_correct: str,
+                              normalized_word: str,
+                              normalized_context: str,
+                              question_type: str,
+                              study_mode: str) -> int:
+        """Cache key from inputs already normalized by _normalize"""
         # Create hash of normalized inputs - each parameter creates unique cache entries
         # This ensures different contexts get different validations
         content = f"{normalized_user}|{normalized_correct}|{question_type}|{study_mode}|{normalized_word}|{normalized_context}"
-        return hashlib.md5(content.encode()).hexdigest()
+        key = xxhash.xxh3_64_intdigest(content.encode())
+        # Fold into SQLite's signed 64-bit INTEGER range
+        return key - (1 << 64) if key >= (1 << 63) else key
     
-    def _is_exact_match(self, user_answer: str, correct_answer: str) -> bool:
-        """Check for exact match (case-insensitive)"""
-        return user_answer.strip().lower() == correct_answer.strip().lower()
+    def _is_exact_match(self, normalized_user: str, normalized_correct: str) -> bool:
+        """Check for exact match (inputs already stripped and lowercased)"""
+        return normalized_user == normalized_correct
     
     def _calculate_simple_similarity(self, user_answer: str, correct_answer: str) -> float:
-        """Calculate simple word-based similarity without AI"""
-        user_words = set(user_answer.lower().split())
-        correct_words = set(correct_answer.lower().split())
+        """Calculate simple string similarity without AI (inputs already stripped and lowercased)"""
+        # Word-set overlap, not character edit distance: answers at or above the threshold are
+        # accepted without the AI validator, and one-letter edits ("lose"/"loose") change meaning
+        user_words = set(user_answer.split())
+        correct_words = set(correct_answer.split())
         
         if not user_words or not correct_words:
             return 0.0
@@ -160,27 +464,36 @@ class ValidationCache:
         
         return len(intersection) / len(union) if union else 0.0
     
+    def _rebuild_key_filter(self):
+        """Reload the key filter from the database, sized for twice the current table"""
+        with self._lock:
+            row_count = self._conn.execute('SELECT COUNT(*) FROM validation_cache').fetchone()[0]
+            key_filter = KeyBloomFilter(max(KEY_FILTER_MIN_CAPACITY, row_count * 2))
+            cursor = self._conn.execute('SELECT cache_key FROM validation_cache')
+            while True:
+                rows = cursor.fetchmany(10000)
+                if not rows:
+                    break
+                for (cache_key,) in rows:
+                    key_filter.add(cache_key)
+            self._key_filter = key_filter
+    
     def _cleanup_expired_entries(self):
         """Remove expired entries from database"""
-        cutoff_time = datetime.now() - timedelta(hours=self.cache_ttl_hours)
-        
-        with sqlite3.connect(self.cache_db_path) as conn:
-            conn.execute(
-                'DELETE FROM validation_cache WHERE created_at < ?',
-                (cutoff_time,)
-            )
+        with self._lock:
+            self._conn.execute(_DELETE_EXPIRED_SQL, (int(time.time()),))
     
-    def _update_access_stats(self, cache_key: str, entry: ValidationCacheEntry):
+    def _update_access_stats(self, cache_key: int, entry: ValidationCacheEntry):
         """Update access statistics for cache entry"""
-        entry.access_count += 1
-        entry.last_accessed = datetime.now()
-        
-        # Update in database
-        with sqlite3.connect(self.cache_db_path) as conn:
-            conn.execute(
-                'UPDATE validation_cache SET access_count = ?, last_accessed = ? WHERE cache_key = ?',
-                (entry.access_count, entry.last_accessed, cache_key)
-            )
+        with self._lock:
+            entry.access_count += 1
+            entry.last_accessed = int(time.time())
+            
+            # Entries still in the write buffer are written with their current stats;
+            # otherwise queue the update for the next batch
+            if cache_key not in self._write_buffer:
+                self._access_updates[cache_key] = (entry.access_count, entry.last_accessed)
+                self._schedule_flush()
     
     def get_cached_result(self, 
                          user_answer: str, 
@@ -191,88 +504,74 @@ class ValidationCache:
                          context: Optional[str] = None) -> Optional[ValidationCacheEntry]:
         """Get cached validation result if available"""
         self.stats['total_requests'] += 1
+        normalized_user, normalized_correct, normalized_word, normalized_context = self._normalize(
+            user_answer, correct_answer, word, context
+        )
         
         # Check for exact match first (fastest)
-        if self._is_exact_match(user_answer, correct_answer):
+        if self._is_exact_match(normalized_user, normalized_correct):
             self.stats['exact_matches'] += 1
-            return ValidationCacheEntry(
+            return replace(
+                _EXACT_MATCH_TEMPLATE,
                 user_answer=user_answer,
                 correct_answer=correct_answer,
                 question_type=question_type,
                 study_mode=study_mode,
                 word=word,
-                context=context,
-                is_correct=True,
-                confidence_score=1.0,
-                reasoning="Exact match found",
-                semantic_similarity=1.0,
-                is_meaningful=True,
-                suggested_correction=None,
-                feedback="Perfect! Exact match.",
-                encouragement="Excellent! You got it exactly right!",
-                created_at=datetime.now()
+                context=context
             )
         
         # Check simple similarity threshold
-        similarity = self._calculate_simple_similarity(user_answer, correct_answer)
+        similarity = self._calculate_simple_similarity(normalized_user, normalized_correct)
         if similarity >= self.similarity_threshold:
             self.stats['similarity_matches'] += 1
-            return ValidationCacheEntry(
+            return replace(
+                _SIMILARITY_MATCH_TEMPLATE,
                 user_answer=user_answer,
                 correct_answer=correct_answer,
                 question_type=question_type,
                 study_mode=study_mode,
                 word=word,
                 context=context,
-                is_correct=True,
                 confidence_score=similarity,
                 reasoning=f"High similarity match ({similarity:.2f})",
-                semantic_similarity=similarity,
-                is_meaningful=True,
-                suggested_correction=None,
-                feedback="Great! Very close to the correct answer.",
-                encouragement="You're doing well! Keep it up!",
-                created_at=datetime.now()
+                semantic_similarity=similarity
             )
         
-        cache_key = self._generate_cache_key(user_answer, correct_answer, question_type, study_mode, word, context)
+        cache_key = self._normalized_cache_key(
+            normalized_user, normalized_correct, normalized_word, normalized_context, question_type, study_mode
+        )
+        self._frequency.increment(cache_key)
         
         # Check memory cache first
         if cache_key in self._memory_cache:
             entry = self._memory_cache[cache_key]
+            self._memory_cache.move_to_end(cache_key)
             self._update_access_stats(cache_key, entry)
             self.stats['memory_hits'] += 1
             return entry
         
-        # Check database cache
-        with sqlite3.connect(self.cache_db_path) as conn:
-            cursor = conn.execute(
-                '''SELECT * FROM validation_cache WHERE cache_key = ?''',
-                (cache_key,)
-            )
-            row = cursor.fetchone()
+        # Check entries not yet written, then the database
+        with self._lock:
+            entry = self._write_buffer.get(cache_key)
+            if entry is not None:
+                self._add_to_memory_cache(cache_key, entry)
+                self._update_access_stats(cache_key, entry)
+                self.stats['db_hits'] += 1
+                return entry
+            
+            row = None
+            if cache_key in self._key_filter:
+                row = self._conn.execute(_SELECT_SQL, (cache_key,)).fetchone()
             
             if row:
                 # Convert row to ValidationCacheEntry
-                entry = ValidationCacheEntry(
-                    user_answer=row[1],
-                    correct_answer=row[2],
-                    question_type=row[3],
-                    study_mode=row[4],
-                    word=row[5],
-                    context=row[6],
-                    is_correct=bool(row[7]),
-                    confidence_score=row[8],
-                    reasoning=row[9],
-                    semantic_similarity=row[10],
-                    is_meaningful=bool(row[11]),
-                    suggested_correction=row[12],
-                    feedback=row[13],
-                    encouragement=row[14],
-                    created_at=datetime.fromisoformat(row[15]),
-                    access_count=row[16],
-                    last_accessed=datetime.fromisoformat(row[17]) if row[17] else None
-                )
+                fields = dict(row)
+                fields['is_correct'] = bool(fields['is_correct'])
+                fields['is_meaningful'] = bool(fields['is_meaningful'])
+                for column in _COMPRESSED_COLUMNS:
+                    fields[column] = self._unpack_text(fields[column])
+                entry = ValidationCacheEntry(**fields)
                 
                 # Add to memory cache
                 self._add_to_memory_cache(cache_key, entry)
@@ -283,17 +582,19 @@ class ValidationCache:
         self.stats['cache_misses'] += 1
         return None
     
-    def _add_to_memory_cache(self, cache_key: str, entry: ValidationCacheEntry):
+    def _add_to_memory_cache(self, cache_key: int, entry: ValidationCacheEntry):
         """Add entry to memory cache with LRU eviction"""
-        # If cache is full, remove least recently used entry
-        if len(self._memory_cache) >= self.max_memory_entries:
-            # Find least recently accessed entry
-            lru_key = min(self._access_times.keys(), key=lambda k: self._access_times[k])
-            del self._memory_cache[lru_key]
-            del self._access_times[lru_key]
+        if cache_key in self._memory_cache:
+            self._memory_cache.move_to_end(cache_key)
+        elif len(self._memory_cache) >= self.max_memory_entries:
+            # Cache is full: keep the least recently used entry if it is more popular
+            # than the newcomer, so one-off answers don't push out hot ones
+            victim_key = next(iter(self._memory_cache))
+            if self._frequency.frequency(cache_key) < self._frequency.frequency(victim_key):
+                return
+            self._memory_cache.popitem(last=False)
         
         self._memory_cache[cache_key] = entry
-        self._access_times[cache_key] = time.time()
     
     def cache_result(self, 
                     user_answer: str, 
@@ -322,28 +623,18 @@ class ValidationCache:
             suggested_correction=result.suggested_correction,
             feedback=result.feedback,
             encouragement=result.encouragement,
-            created_at=datetime.now()
+            created_at=int(time.time())
         )
         
         # Add to memory cache
         self._add_to_memory_cache(cache_key, entry)
         
-        # Add to database cache
-        with sqlite3.connect(self.cache_db_path) as conn:
-            conn.execute('''
-                INSERT OR REPLACE INTO validation_cache 
-                (cache_key, user_answer, correct_answer, question_type, study_mode, 
-                 word, context, is_correct, confidence_score, reasoning, 
-                 semantic_similarity, is_meaningful, suggested_correction, 
-                 feedback, encouragement, created_at, access_count, last_accessed)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                cache_key, entry.user_answer, entry.correct_answer, entry.question_type,
-                entry.study_mode, entry.word, entry.context, entry.is_correct,
-                entry.confidence_score, entry.reasoning, entry.semantic_similarity,
-                entry.is_meaningful, entry.suggested_correction, entry.feedback,
-                entry.encouragement, entry.created_at, entry.access_count, entry.last_accessed
-            ))
+        # Queue for the database; written with the next batch
+        with self._lock:
+            self._write_buffer[cache_key] = entry
+            self._key_filter.add(cache_key)
+            self._access_updates.pop(cache_key, None)
+            self._schedule_flush()
     
     def get_cache_stats(self) -> Dict[str, Any]:
         """Get cache performance statistics"""
@@ -359,8 +650,9 @@ class ValidationCache:
         similarity_match_rate = (self.stats['similarity_matches'] / total_requests) * 100
         
         # Get cache size info
-        with sqlite3.connect(self.cache_db_path) as conn:
-            cursor = conn.execute('SELECT COUNT(*) FROM validation_cache')
+        with self._lock:
+            self.flush()
+            cursor = self._conn.execute('SELECT COUNT(*) FROM validation_cache')
             db_cache_size = cursor.fetchone()[0]
         
         return {
@@ -379,17 +671,23 @@ class ValidationCache:
     def clear_cache(self, older_than_hours: Optional[int] = None):
         """Clear cache entries"""
         if older_than_hours:
-            cutoff_time = datetime.now() - timedelta(hours=older_than_hours)
-            with sqlite3.connect(self.cache_db_path) as conn:
-                conn.execute('DELETE FROM validation_cache WHERE created_at < ?', (cutoff_time,))
+            # created_at < cutoff  <=>  expires_at < cutoff + TTL, which can use the expiry index
+            cutoff = int(time.time()) - older_than_hours * 3600 + self.cache_ttl_hours * 3600
+            with self._lock:
+                self.flush()
+                self._conn.execute(_DELETE_EXPIRED_SQL, (cutoff,))
+                self._rebuild_key_filter()
         else:
-            # Clear all cache
-            with sqlite3.connect(self.cache_db_path) as conn:
-                conn.execute('DELETE FROM validation_cache')
+            # Clear all cache, including entries not yet written
+            with self._lock:
+                self._write_buffer.clear()
+                self._access_updates.clear()
+                self._conn.execute('DELETE FROM validation_cache')
+                self._key_filter = KeyBloomFilter(KEY_FILTER_MIN_CAPACITY)
         
         # Clear memory cache
         self._memory_cache.clear()
-        self._access_times.clear()
+        self._frequency.clear()
         
         # Reset stats
         self.stats = {key: 0 for key in self.stats.keys()}
@@ -416,70 +714,73 @@ class ValidationCache:
         }
         
         try:
-            with sqlite3.connect(self.cache_db_path) as conn:
-                # Get sample of cache entries
-                cursor = conn.execute(
-                    'SELECT * FROM validation_cache ORDER BY RANDOM() LIMIT ?',
-                    (sample_size,)
-                )
-                entries = cursor.fetchall()
-                
-                quality_report['total_entries_checked'] = len(entries)
-                
-                if len(entries) < 10:
-                    quality_report['recommendations'].append("Not enough cache entries for quality analysis")
-                    return quality_report
-                
-                # Analyze exact match consistency
-                exact_matches = [e for e in entries if e[7] == 1 and e[8] == 1.0]  # is_correct=True, confidence=1.0
-                if exact_matches:
-                    quality_report['exact_match_consistency'] = len(exact_matches)
-                
-                # Analyze similarity threshold accuracy
-                similarity_matches = [e for e in entries if e[10] >= 0.85]  # semantic_similarity >= 0.85
-                if similarity_matches:
-                    quality_report['similarity_threshold_accuracy'] = len(similarity_matches)
-                
-                # Analyze AI result consistency (check for reasonable confidence scores)
-                ai_results = [e for e in entries if e[8] > 0.0 and e[8] < 1.0]  # confidence between 0 and 1
-                if ai_results:
-                    avg_confidence = sum(e[8] for e in ai_results) / len(ai_results)
-                    quality_report['ai_result_consistency'] = avg_confidence
-                
-                # Check context isolation (different contexts should have different results)
-                context_groups = {}
-                for entry in entries:
-                    context_key = f"{entry[3]}|{entry[4]}|{entry[5]}"  # question_type|study_mode|word
-                    if context_key not in context_groups:
-                        context_groups[context_key] = []
-                    context_groups[context_key].append(entry)
-                
-                quality_report['context_isolation'] = len(context_groups)
-                
-                # Calculate overall quality score
-                quality_score = 0.0
-                if quality_report['exact_match_consistency'] > 0:
-                    quality_score += 0.3
-                if quality_report['similarity_threshold_accuracy'] > 0:
-                    quality_score += 0.3
-                if quality_report['ai_result_consistency'] > 0.5:  # Reasonable confidence scores
-                    quality_score += 0.2
-                if quality_report['context_isolation'] > 1:  # Multiple contexts
-                    quality_score += 0.2
-                
-                quality_report['quality_score'] = quality_score
-                
-                # Generate recommendations
-                if quality_score < 0.7:
-                    quality_report['recommendations'].append("Consider adjusting similarity threshold")
-                if quality_report['ai_result_consistency'] < 0.6:
-                    quality_report['recommendations'].append("AI confidence scores may need review")
-                if quality_report['context_isolation'] < 2:
-                    quality_report['recommendations'].append("Limited context diversity in cache")
-                
-                if not quality_report['recommendations']:
-                    quality_report['recommendations'].append("Cache quality is good")
-                
+            with self._lock:
+                self.flush()
+                # Get sample of cache entries by seeking to random keys (only the columns
+                # the analysis reads); oversample since the same row can be hit twice
+                sampled = {}
+                low, high = self._conn.execute(_KEY_RANGE_SQL).fetchone()
+                if low is not None:
+                    for _ in range(sample_size * 2):
+                        if len(sampled) >= sample_size:
+                            break
+                        row = self._conn.execute(_QUALITY_SAMPLE_SQL, (random.randint(low, high),)).fetchone()
+                        sampled[row[0]] = tuple(row)[1:]
+                entries = list(sampled.values())
+            
+            quality_report['total_entries_checked'] = len(entries)
+            
+            if len(entries) < 10:
+                quality_report['recommendations'].append("Not enough cache entries for quality analysis")
+                return quality_report
+            
+            # Single pass over the sample for all per-entry checks
+            exact_matches = 0
+            similarity_matches = 0
+            ai_confidence_total = 0.0
+            ai_results = 0
+            context_groups = set()
+            for is_correct, confidence, similarity, question_type, study_mode, word in entries:
+                if is_correct == 1 and confidence == 1.0:  # Exact match consistency
+                    exact_matches += 1
+                if similarity >= 0.85:  # Similarity threshold accuracy
+                    similarity_matches += 1
+                if 0.0 < confidence < 1.0:  # AI results with reasonable confidence scores
+                    ai_confidence_total += confidence
+                    ai_results += 1
+                # Context isolation (different contexts should have different results)
+                context_groups.add((question_type, study_mode, word))
+            
+            quality_report['exact_match_consistency'] = exact_matches
+            quality_report['similarity_threshold_accuracy'] = similarity_matches
+            if ai_results:
+                quality_report['ai_result_consistency'] = ai_confidence_total / ai_results
+            quality_report['context_isolation'] = len(context_groups)
+            
+            # Calculate overall quality score
+            quality_score = 0.0
+            if quality_report['exact_match_consistency'] > 0:
+                quality_score += 0.3
+            if quality_report['similarity_threshold_accuracy'] > 0:
+                quality_score += 0.3
+            if quality_report['ai_result_consistency'] > 0.5:  # Reasonable confidence scores
+                quality_score += 0.2
+            if quality_report['context_isolation'] > 1:  # Multiple contexts
+                quality_score += 0.2
+            
+            quality_report['quality_score'] = quality_score
+            
+            # Generate recommendations
+            if quality_score < 0.7:
+                quality_report['recommendations'].append("Consider adjusting similarity threshold")
+            if quality_report['ai_result_consistency'] < 0.6:
+                quality_report['recommendations'].append("AI confidence scores may need review")
+            if quality_report['context_isolation'] < 2:
+                quality_report['recommendations'].append("Limited context diversity in cache")
+            
+            if not quality_report['recommendations']:
+                quality_report['recommendations'].append("Cache quality is good")
+            
         except Exception as e:
             quality_report['recommendations'].append(f"Quality analysis failed: {str(e)}")
         
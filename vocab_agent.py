@@ -1,32 +1,77 @@
-from models import VocabEntry, CEFRLevel, VocabGenerationResponse, PartOfSpeech
+from models import VocabEntry, CEFRLevel, VocabGenerationResponse, MultiTopicVocabGenerationResponse, PartOfSpeech
 from topics import get_topic_list, get_categories, get_topics_by_category
-from typing_extensions import TypedDict
-from typing import List
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Optional
 from langgraph.graph import StateGraph, START, END
 from langgraph.prebuilt import create_react_agent
 from langchain_openai import ChatOpenAI
+from langchain_core.caches import InMemoryCache
+from openai import OpenAI
 from supabase_database import SupabaseVocabDatabase
 from config import Config
 from langchain_tavily import TavilySearch
+import asyncio
+import atexit
+import httpx
+import json
+import logging
 import os
+import signal
+import time
+from dataclasses import dataclass, field
+from itertools import chain
+
+# HTTP/2 for LLM calls needs the optional h2 package
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
 
 # Validate configuration
 Config.validate()
 
-# Set up environment variables
-os.environ["LANGSMITH_TRACING"] = "true"
-os.environ["LANGCHAIN_API_KEY"] = Config.LANGSMITH_API_KEY
-os.environ["LANGCHAIN_PROJECT"] = Config.LANGSMITH_PROJECT
-os.environ["LANGCHAIN_TRACING_V2"] = "true"
-os.environ["LANGCHAIN_ENDPOINT"] = "https://api.smith.langchain.com"
+# Set up environment variables (LangSmith tracing is opt-in, it adds a request per LLM call)
+if Config.ENABLE_TRACING:
+    os.environ["LANGSMITH_TRACING"] = "true"
+    os.environ["LANGCHAIN_API_KEY"] = Config.LANGSMITH_API_KEY
+    os.environ["LANGCHAIN_PROJECT"] = Config.LANGSMITH_PROJECT
+    os.environ["LANGCHAIN_TRACING_V2"] = "true"
+    os.environ["LANGCHAIN_ENDPOINT"] = "https://api.smith.langchain.com"
 
 # =========== LLM ===========
-llm = ChatOpenAI(
-    model=Config.LLM_MODEL,
-    temperature=Config.TOPIC_FOCUS_TEMPERATURE,  # Use topic-focused temperature
-    request_timeout=60,  # Increase timeout for complex operations
-    api_key=Config.OPENAI_API_KEY
-)
+# Keep-alive pool shared by LLM requests, so concurrent calls reuse TLS connections
+LLM_HTTP_LIMITS = httpx.Limits(max_keepalive_connections=32, max_connections=64)
+LLM_HTTP_TIMEOUT = 60.0
+
+# Optional LRU cache of responses by prompt (the prompt encodes topics, level, languages and counts),
+# shared by every model _create_llm returns so it outlives a single asyncio.run. Off by default:
+# repeated generations for a topic are meant to produce new words.
+llm_response_cache = InMemoryCache(maxsize=Config.LLM_RESPONSE_CACHE_SIZE) if Config.LLM_RESPONSE_CACHE_SIZE > 0 else None
+
+def _create_llm(**http_clients) -> ChatOpenAI:
+    """Create the generation model (pass http_client / http_async_client to reuse a connection pool)"""
+    return ChatOpenAI(
+        model=Config.LLM_MODEL,
+        temperature=Config.TOPIC_FOCUS_TEMPERATURE,  # Use topic-focused temperature
+        request_timeout=60,  # Increase timeout for complex operations
+        api_key=Config.OPENAI_API_KEY,
+        cache=llm_response_cache,
+        **http_clients
+    )
+
+def _create_async_http_client() -> httpx.AsyncClient:
+    """Pooled async client for one event loop (async connections can't be shared across asyncio.run calls)"""
+    return httpx.AsyncClient(http2=HTTP2_AVAILABLE, limits=LLM_HTTP_LIMITS, timeout=LLM_HTTP_TIMEOUT)
+
+_llm_http_client = httpx.Client(http2=HTTP2_AVAILABLE, limits=LLM_HTTP_LIMITS, timeout=LLM_HTTP_TIMEOUT)
+atexit.register(_llm_http_client.close)
+
+llm = _create_llm(http_client=_llm_http_client)
+
+# Raw client for the Batch API (bulk runs), which LangChain doesn't wrap
+openai_client = OpenAI(api_key=Config.OPENAI_API_KEY, http_client=_llm_http_client)
 
 # =========== Database ===========
 db = SupabaseVocabDatabase()
@@ -43,99 +88,630 @@ def search_for_topic_context(topic: str, level: str = None, language: str = "Eng
     return ""
 
 # =========== State ===========
-class State(TypedDict):
+@dataclass(slots=True)
+class State:
 	topic: str
 	level: CEFRLevel
 	target_language: str
 	original_langauge: str
-	vocab_list: list[str]
-	vocab_entries: list[VocabEntry]
-	vocab_per_batch: int  # Add batch parameters
-	phrasal_verbs_per_batch: int
-	idioms_per_batch: int
+	vocab_entries: list[VocabEntry] = field(default_factory=list)
+	vocab_per_batch: int = 10  # Add batch parameters
+	phrasal_verbs_per_batch: int = 5
+	idioms_per_batch: int = 5
 
 
 structured_llm = llm.with_structured_output(VocabGenerationResponse)
 
+# =========== Prompts ===========
+# Built once at import and filled in with str.format per batch
+
+BATCH_PROMPT_TEMPLATE = '''You are an expert {language_to_learn} language teacher creating engaging vocabulary content for each of these topics: {topics}
+
+STRICT COUNT REQUIREMENTS (for EACH topic):
+- Generate EXACTLY {target_vocab} {language_to_learn} vocabulary words (nouns, verbs, adjectives, adverbs)
+- Generate EXACTLY {target_phrasal} {language_to_learn} phrasal verbs/expressions  
+- Generate EXACTLY {target_idioms} {language_to_learn} idioms/proverbs
+
+QUALITY REQUIREMENTS:
+- All words must be relevant to the topic they are listed under
+- Include clear definitions in {language_to_learn} (the target learning language)
+- Provide example sentences in {language_to_learn}
+- Translate examples to {learners_native_language}
+- Ensure appropriate difficulty for {level} level
+- Avoid generic words not specific to the topic
+- Generate diverse, engaging, and useful vocabulary
+
+CRITICAL VALIDATION:
+- You MUST generate exactly the specified number of items in each category for every topic
+- Count your results carefully before responding
+- If you don't have the exact count, retry and generate more
+- Do not generate more or fewer than requested
+
+Format as JSON with a topics array containing one item per topic, in the order given. Each item has the topic name exactly as given and its vocabularies, phrasal_verbs, and idioms arrays.'''
+
+GRAPH_PROMPT_TEMPLATE = '''You are an expert {target_language} language teacher. Generate vocabulary for "{topic}" at {level} level.
+
+STRICT COUNT REQUIREMENTS:
+- Generate EXACTLY {target_vocab} vocabulary words (nouns, verbs, adjectives, adverbs)
+- Generate EXACTLY {target_phrasal} phrasal verbs/expressions
+- Generate EXACTLY {target_idioms} idioms/proverbs
+
+QUALITY REQUIREMENTS:
+- All words must be directly relevant to "{topic}"
+- Ensure appropriate difficulty for {level} level
+- Generate diverse, engaging, and useful vocabulary
+- Avoid repetition and generic terms
+- Include clear, detailed definitions
+- Provide realistic example sentences
+- Ensure accurate translations
+
+CRITICAL VALIDATION:
+- You MUST generate exactly the specified number of items in each category
+- Count your results carefully before responding
+- If you don't have the exact count, retry and generate more
+- Do not generate more or fewer than requested
+
+For each entry, include:
+- word: the vocabulary word
+- definition: clear definition in {target_language}
+- example: practical example sentence in {target_language}
+- translation: accurate translation to {original_language}
+- example_translation: translation of the example sentence to {original_language}
+- part_of_speech: part of speech (noun, verb, adjective, adverb, etc.)
+
+Format as JSON with vocabularies, phrasal_verbs, and idioms arrays.'''
+
+BATCH_RETRY_INSTRUCTION_TEMPLATE = "\n\nRETRY INSTRUCTION: Previous attempt generated the wrong counts for: {mismatches}. Every topic needs exactly {target_vocab} vocabularies, {target_phrasal} phrasal verbs, and {target_idioms} idioms. Please count carefully and generate the exact numbers requested."
+
+RETRY_INSTRUCTION_TEMPLATE = "\n\nRETRY INSTRUCTION: Previous attempt generated {vocab_count} vocabularies, {phrasal_count} phrasal verbs, and {idiom_count} idioms. You need exactly {target_vocab} vocabularies, {target_phrasal} phrasal verbs, and {target_idioms} idioms. Please count carefully and generate the exact numbers requested."
+
 # =========== Nodes - functions ===========
 
-def filter_duplicates(entries: List[VocabEntry], existing_combinations: List[tuple]) -> List[VocabEntry]:
-    """Filter out entries that already exist in the database (less aggressive)"""
-    filtered_entries = []
-    existing_keys = [(combo[0].lower(), combo[1], combo[2]) for combo in existing_combinations]
-    
-    print(f"🔍 Checking {len(entries)} entries against {len(existing_combinations)} existing combinations")
+def iter_filtered(entries: Iterable[VocabEntry], existing_keys: FrozenSet[tuple]) -> Iterator[VocabEntry]:
+    """
+    Yield entries that don't already exist in the database
     
+    existing_keys are normalized (lowercased word, level, part_of_speech) tuples,
+    as returned by get_existing_combinations_for_topic.
+    """
     for entry in entries:
         # Create combination key: (word, level, part_of_speech)
-        entry_key = (entry.word.lower(), entry.level.value, entry.part_of_speech.value if entry.part_of_speech else None)
+        part_of_speech = entry.part_of_speech.value if entry.part_of_speech else None
+        entry_key = (entry.word_lower, entry.level.value, part_of_speech)
         
         if entry_key not in existing_keys:
-            filtered_entries.append(entry)
+            yield entry
         else:
-            print(f"Filtered out duplicate: {entry.word} ({entry.part_of_speech.value if entry.part_of_speech else 'unknown'})")
-    
+            logger.debug("Filtered out duplicate: %s (%s)", entry.word, part_of_speech or 'unknown')
+
+def filter_duplicates(entries: List[VocabEntry], existing_keys: FrozenSet[tuple]) -> List[VocabEntry]:
+    """Filter out entries that already exist in the database (less aggressive)"""
+    print(f"🔍 Checking {len(entries)} entries against {len(existing_keys)} existing combinations")
+    if logger.isEnabledFor(logging.DEBUG):
+        # Goes through iter_filtered so each dropped entry is logged
+        filtered_entries = list(iter_filtered(entries, existing_keys))
+    else:
+        filtered_entries = [
+            entry for entry in entries
+            if (entry.word_lower, entry.level.value, entry.part_of_speech.value if entry.part_of_speech else None)
+            not in existing_keys
+        ]
     print(f"🔍 Duplicate filtering: {len(entries)} → {len(filtered_entries)} entries")
     return filtered_entries
 
-def get_existing_combinations_for_topic(topic_name: str, category_name: str = None) -> List[tuple]:
+def get_existing_combinations_for_topic(topic_name: str, category_name: str = None) -> FrozenSet[tuple]:
     """Get existing word combinations for a topic to avoid duplicates"""
     return db.get_existing_combinations(topic_name=topic_name, category_name=category_name)
 
-def validate_topic_relevance(entries: List[VocabEntry], topic_name: str) -> List[VocabEntry]:
+# Keywords that indicate off-topic content (very generic words)
+GENERIC_WORDS = frozenset([
+    'hello', 'goodbye', 'thank you', 'please', 'yes', 'no', 'maybe',
+    'big', 'small', 'good', 'bad', 'happy', 'sad', 'fast', 'slow',
+    'eat', 'drink', 'sleep', 'walk', 'run', 'talk', 'listen', 'see',
+    'book', 'pen', 'paper', 'table', 'chair', 'door', 'window'
+])
+
+def iter_relevant(entries: Iterable[VocabEntry], topic_name: str) -> Iterator[VocabEntry]:
+    """
+    Yield entries that are relevant to the given topic
+    
+    Only words too generic for any topic are dropped. Entries that don't obviously
+    match the topic are kept for the user to review, so no per-topic matching is done.
+    """
+    for entry in entries:
+        if entry.word_lower in GENERIC_WORDS:
+            logger.debug("Filtered out generic word: %s (topic: %s)", entry.word, topic_name)
+            continue
+        yield entry
+
+def validate_topic_relevance(entries: Iterable[VocabEntry], topic_name: str) -> List[VocabEntry]:
     """Validate that entries are relevant to the given topic"""
-    relevant_entries = []
-    topic_lower = topic_name.lower()
-    
-    # Keywords that indicate off-topic content (very generic words)
-    generic_words = [
-        'hello', 'goodbye', 'thank you', 'please', 'yes', 'no', 'maybe',
-        'big', 'small', 'good', 'bad', 'happy', 'sad', 'fast', 'slow',
-        'eat', 'drink', 'sleep', 'walk', 'run', 'talk', 'listen', 'see',
-        'book', 'pen', 'paper', 'table', 'chair', 'door', 'window'
+    return list(iter_relevant(entries, topic_name))
+
+class AsyncRateLimiter:
+    """Token bucket allowing `rate` acquisitions per `period` seconds, with bursts of up to `rate`"""
+    
+    def __init__(self, rate: int, period: float = 60.0):
+        self.rate = rate
+        self.period = period
+        self._tokens = float(rate)
+        self._updated = None
+        self._lock = asyncio.Lock()
+    
+    async def acquire(self):
+        """Wait (without blocking the event loop) until a request may be sent"""
+        async with self._lock:
+            loop = asyncio.get_running_loop()
+            while True:
+                now = loop.time()
+                if self._updated is not None:
+                    self._tokens = min(self.rate, self._tokens + (now - self._updated) * self.rate / self.period)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) * self.period / self.rate)
+
+def _select_topic_entries(
+    topic: str,
+    generated,
+    existing_combinations: FrozenSet[tuple],
+    vocab_per_batch: int,
+    phrasal_verbs_per_batch: int,
+    idioms_per_batch: int,
+) -> List[VocabEntry]:
+    """Validate and de-duplicate one topic's generated entries, capped to the requested counts"""
+    print(f"[{topic}] Found {len(existing_combinations)} existing combinations in database")
+    
+    # Combine all entries
+    total_generated = len(generated.vocabularies) + len(generated.phrasal_verbs) + len(generated.idioms)
+    print(f"[{topic}] Total: {total_generated} entries")
+    
+    # Relevance and duplicate checks stream over the three lists; only the capped result is materialized
+    pipeline = iter_filtered(
+        iter_relevant(chain(generated.vocabularies, generated.phrasal_verbs, generated.idioms), topic),
+        existing_combinations
+    )
+    
+    # Limit to requested counts (take first N of each type)
+    final_entries = []
+    vocab_added = 0
+    phrasal_added = 0
+    idiom_added = 0
+    
+    for entry in pipeline:
+        part_of_speech = entry.part_of_speech.value
+        if part_of_speech == 'phrasal_verb' and phrasal_added < phrasal_verbs_per_batch:
+            final_entries.append(entry)
+            phrasal_added += 1
+        elif part_of_speech == 'idiom' and idiom_added < idioms_per_batch:
+            final_entries.append(entry)
+            idiom_added += 1
+        elif part_of_speech not in ('phrasal_verb', 'idiom') and vocab_added < vocab_per_batch:
+            final_entries.append(entry)
+            vocab_added += 1
+    
+    # Show selected entries
+    for i, entry in enumerate(final_entries[:5]):  # Show first 5
+        pos = entry.part_of_speech.value if entry.part_of_speech else "unknown"
+        print(f"  {i+1}. {entry.word} ({pos}): {entry.definition}")
+    
+    print(f"[{topic}] 📊 Final counts after filtering: {vocab_added}/{vocab_per_batch} vocabularies, "
+          f"{phrasal_added}/{phrasal_verbs_per_batch} phrasal verbs, {idiom_added}/{idioms_per_batch} idioms")
+    return final_entries
+
+# Marks where a chunk's topics go in a prompt from specialize_batch_prompt
+TOPICS_PLACEHOLDER = "<<TOPICS>>"
+
+def specialize_batch_prompt(
+    level: CEFRLevel,
+    language_to_learn: str,
+    learners_native_language: str,
+    vocab_per_batch: int,
+    phrasal_verbs_per_batch: int,
+    idioms_per_batch: int,
+) -> str:
+    """Fill in BATCH_PROMPT_TEMPLATE's run-wide values once, leaving TOPICS_PLACEHOLDER for each chunk"""
+    return BATCH_PROMPT_TEMPLATE.format(
+        language_to_learn=language_to_learn,
+        learners_native_language=learners_native_language,
+        topics=TOPICS_PLACEHOLDER,
+        level=level.value,
+        target_vocab=int(vocab_per_batch * 1.5),
+        target_phrasal=int(phrasal_verbs_per_batch * 1.5),
+        target_idioms=int(idioms_per_batch * 1.5)
+    )
+
+async def _generate_topic_chunk_entries(
+    generation_llm,
+    rate_limiter: Optional[AsyncRateLimiter],
+    batch_prompt: str,
+    topics: List[str],
+    existing_by_topic: Dict[str, FrozenSet[tuple]],
+    vocab_per_batch: int,
+    phrasal_verbs_per_batch: int,
+    idioms_per_batch: int,
+) -> Dict[str, Optional[List[VocabEntry]]]:
+    """
+    Generate entries for several topics with one LLM request (nothing is saved here)
+    
+    batch_prompt comes from specialize_batch_prompt with the same counts.
+    Returns the final entries per topic; a topic missing from the response maps to None.
+    """
+    label = ", ".join(topics)
+    
+    # Direct generation with 1.5x multiplier and retry logic
+    # Apply 1.5x multiplier to ensure we have enough entries after filtering
+    target_vocab = int(vocab_per_batch * 1.5)
+    target_phrasal = int(phrasal_verbs_per_batch * 1.5)
+    target_idioms = int(idioms_per_batch * 1.5)
+    
+    print(f"[{label}] 📊 Requesting per topic: {target_vocab} vocab, {target_phrasal} phrasal, {target_idioms} idioms")
+    print(f"[{label}] 📊 Target after filtering: {vocab_per_batch} vocab, {phrasal_verbs_per_batch} phrasal, {idioms_per_batch} idioms")
+    
+    prompt = batch_prompt.replace(TOPICS_PLACEHOLDER, json.dumps(topics, ensure_ascii=False))
+
+    # Generate vocabulary using structured output with count validation
+    max_attempts = 3
+    attempt = 0
+    generated_by_topic = {}
+    
+    while attempt < max_attempts:
+        attempt += 1
+        print(f"[{label}] 🔄 Generation attempt {attempt}/{max_attempts}")
+        
+        if rate_limiter is not None:
+            await rate_limiter.acquire()
+        res = await generation_llm.ainvoke(prompt)
+        
+        # The model echoes topic names, so match them case-insensitively
+        generated_by_topic = {item.topic.strip().lower(): item for item in res.topics}
+        
+        # Validate each topic's counts against 1.5x targets
+        mismatches = []
+        for topic in topics:
+            generated = generated_by_topic.get(topic.lower())
+            if generated is None:
+                print(f"[{topic}] ⚠️ Missing from response")
+                mismatches.append(f"{topic} (missing)")
+                continue
+            
+            vocab_count = len(generated.vocabularies)
+            phrasal_count = len(generated.phrasal_verbs)
+            idiom_count = len(generated.idioms)
+            print(f"[{topic}] 📊 Generated counts: {vocab_count}/{target_vocab} vocabularies, "
+                  f"{phrasal_count}/{target_phrasal} phrasal verbs, {idiom_count}/{target_idioms} idioms")
+            
+            if (vocab_count, phrasal_count, idiom_count) != (target_vocab, target_phrasal, target_idioms):
+                mismatches.append(f"{topic} ({vocab_count} vocabularies, {phrasal_count} phrasal verbs, {idiom_count} idioms)")
+        
+        if not mismatches:
+            print(f"[{label}] ✅ All counts match requirements!")
+            break
+        else:
+            print(f"[{label}] ⚠️ Count mismatch detected. Attempt {attempt}/{max_attempts}")
+            if attempt < max_attempts:
+                # Add more specific instructions for retry
+                prompt += BATCH_RETRY_INSTRUCTION_TEMPLATE.format(
+                    mismatches="; ".join(mismatches),
+                    target_vocab=target_vocab, target_phrasal=target_phrasal, target_idioms=target_idioms
+                )
+            else:
+                print(f"[{label}] ❌ Max attempts reached. Using generated results as-is.")
+    
+    results = {}
+    for topic in topics:
+        generated = generated_by_topic.get(topic.lower())
+        results[topic] = None if generated is None else _select_topic_entries(
+            topic, generated, existing_by_topic.get(topic, frozenset()),
+            vocab_per_batch, phrasal_verbs_per_batch, idioms_per_batch
+        )
+    return results
+
+async def _run_async(
+    topic_list: List[str],
+    category: str,
+    level: CEFRLevel,
+    language_to_learn: str,
+    learners_native_language: str,
+    vocab_per_batch: int,
+    phrasal_verbs_per_batch: int,
+    idioms_per_batch: int,
+    delay_seconds: int,
+    concurrency: int,
+    topics_per_request: int,
+) -> int:
+    """Generate topics concurrently and save each batch as it completes; returns the number of topics processed"""
+    # Bounds in-flight LLM requests; a slot is released delay_seconds after its chunk
+    # finishes to pace the API, without holding back that chunk's results
+    semaphore = asyncio.Semaphore(concurrency)
+    loop = asyncio.get_running_loop()
+    
+    # Ctrl+C sets the event from inside the loop, so a stop interrupts waiting immediately
+    stop_event = asyncio.Event()
+    
+    def request_stop():
+        """Handle Ctrl+C to gracefully stop generation"""
+        print("\n\nStopping vocabulary generation...")
+        stop_event.set()
+    
+    try:
+        loop.add_signal_handler(signal.SIGINT, request_stop)
+        signal_handler_installed = True
+    except (NotImplementedError, RuntimeError):
+        # Not supported on this platform / thread; Ctrl+C raises KeyboardInterrupt instead
+        signal_handler_installed = False
+    
+    # Existing combinations for every topic in one round trip, instead of one query per topic
+    existing_by_topic = await asyncio.to_thread(db.get_existing_combinations_bulk, topic_list, category)
+    
+    # One connection pool for all of this run's concurrent requests
+    http_async_client = _create_async_http_client()
+    generation_llm = _create_llm(http_async_client=http_async_client).with_structured_output(MultiTopicVocabGenerationResponse)
+    
+    # Every LLM request (including count retries) counts against the configured RPM budget
+    rate_limiter = AsyncRateLimiter(Config.LLM_REQUESTS_PER_MINUTE) if Config.LLM_REQUESTS_PER_MINUTE > 0 else None
+    
+    # Only the topics change between requests, so everything else in the prompt is filled in once per run
+    batch_prompt = specialize_batch_prompt(
+        level, language_to_learn, learners_native_language,
+        vocab_per_batch, phrasal_verbs_per_batch, idioms_per_batch
+    )
+    
+    async def process_chunk(topics: List[str]):
+        await semaphore.acquire()
+        try:
+            return await _generate_topic_chunk_entries(
+                generation_llm, rate_limiter, batch_prompt, topics, existing_by_topic,
+                vocab_per_batch, phrasal_verbs_per_batch, idioms_per_batch
+            )
+        except Exception as e:
+            print(f"Error generating topics {', '.join(topics)}: {e}")
+            return dict.fromkeys(topics)
+        finally:
+            loop.call_later(delay_seconds, semaphore.release)
+    
+    # Several topics share one LLM request, so the prompt preamble and schema are sent once per chunk
+    chunks = [topic_list[i:i + topics_per_request] for i in range(0, len(topic_list), topics_per_request)]
+    tasks = [asyncio.create_task(process_chunk(chunk)) for chunk in chunks]
+    stop_waiter = asyncio.create_task(stop_event.wait())
+    topics_processed = 0
+    
+    # Entries waiting to be saved, by topic; written with one bulk upsert once enough have piled up
+    pending_writes = {}
+    pending_count = 0
+    
+    async def flush_pending_writes():
+        nonlocal pending_writes, pending_count
+        if not pending_writes:
+            return
+        batch, pending_writes, pending_count = pending_writes, {}, 0
+        try:
+            print(f"\nSaving {sum(len(entries) for entries in batch.values())} new entries for {len(batch)} topics to database...")
+            save_results = await asyncio.to_thread(
+                db.insert_vocab_entries_bulk,
+                batch,
+                category_name=category,
+                target_language=language_to_learn,
+                original_language=learners_native_language
+            )
+            print("Saved successfully!")
+            
+            for topic, save_result in save_results.items():
+                # Updated count for this topic, from the prefetched combinations (no extra query)
+                total_for_topic = len(existing_by_topic.get(topic, frozenset())) + save_result["inserted_count"]
+                print(f"Total entries in database for '{topic}': {total_for_topic}")
+        except Exception as e:
+            print(f"Error saving entries for {', '.join(batch)}: {e}")
+    
+    try:
+        # Results are handled one at a time, in completion order
+        for next_result in asyncio.as_completed(tasks):
+            result_future = asyncio.ensure_future(next_result)
+            await asyncio.wait((result_future, stop_waiter), return_when=asyncio.FIRST_COMPLETED)
+            if stop_event.is_set():
+                result_future.cancel()
+                break
+            
+            for topic, final_entries in result_future.result().items():
+                topics_processed += 1
+                
+                print(f"\n{'='*60}")
+                print(f"BATCH #{topics_processed} - TOPIC: {topic} ({topics_processed}/{len(topic_list)})")
+                print(f"{'='*60}")
+                
+                if final_entries is None:
+                    print("Continuing to next topic...")
+                elif final_entries:
+                    pending_writes.setdefault(topic, []).extend(final_entries)
+                    pending_count += len(final_entries)
+                    print(f"\nQueued {len(final_entries)} new entries for saving")
+                else:
+                    print("\nNo new entries to save (all were duplicates)")
+            
+            if pending_count >= Config.INSERT_FLUSH_THRESHOLD:
+                await flush_pending_writes()
+        
+        # Save whatever is left, including after a stop request
+        await flush_pending_writes()
+    finally:
+        if signal_handler_installed:
+            loop.remove_signal_handler(signal.SIGINT)
+        stop_waiter.cancel()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await http_async_client.aclose()
+    
+    return topics_processed
+
+# =========== Batch API ===========
+# Batches still running; anything else is final
+BATCH_PENDING_STATUSES = frozenset({"validating", "in_progress", "finalizing", "cancelling"})
+
+def submit_batch(prompts: Dict[str, str]) -> str:
+    """
+    Upload one structured-output chat request per prompt as an OpenAI batch
+    
+    prompts maps each request's custom_id to its prompt; returns the batch id.
+    """
+    response_format = {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "MultiTopicVocabGenerationResponse",
+            "schema": MultiTopicVocabGenerationResponse.model_json_schema()
+        }
+    }
+    lines = [
+        json.dumps({
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": {
+                "model": Config.LLM_MODEL,
+                "temperature": Config.TOPIC_FOCUS_TEMPERATURE,
+                "messages": [{"role": "user", "content": prompt}],
+                "response_format": response_format
+            }
+        }, ensure_ascii=False)
+        for custom_id, prompt in prompts.items()
     ]
     
-    # Topic-specific vocabulary patterns (words that are clearly related)
-    topic_patterns = {
-        'shopping': ['shop', 'buy', 'sell', 'price', 'cost', 'discount', 'sale', 'store', 'market', 'mall', 'cart', 'checkout', 'receipt', 'cash', 'card', 'money', 'bargain', 'deal', 'brand', 'size', 'fit', 'return', 'exchange', 'gift', 'purchase', 'spend', 'save', 'budget', 'expensive', 'cheap', 'affordable'],
-        'food': ['food', 'eat', 'drink', 'cook', 'recipe', 'ingredient', 'meal', 'dish', 'cuisine', 'restaurant', 'kitchen', 'taste', 'flavor', 'spice', 'seasoning', 'fresh', 'delicious', 'hungry', 'thirsty', 'breakfast', 'lunch', 'dinner', 'snack'],
-        'technology': ['tech', 'computer', 'phone', 'device', 'app', 'software', 'hardware', 'digital', 'online', 'internet', 'data', 'information', 'system', 'program', 'code', 'algorithm', 'database', 'network', 'connect', 'download', 'upload', 'install', 'update'],
-        'business': ['business', 'company', 'work', 'office', 'meeting', 'project', 'team', 'manager', 'employee', 'client', 'customer', 'service', 'product', 'market', 'industry', 'profit', 'revenue', 'cost', 'budget', 'plan', 'strategy', 'goal', 'target'],
-        'travel': ['travel', 'trip', 'journey', 'destination', 'hotel', 'flight', 'airport', 'ticket', 'booking', 'reservation', 'tourist', 'vacation', 'holiday', 'sightseeing', 'tour', 'guide', 'passport', 'visa', 'luggage', 'suitcase', 'map', 'direction']
+    batch_file = openai_client.files.create(
+        file=("vocab_batch.jsonl", "\n".join(lines).encode("utf-8")),
+        purpose="batch"
+    )
+    batch = openai_client.batches.create(
+        input_file_id=batch_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h"
+    )
+    print(f"📦 Submitted batch {batch.id} with {len(lines)} requests")
+    return batch.id
+
+def poll_batch(batch_id: str, poll_seconds: int = None) -> Dict[str, MultiTopicVocabGenerationResponse]:
+    """
+    Wait for a batch to finish and parse its responses, keyed by custom_id
+    
+    Requests that failed or returned unparseable output are left out.
+    """
+    if poll_seconds is None:
+        poll_seconds = Config.BATCH_POLL_INTERVAL_SECONDS
+    
+    batch = openai_client.batches.retrieve(batch_id)
+    while batch.status in BATCH_PENDING_STATUSES:
+        counts = batch.request_counts
+        progress = f"{counts.completed + counts.failed}/{counts.total}" if counts else "?"
+        print(f"⏳ Batch {batch_id}: {batch.status} ({progress} requests done)")
+        time.sleep(poll_seconds)
+        batch = openai_client.batches.retrieve(batch_id)
+    
+    # Expired and cancelled batches still return the requests that finished
+    if not batch.output_file_id:
+        raise RuntimeError(f"Batch {batch_id} ended with status '{batch.status}' and no output")
+    print(f"✅ Batch {batch_id}: {batch.status}")
+    
+    responses = {}
+    for line in openai_client.files.content(batch.output_file_id).text.splitlines():
+        if not line.strip():
+            continue
+        result = json.loads(line)
+        custom_id = result["custom_id"]
+        response = result.get("response") or {}
+        if response.get("status_code") != 200:
+            print(f"❌ Batch request {custom_id} failed: {result.get('error') or response.get('body')}")
+            continue
+        try:
+            content = response["body"]["choices"][0]["message"]["content"]
+            responses[custom_id] = MultiTopicVocabGenerationResponse.model_validate_json(content)
+        except Exception as e:
+            print(f"❌ Could not parse batch response {custom_id}: {e}")
+    return responses
+
+def _run_batch_api(
+    topic_list: List[str],
+    category: str,
+    level: CEFRLevel,
+    language_to_learn: str,
+    learners_native_language: str,
+    vocab_per_batch: int,
+    phrasal_verbs_per_batch: int,
+    idioms_per_batch: int,
+    topics_per_request: int,
+) -> int:
+    """Generate every topic through one OpenAI batch, then filter and save; returns the number of topics processed"""
+    existing_by_topic = db.get_existing_combinations_bulk(topic_list, category)
+    
+    batch_prompt = specialize_batch_prompt(
+        level, language_to_learn, learners_native_language,
+        vocab_per_batch, phrasal_verbs_per_batch, idioms_per_batch
+    )
+    chunks = {
+        f"chunk-{i}": topic_list[start:start + topics_per_request]
+        for i, start in enumerate(range(0, len(topic_list), topics_per_request))
     }
+    batch_id = submit_batch({
+        custom_id: batch_prompt.replace(TOPICS_PLACEHOLDER, json.dumps(topics, ensure_ascii=False))
+        for custom_id, topics in chunks.items()
+    })
+    responses = poll_batch(batch_id)
     
-    for entry in entries:
-        word_lower = entry.word.lower()
-        definition_lower = entry.definition.lower()
+    topics_processed = 0
+    pending_writes = {}
+    
+    for custom_id, topics in chunks.items():
+        res = responses.get(custom_id)
+        # The model echoes topic names, so match them case-insensitively
+        generated_by_topic = {item.topic.strip().lower(): item for item in res.topics} if res else {}
         
-        # Check if word is too generic
-        if word_lower in generic_words:
-            print(f"Filtered out generic word: {entry.word}")
-            continue
+        for topic in topics:
+            topics_processed += 1
             
-        # Check if definition mentions the topic
-        if topic_lower in definition_lower:
-            relevant_entries.append(entry)
-            continue
+            print(f"\n{'='*60}")
+            print(f"BATCH #{topics_processed} - TOPIC: {topic} ({topics_processed}/{len(topic_list)})")
+            print(f"{'='*60}")
             
-        # Check if word is clearly related to topic using topic patterns
-        if topic_lower in topic_patterns:
-            topic_keywords = topic_patterns[topic_lower]
-            if any(keyword in word_lower for keyword in topic_keywords):
-                relevant_entries.append(entry)
+            # Batch results are used as-is: there is no count-mismatch retry as in the interactive path
+            generated = generated_by_topic.get(topic.lower())
+            if generated is None:
+                print(f"[{topic}] ⚠️ Missing from response")
                 continue
-        
-        # Fallback: check if any word from topic name appears in definition
-        topic_keywords = topic_lower.split()
-        if any(keyword in definition_lower for keyword in topic_keywords):
-            relevant_entries.append(entry)
-            continue
             
-        # If we get here, the word might not be relevant
-        print(f"Note: Checking relevance for '{entry.word}' in topic '{topic_name}'")
-        relevant_entries.append(entry)  # Keep it for now, let user decide
+            final_entries = _select_topic_entries(
+                topic, generated, existing_by_topic.get(topic, frozenset()),
+                vocab_per_batch, phrasal_verbs_per_batch, idioms_per_batch
+            )
+            if final_entries:
+                pending_writes[topic] = final_entries
+            else:
+                print("\nNo new entries to save (all were duplicates)")
     
-    return relevant_entries
+    if pending_writes:
+        print(f"\nSaving {sum(len(entries) for entries in pending_writes.values())} new entries for {len(pending_writes)} topics to database...")
+        save_results = db.insert_vocab_entries_bulk(
+            pending_writes,
+            category_name=category,
+            target_language=language_to_learn,
+            original_language=learners_native_language
+        )
+        print("Saved successfully!")
+        
+        for topic, save_result in save_results.items():
+            total_for_topic = len(existing_by_topic.get(topic, frozenset())) + save_result["inserted_count"]
+            print(f"Total entries in database for '{topic}': {total_for_topic}")
+    
+    return topics_processed
+
+# Used when neither topics nor a category is given
+DEFAULT_TOPICS = ("shopping",)
+
+def resolve_topic_list(topics: Optional[List[str]] = None, category: Optional[str] = None) -> List[str]:
+    """Topics to process: the given topics, else the category's topics, else DEFAULT_TOPICS"""
+    if topics:
+        return topics
+    if category:
+        return get_topic_list(category)
+    return list(DEFAULT_TOPICS)
 
 def run_continuous_vocab_generation(
     topics: List[str] = None,
@@ -149,14 +725,18 @@ def run_continuous_vocab_generation(
     delay_seconds: int = 3,
     save_topic_list: bool = False,
     topic_list_name: str = None,
+    concurrency: int = None,
+    topics_per_request: int = None,
+    use_batch_api: bool = False,
 ):
-    """
-    Run continuous vocabulary generation using LangGraph workflow
-    Now properly integrates search agent -> vocabulary generation flow
-    """
     """
     Run continuous vocabulary generation for multiple topics and different types.
     
+    Topics are generated concurrently (up to `concurrency` LLM requests in flight,
+    each covering `topics_per_request` topics) and each batch is saved as soon as it is ready.
+    With `use_batch_api`, all requests go to the OpenAI Batch API instead (half price,
+    results within 24h) and everything is saved once the batch completes.
+    
     Args:
         topics: List of specific topics to process (if None, uses category)
         category: Category of topics to process (if None, uses topics list)
@@ -166,21 +746,19 @@ def run_continuous_vocab_generation(
         vocab_per_batch: Number of vocabularies to generate per batch (default: 10)
         phrasal_verbs_per_batch: Number of phrasal verbs to generate per batch (default: 5)
         idioms_per_batch: Number of idioms to generate per batch (default: 5)
-        delay_seconds: Delay between batches in seconds (default: 3)
+        delay_seconds: Pause before a concurrency slot sends its next request (default: 3)
         save_topic_list: Whether to save the topic list to database (default: False)
         topic_list_name: Custom name for the topic list (default: auto-generated)
+        concurrency: Maximum LLM requests in flight at once (default: Config.GENERATION_CONCURRENCY)
+        topics_per_request: Topics covered by each LLM request (default: Config.TOPICS_PER_REQUEST)
+        use_batch_api: Submit one OpenAI batch and wait for it, for non-interactive bulk runs (default: False)
     """
-    import time
-    import signal
-    import sys
+    if concurrency is None:
+        concurrency = Config.GENERATION_CONCURRENCY
+    if topics_per_request is None:
+        topics_per_request = Config.TOPICS_PER_REQUEST
     
-    # Determine topics to process
-    if topics:
-        topic_list = topics
-    elif category:
-        topic_list = get_topic_list(category)
-    else:
-        topic_list = ["shopping"] 
+    topic_list = resolve_topic_list(topics, category)
     
     # Save topic list to database if requested
     if save_topic_list and topics:  # Only save custom topic lists, not category-based ones
@@ -198,196 +776,34 @@ def run_continuous_vocab_generation(
         print(f"{i}. {topic}")
     print()
     
-    # Flag to control the loop
-    running = True
-    
-    def signal_handler(sig, frame):
-        """Handle Ctrl+C to gracefully stop the loop"""
-        nonlocal running
-        print("\n\nStopping vocabulary generation...")
-        running = False
-    
-    # Register signal handler for Ctrl+C
-    signal.signal(signal.SIGINT, signal_handler)
-    
-    batch_count = 0
     topic_index = 0
-    current_topic = topic_list[0]
     
     print(f"Starting continuous vocabulary generation")
-    print(f"Level: {level.value}, Target Language: {language_to_learn}")
+    print(f"Level: {level.value}, Target Language: {language_to_learn}, Concurrency: {concurrency}, Topics per request: {topics_per_request}")
     print("Press Ctrl+C to stop\n")
     
     try:
-        while running and topic_index < len(topic_list):
-            batch_count += 1
-            current_topic = topic_list[topic_index]
-            
-            print(f"\n{'='*60}")
-            print(f"BATCH #{batch_count} - TOPIC: {current_topic} ({topic_index + 1}/{len(topic_list)})")
-            print(f"{'='*60}")
-            
-            # Get existing combinations for content polling (not for filtering AI output)
-            existing_combinations = get_existing_combinations_for_topic(current_topic, category)
-            print(f"Found {len(existing_combinations)} existing combinations in database")
-            
-            # Direct generation with 1.5x multiplier and retry logic
-            # Apply 1.5x multiplier to ensure we have enough entries after filtering
-            target_vocab = int(vocab_per_batch * 1.5)
-            target_phrasal = int(phrasal_verbs_per_batch * 1.5)
-            target_idioms = int(idioms_per_batch * 1.5)
-            
-            print(f"🔧 Creating STANDARD prompt with 1.5x multiplier")
-            print(f"📊 Requesting: {target_vocab} vocab, {target_phrasal} phrasal, {target_idioms} idioms")
-            print(f"📊 Target after filtering: {vocab_per_batch} vocab, {phrasal_verbs_per_batch} phrasal, {idioms_per_batch} idioms")
-            
-            prompt = f'''You are an expert {language_to_learn} language teacher creating engaging vocabulary content for {topic}.
-
-STRICT COUNT REQUIREMENTS:
-- Generate EXACTLY {target_vocab} {language_to_learn} vocabulary words (nouns, verbs, adjectives, adverbs)
-- Generate EXACTLY {target_phrasal} {language_to_learn} phrasal verbs/expressions  
-- Generate EXACTLY {target_idioms} {language_to_learn} idioms/proverbs
-
-QUALITY REQUIREMENTS:
-- All words must be relevant to "{topic}"
-- Include clear definitions in {language_to_learn} (the target learning language)
-- Provide example sentences in {language_to_learn}
-- Translate examples to {learners_native_language}
-- Ensure appropriate difficulty for {level.value} level
-- Avoid generic words not specific to the topic
-- Generate diverse, engaging, and useful vocabulary
-
-CRITICAL VALIDATION:
-- You MUST generate exactly the specified number of items in each category
-- Count your results carefully before responding
-- If you don't have the exact count, retry and generate more
-- Do not generate more or fewer than requested
-
-Format as JSON with vocabularies, phrasal_verbs, and idioms arrays.'''
-
-            try:
-                # Generate vocabulary using structured output with count validation
-                max_attempts = 3
-                attempt = 0
-                
-                while attempt < max_attempts:
-                    attempt += 1
-                    print(f"🔄 Generation attempt {attempt}/{max_attempts}")
-                    
-                    res = structured_llm.invoke(prompt)
-                    
-                    # Validate counts against 1.5x targets
-                    vocab_count = len(res.vocabularies)
-                    phrasal_count = len(res.phrasal_verbs)
-                    idiom_count = len(res.idioms)
-                    
-                    print(f"📊 Generated counts:")
-                    print(f"   Vocabularies: {vocab_count}/{target_vocab} (target: {vocab_per_batch})")
-                    print(f"   Phrasal verbs: {phrasal_count}/{target_phrasal} (target: {phrasal_verbs_per_batch})")
-                    print(f"   Idioms: {idiom_count}/{target_idioms} (target: {idioms_per_batch})")
-                    
-                    # Check if counts match 1.5x requirements
-                    counts_match = (
-                        vocab_count == target_vocab and
-                        phrasal_count == target_phrasal and
-                        idiom_count == target_idioms
-                    )
-                    
-                    if counts_match:
-                        print("✅ All counts match requirements!")
-                        break
-                    else:
-                        print(f"⚠️ Count mismatch detected. Attempt {attempt}/{max_attempts}")
-                        if attempt < max_attempts:
-                            # Add more specific instructions for retry
-                            prompt += f"\n\nRETRY INSTRUCTION: Previous attempt generated {vocab_count} vocabularies, {phrasal_count} phrasal verbs, and {idiom_count} idioms. You need exactly {target_vocab} vocabularies, {target_phrasal} phrasal verbs, and {target_idioms} idioms. Please count carefully and generate the exact numbers requested."
-                        else:
-                            print("❌ Max attempts reached. Using generated results as-is.")
-                
-                # Combine all entries
-                all_entries = res.vocabularies + res.phrasal_verbs + res.idioms
-                
-                print(f"Final generated counts:")
-                print(f"- {len(res.vocabularies)} vocabularies")
-                print(f"- {len(res.phrasal_verbs)} phrasal verbs")
-                print(f"- {len(res.idioms)} idioms")
-                print(f"Total: {len(all_entries)} entries")
-                
-                # Validate topic relevance
-                print(f"\nValidating topic relevance for '{current_topic}'...")
-                relevant_entries = validate_topic_relevance(all_entries, current_topic)
-                print(f"Topic-relevant entries: {len(relevant_entries)}/{len(all_entries)}")
-                
-                # Show generated entries
-                for i, entry in enumerate(relevant_entries[:5]):  # Show first 5
-                    pos = entry.part_of_speech.value if entry.part_of_speech else "unknown"
-                    print(f"  {i+1}. {entry.word} ({pos}): {entry.definition}")
-                
-                # Filter out duplicates and limit to requested counts
-                filtered_entries = filter_duplicates(relevant_entries, existing_combinations)
-                
-                # Limit to requested counts (take first N of each type)
-                final_entries = []
-                vocab_added = 0
-                phrasal_added = 0
-                idiom_added = 0
-                
-                for entry in filtered_entries:
-                    if entry.part_of_speech.value == 'phrasal_verb' and phrasal_added < phrasal_verbs_per_batch:
-                        final_entries.append(entry)
-                        phrasal_added += 1
-                    elif entry.part_of_speech.value == 'idiom' and idiom_added < idioms_per_batch:
-                        final_entries.append(entry)
-                        idiom_added += 1
-                    elif entry.part_of_speech.value not in ['phrasal_verb', 'idiom'] and vocab_added < vocab_per_batch:
-                        final_entries.append(entry)
-                        vocab_added += 1
-                
-                print(f"\n📊 Final counts after filtering:")
-                print(f"   Vocabularies: {vocab_added}/{vocab_per_batch}")
-                print(f"   Phrasal verbs: {phrasal_added}/{phrasal_verbs_per_batch}")
-                print(f"   Idioms: {idiom_added}/{idioms_per_batch}")
-                
-                if final_entries:
-                    print(f"\nSaving {len(final_entries)} new entries to database...")
-                    
-                    # Save to database
-                    db.insert_vocab_entries(
-                        entries=final_entries,
-                        topic_name=current_topic,
-                        category_name=category,
-                        target_language=language_to_learn,
-                        original_language=learners_native_language
-                    )
-                    print("Saved successfully!")
-                else:
-                    print("\nNo new entries to save (all were duplicates)")
-                
-                # Get updated count for this topic
-                saved_entries = db.get_vocab_entries(topic_name=current_topic, category_name=category)
-                print(f"Total entries in database for '{current_topic}': {len(saved_entries)}")
-                
-            except Exception as e:
-                print(f"Error in batch #{batch_count}: {e}")
-                print("Continuing to next topic...")
-            
-            # Move to next topic
-            topic_index += 1
-            
-            # Add delay between topics (except for the last one)
-            if topic_index < len(topic_list) and running:
-                print(f"\n⏳ Waiting {delay_seconds} seconds before next topic...")
-                time.sleep(delay_seconds)
-    
+        if use_batch_api:
+            topic_index = _run_batch_api(
+                topic_list, category, level, language_to_learn, learners_native_language,
+                vocab_per_batch, phrasal_verbs_per_batch, idioms_per_batch,
+                max(1, topics_per_request)
+            )
+        else:
+            topic_index = asyncio.run(_run_async(
+                topic_list, category, level, language_to_learn, learners_native_language,
+                vocab_per_batch, phrasal_verbs_per_batch, idioms_per_batch,
+                delay_seconds, concurrency, max(1, topics_per_request)
+            ))
     except KeyboardInterrupt:
         print("\n\n🛑 Stopped by user")
     
     # Final summary
-    total_entries = len(db.get_vocab_entries())
+    total_entries = db.count_vocab_entries()
     print(f"\nFINAL SUMMARY:")
     print(f"Topics processed: {topic_index}/{len(topic_list)}")
     print(f"Level: {level.value}")
-    print(f"Total batches run: {batch_count}")
+    print(f"Total batches run: {topic_index}")
     print(f"Total entries in database: {total_entries}")
     print("Done!")
     
@@ -395,7 +811,7 @@ Format as JSON with vocabularies, phrasal_verbs, and idioms arrays.'''
         "success": True,
         "topics_processed": topic_index,
         "total_topics": len(topic_list),
-        "batches_run": batch_count,
+        "batches_run": topic_index,
         "entries_created": total_entries
     }
 
@@ -420,22 +836,17 @@ def view_saved_topic_lists():
 
 # =========== LangGraph Nodes ===========
 
-def search_node(state: State) -> State:
-    """Search node disabled - using direct creative generation"""
-    print("🔧 Search node disabled - using direct creative generation")
-    return state
-
-def generation_node(state: State) -> State:
+def generation_node(state: State) -> dict:
     """Simple, effective vocabulary generation with count constraints and 1.5x multiplier"""
-    topic = state["topic"]
-    level = state["level"]
-    target_language = state["target_language"]
-    original_language = state["original_langauge"]
+    topic = state.topic
+    level = state.level
+    target_language = state.target_language
+    original_language = state.original_langauge
     
     # Get batch parameters from state
-    vocab_per_batch = state.get("vocab_per_batch", 10)
-    phrasal_verbs_per_batch = state.get("phrasal_verbs_per_batch", 5)
-    idioms_per_batch = state.get("idioms_per_batch", 5)
+    vocab_per_batch = state.vocab_per_batch
+    phrasal_verbs_per_batch = state.phrasal_verbs_per_batch
+    idioms_per_batch = state.idioms_per_batch
     
     # Apply 1.5x multiplier to ensure we have enough entries after filtering
     target_vocab = int(vocab_per_batch * 1.5)
@@ -447,37 +858,15 @@ def generation_node(state: State) -> State:
     print(f"📊 Target after filtering: {vocab_per_batch} vocab, {phrasal_verbs_per_batch} phrasal verbs, {idioms_per_batch} idioms")
     
     # Enhanced prompt with strict count requirements and 1.5x multiplier
-    prompt = f'''You are an expert {target_language} language teacher. Generate vocabulary for "{topic}" at {level.value} level.
-
-STRICT COUNT REQUIREMENTS:
-- Generate EXACTLY {target_vocab} vocabulary words (nouns, verbs, adjectives, adverbs)
-- Generate EXACTLY {target_phrasal} phrasal verbs/expressions
-- Generate EXACTLY {target_idioms} idioms/proverbs
-
-QUALITY REQUIREMENTS:
-- All words must be directly relevant to "{topic}"
-- Ensure appropriate difficulty for {level.value} level
-- Generate diverse, engaging, and useful vocabulary
-- Avoid repetition and generic terms
-- Include clear, detailed definitions
-- Provide realistic example sentences
-- Ensure accurate translations
-
-CRITICAL VALIDATION:
-- You MUST generate exactly the specified number of items in each category
-- Count your results carefully before responding
-- If you don't have the exact count, retry and generate more
-- Do not generate more or fewer than requested
-
-For each entry, include:
-- word: the vocabulary word
-- definition: clear definition in {target_language}
-- example: practical example sentence in {target_language}
-- translation: accurate translation to {original_language}
-- example_translation: translation of the example sentence to {original_language}
-- part_of_speech: part of speech (noun, verb, adjective, adverb, etc.)
-
-Format as JSON with vocabularies, phrasal_verbs, and idioms arrays.'''
+    prompt = GRAPH_PROMPT_TEMPLATE.format(
+        target_language=target_language,
+        original_language=original_language,
+        topic=topic,
+        level=level.value,
+        target_vocab=target_vocab,
+        target_phrasal=target_phrasal,
+        target_idioms=target_idioms
+    )
     
     try:
         import time
@@ -517,12 +906,15 @@ Format as JSON with vocabularies, phrasal_verbs, and idioms arrays.'''
                 print(f"⚠️ Count mismatch detected. Attempt {attempt}/{max_attempts}")
                 if attempt < max_attempts:
                     # Add more specific instructions for retry
-                    prompt += f"\n\nRETRY INSTRUCTION: Previous attempt generated {vocab_count} vocabularies, {phrasal_count} phrasal verbs, and {idiom_count} idioms. You need exactly {target_vocab} vocabularies, {target_phrasal} phrasal verbs, and {target_idioms} idioms. Please count carefully and generate the exact numbers requested."
+                    prompt += RETRY_INSTRUCTION_TEMPLATE.format(
+                        vocab_count=vocab_count, phrasal_count=phrasal_count, idiom_count=idiom_count,
+                        target_vocab=target_vocab, target_phrasal=target_phrasal, target_idioms=target_idioms
+                    )
                 else:
                     print("❌ Max attempts reached. Using generated results as-is.")
         
         # Combine all entries from structured response
-        all_entries = res.vocabularies + res.phrasal_verbs + res.idioms
+        all_entries = chain(res.vocabularies, res.phrasal_verbs, res.idioms)
         
         # Limit to requested counts (take first N of each type)
         final_entries = []
@@ -531,13 +923,14 @@ Format as JSON with vocabularies, phrasal_verbs, and idioms arrays.'''
         idiom_added = 0
         
         for entry in all_entries:
-            if entry.part_of_speech.value == 'phrasal_verb' and phrasal_added < phrasal_verbs_per_batch:
+            part_of_speech = entry.part_of_speech.value
+            if part_of_speech == 'phrasal_verb' and phrasal_added < phrasal_verbs_per_batch:
                 final_entries.append(entry)
                 phrasal_added += 1
-            elif entry.part_of_speech.value == 'idiom' and idiom_added < idioms_per_batch:
+            elif part_of_speech == 'idiom' and idiom_added < idioms_per_batch:
                 final_entries.append(entry)
                 idiom_added += 1
-            elif entry.part_of_speech.value not in ['phrasal_verb', 'idiom'] and vocab_added < vocab_per_batch:
+            elif part_of_speech not in ('phrasal_verb', 'idiom') and vocab_added < vocab_per_batch:
                 final_entries.append(entry)
                 vocab_added += 1
         
@@ -547,29 +940,25 @@ Format as JSON with vocabularies, phrasal_verbs, and idioms arrays.'''
         print(f"   Idioms: {idiom_added}/{idioms_per_batch}")
         print(f"✅ Final result: {len(final_entries)} vocabulary entries")
         
-        state["vocab_entries"] = final_entries
-        return state
+        return {"vocab_entries": final_entries}
         
     except Exception as e:
         print(f"❌ Generation error: {e}")
-        state["vocab_entries"] = []
-        return state
+        return {"vocab_entries": []}
 
 # =========== LangGraph Workflow ===========
 
 def create_vocab_graph() -> StateGraph:
-    """Create the vocabulary generation graph with search integration"""
+    """Create the vocabulary generation graph (search is disabled, so generation is the only node)"""
     
     # Create the graph
     workflow = StateGraph(State)
     
     # Add nodes
-    workflow.add_node("search", search_node)
     workflow.add_node("generate", generation_node)
     
     # Add edges
-    workflow.add_edge(START, "search")
-    workflow.add_edge("search", "generate")
+    workflow.add_edge(START, "generate")
     workflow.add_edge("generate", END)
     
     # Compile the graph
@@ -602,7 +991,6 @@ def run_single_topic_generation(
         "level": level,
         "target_language": language_to_learn,
         "original_langauge": learners_native_language,
-        "vocab_list": [],
         "vocab_entries": [],
         "vocab_per_batch": vocab_per_batch,
         "phrasal_verbs_per_batch": phrasal_verbs_per_batch,
@@ -17,12 +17,13 @@ import random
 # Validate configuration
 Config.validate()
 
-# Set up environment variables
-os.environ["LANGSMITH_TRACING"] = "true"
-os.environ["LANGCHAIN_API_KEY"] = Config.LANGSMITH_API_KEY
-os.environ["LANGCHAIN_PROJECT"] = Config.LANGSMITH_PROJECT
-os.environ["LANGCHAIN_TRACING_V2"] = "true"
-os.environ["LANGCHAIN_ENDPOINT"] = "https://api.smith.langchain.com"
+# Set up environment variables (LangSmith tracing is opt-in, it adds a request per LLM call)
+if Config.ENABLE_TRACING:
+    os.environ["LANGSMITH_TRACING"] = "true"
+    os.environ["LANGCHAIN_API_KEY"] = Config.LANGSMITH_API_KEY
+    os.environ["LANGCHAIN_PROJECT"] = Config.LANGSMITH_PROJECT
+    os.environ["LANGCHAIN_TRACING_V2"] = "true"
+    os.environ["LANGCHAIN_ENDPOINT"] = "https://api.smith.langchain.com"
 
 # =========== LLM ===========
 llm = ChatOpenAI(
@@ -113,9 +114,6 @@ def filter_duplicates_tool(generated_entries: List[dict], topic: str, target_cou
         user_saved_words = set()
         if user_id:
             try:
-                from supabase_database import SupabaseVocabDatabase
-                db = SupabaseVocabDatabase()
-                
                 # Get user's saved vocabulary entries
                 user_saved_entries = db.get_user_saved_vocab_entries(user_id, show_hidden=False)
                 print(f"🔍 Found {len(user_saved_entries)} saved vocabulary entries for user")
@@ -183,7 +181,7 @@ def filter_duplicates_tool(generated_entries: List[dict], topic: str, target_cou
                             user_duplicates_found.append(word)
                     
                     # Reconstruct final entries maintaining type order
-                    final_filtered_entries = user_filtered_vocab + user_filtered_phrasal + user_filtered_idioms
+                    final_filtered_entries = [*user_filtered_vocab, *user_filtered_phrasal, *user_filtered_idioms]
                     print(f"🚫 User-seen duplicates found: {len(user_duplicates_found)}")
                     if user_duplicates_found:
                         print(f"   User Duplicates: {', '.join(user_duplicates_found[:5])}{'...' if len(user_duplicates_found) > 5 else ''}")
@@ -915,9 +913,6 @@ def generate_vocab_with_regeneration_loop(
         if final_entries:
             print(f"\n💾 Saving {len(final_entries)} new entries to database...")
             try:
-                from supabase_database import SupabaseVocabDatabase
-                db = SupabaseVocabDatabase()
-                
                 # Save to vocab_entries table
                 db.insert_vocab_entries(
                     entries=final_entries,
@@ -930,8 +925,8 @@ def generate_vocab_with_regeneration_loop(
                 
                 # Verify the count after saving (like vocab_agent.py does)
                 try:
-                    saved_entries = db.get_vocab_entries(topic_name=topic, category_name="general")
-                    print(f"📊 Total entries in database for '{topic}': {len(saved_entries)}")
+                    saved_count = db.count_vocab_entries(topic_name=topic, category_name="general")
+                    print(f"📊 Total entries in database for '{topic}': {saved_count}")
                 except Exception as e:
                     print(f"⚠️ Error verifying saved entries count: {e}")
                 
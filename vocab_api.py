@@ -2,12 +2,16 @@ from fastapi import FastAPI, HTTPException, BackgroundTasks, Depends, Header
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
 from typing import List, Optional
+from itertools import chain
+import asyncio
+import logging
 import uvicorn
 from datetime import datetime, timedelta
 import uuid
 import hashlib
 import secrets
 import os
+from contextlib import asynccontextmanager
 
 # Import your existing modules
 from vocab_agent_react import generate_vocab_with_react_agent, generate_vocab
@@ -26,7 +30,9 @@ from models import (
 from config import Config
 from topics import get_categories, get_topics_by_category, get_topic_list
 from supabase_database import SupabaseVocabDatabase
-from tts_service import TTSService
+from tts_service import tts_service, get_service_client
+from tts_cache import tts_cache
+from db_pool import db_pool
 from pronunciation_service import pronunciation_service
 from voice_cloning_api import router as voice_cloning_router
 # from tts_api import router as tts_router  # Commented out due to path conflict
@@ -34,13 +40,27 @@ from voice_cloning_api import router as voice_cloning_router
 # Import points integration
 from points_integration import vocab_points, flashcard_points
 
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Application startup/shutdown hooks"""
+    if db_pool.enabled:
+        await db_pool.get_pool()
+    yield
+    # Release pooled provider and cache connections
+    await tts_service.aclose()
+    await tts_cache.aclose()
+    await db_pool.aclose()
+
 # Initialize FastAPI app
 app = FastAPI(
     title="AI Vocabulary Generator API - Comprehensive",
     description="Complete API for generating vocabulary content with all available methods",
     version="2.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 # Add CORS middleware for Flutter frontend
@@ -62,7 +82,6 @@ def get_user_seen_vocabularies(user_id: str, days_lookback: int = 5, db_instance
     try:
         from datetime import datetime, timedelta
         from config import Config
-        from supabase import create_client
         
         # Calculate cutoff date
         cutoff_date = datetime.now() - timedelta(days=days_lookback)
@@ -71,7 +90,7 @@ def get_user_seen_vocabularies(user_id: str, days_lookback: int = 5, db_instance
         
         # Use service role client to bypass RLS for system operations
         if Config.SUPABASE_SERVICE_ROLE_KEY:
-            service_client = create_client(Config.SUPABASE_URL, Config.SUPABASE_SERVICE_ROLE_KEY)
+            service_client = get_service_client()
             
             # Get words from generation history (if table exists)
             try:
@@ -103,10 +122,10 @@ def filter_user_seen_duplicates(entries: list, user_id: str, lookback_days: int
     
     filtered_entries = []
     for entry in entries:
-        if entry.word.lower() not in seen_words:
+        if entry.word_lower not in seen_words:
             filtered_entries.append(entry)
         else:
-            print(f"Filtered user-seen word: {entry.word} (seen in last {lookback_days} days)")
+            logger.debug("Filtered user-seen word: %s (seen in last %s days)", entry.word, lookback_days)
     
     print(f"User deduplication: {len(entries)} → {len(filtered_entries)} entries (removed {len(entries) - len(filtered_entries)} recently seen)")
     return filtered_entries
@@ -128,7 +147,7 @@ def track_generated_vocabularies(user_id: str, vocabularies: list, topic: str, l
         for vocab in vocabularies:
             record = {
                 "user_id": user_id,
-                "word": vocab.word.lower(),
+                "word": vocab.word_lower,
                 "topic": topic,
                 "level": level.value if hasattr(level, 'value') else str(level),
                 "generated_at": datetime.now().isoformat(),
@@ -139,11 +158,10 @@ def track_generated_vocabularies(user_id: str, vocabularies: list, topic: str, l
         # Try to insert to user_generation_history table
         try:
             from config import Config
-            from supabase import create_client
             
             # Use service role client to bypass RLS for system operations
             if Config.SUPABASE_SERVICE_ROLE_KEY:
-                service_client = create_client(Config.SUPABASE_URL, Config.SUPABASE_SERVICE_ROLE_KEY)
+                service_client = get_service_client()
                 service_client.table("user_generation_history").insert(generation_records).execute()
                 print(f"✅ Tracked {len(generation_records)} generated vocabularies for user")
                 return True
@@ -158,7 +176,6 @@ def track_generated_vocabularies(user_id: str, vocabularies: list, topic: str, l
     except Exception as e:
         print(f"Error tracking generated vocabularies: {e}")
         return False
-tts_service = TTSService()
 
 # Include voice cloning router
 app.include_router(voice_cloning_router)
@@ -889,7 +906,7 @@ Format as JSON with vocabularies, phrasal_verbs, and idioms arrays.'''
         
         # STEP 2: Pre-filter - check what already exists
         print(f"\n🔍 STEP 2: Pre-filtering - checking existing entries")
-        existing_combinations = get_existing_combinations_for_topic(topic)
+        # Reuses the combinations fetched above rather than querying the topic again
         print(f"Found {len(existing_combinations)} existing combinations for topic '{topic}'")
         
         # Get user seen words (if user authenticated)
@@ -915,28 +932,33 @@ Format as JSON with vocabularies, phrasal_verbs, and idioms arrays.'''
         )
         
         # Extract all entries from the response
-        attempt_entries = response.vocabularies + response.phrasal_verbs + response.idioms
+        attempt_entries = [*response.vocabularies, *response.phrasal_verbs, *response.idioms]
         print(f"✅ React agent generated {len(attempt_entries)} entries")
         
-        # Filter out duplicates and user-seen words
+        # Filter out duplicates and user-seen words (per-entry details at debug level, one summary line)
         filtered_entries = []
+        user_seen_count = 0
+        duplicate_count = 0
         for entry in attempt_entries:
             # Check if word is user-seen
-            if user_id and entry.word.lower() in user_seen_words:
-                print(f"Filtered user-seen: {entry.word}")
+            if user_id and entry.word_lower in user_seen_words:
+                logger.debug("Filtered user-seen: %s", entry.word)
+                user_seen_count += 1
                 continue
             
             # Check if word exists in database
-            entry_key = (entry.word.lower(), entry.level.value, entry.part_of_speech.value if entry.part_of_speech else None)
-            if entry_key in [(combo[0].lower(), combo[1], combo[2]) for combo in existing_combinations]:
-                print(f"Filtered duplicate: {entry.word}")
+            entry_key = (entry.word_lower, entry.level.value, entry.part_of_speech.value if entry.part_of_speech else None)
+            if entry_key in existing_combinations:
+                logger.debug("Filtered duplicate: %s", entry.word)
+                duplicate_count += 1
                 continue
             
             # Add to filtered list
             filtered_entries.append(entry)
         
         vocab_entries = filtered_entries
-        print(f"✅ Final result: {len(vocab_entries)} entries after filtering")
+        print(f"✅ Final result: {len(vocab_entries)} entries after filtering "
+              f"({user_seen_count} user-seen, {duplicate_count} duplicates removed)")
         
         if not vocab_entries:
             print("⚠️ No vocabulary entries generated by LangGraph workflow")
@@ -972,22 +994,10 @@ Format as JSON with vocabularies, phrasal_verbs, and idioms arrays.'''
             for item in inserted_result['inserted_entries']:
                 inserted_entries_map[item['entry'].word] = item['id']
         
-        # Get existing entries from database for duplicates
-        existing_entries_map = {}
-        if filtered_entries:  # If we have entries to process, get existing entries from database
-            existing_entries = db.get_vocab_entries(topic_name=topic, limit=1000)
-            for existing_entry in existing_entries:
-                existing_entries_map[existing_entry['word'].lower()] = existing_entry['id']
-        
         for entry in filtered_entries:
             is_duplicate = False  # All entries from loop are unique
-            # Use actual database ID if available (new or existing), otherwise generate a UUID
-            if entry.word in inserted_entries_map:
-                entry_id = inserted_entries_map[entry.word]
-            elif is_duplicate and entry.word.lower() in existing_entries_map:
-                entry_id = existing_entries_map[entry.word.lower()]
-            else:
-                entry_id = str(uuid.uuid4())
+            # Use actual database ID if available, otherwise generate a UUID
+            entry_id = inserted_entries_map.get(entry.word, str(uuid.uuid4()))
             
             response_entries.append(VocabEntryResponse(
                 id=entry_id,  # Use actual database ID
@@ -1024,6 +1034,25 @@ Format as JSON with vocabularies, phrasal_verbs, and idioms arrays.'''
         print(f"Error in single topic generation: {e}")
         raise
 
+# Prompt for the multiple-topic and category endpoints, filled in with str.format per topic
+TOPIC_PROMPT_TEMPLATE = '''You are an expert {language_to_learn} language teacher creating engaging vocabulary content for {topic}.
+
+Generate diverse and interesting {language_to_learn} vocabulary for CEFR level {level}:
+
+1. {vocab_per_batch} {language_to_learn} vocabulary words (nouns, verbs, adjectives, adverbs)
+2. {phrasal_verbs_per_batch} {language_to_learn} phrasal verbs/expressions  
+3. {idioms_per_batch} {language_to_learn} idioms/proverbs
+
+Requirements:
+- All words must be relevant to "{topic}"
+- Include clear definitions in {language_to_learn} (the target learning language)
+- Provide example sentences in {language_to_learn}
+- Translate examples to {learners_native_language}
+- Ensure appropriate difficulty for {level} level
+- Avoid generic words not specific to the topic
+
+Format as JSON with vocabularies, phrasal_verbs, and idioms arrays.'''
+
 def generate_multiple_topics_sync(
     topics: List[str],
     level: CEFRLevel,
@@ -1041,45 +1070,50 @@ def generate_multiple_topics_sync(
         print(f"Starting multiple topics generation for: {', '.join(topics)}")
         
         # Import here to avoid circular imports
-        from vocab_agent import structured_llm, db, filter_duplicates, validate_topic_relevance, get_existing_combinations_for_topic
+        from vocab_agent import structured_llm, db, filter_duplicates, validate_topic_relevance
         
         all_response_entries = []
         total_new_saved = 0
         total_duplicates = 0
         
-        for topic in topics:
+        # Existing combinations for all topics in one round trip
+        existing_by_topic = db.get_existing_combinations_bulk(topics)
+        
+        # Build every topic's prompt, then run the LLM calls concurrently instead of one after another
+        prompt_values = {
+            "language_to_learn": language_to_learn,
+            "learners_native_language": learners_native_language,
+            "level": level.value,
+            "vocab_per_batch": vocab_per_batch,
+            "phrasal_verbs_per_batch": phrasal_verbs_per_batch,
+            "idioms_per_batch": idioms_per_batch
+        }
+        prompts = [TOPIC_PROMPT_TEMPLATE.format(topic=topic, **prompt_values) for topic in topics]
+        
+        # Generate vocabulary (Runnable.batch runs the calls on a thread pool, bounded by max_concurrency);
+        # a failed call comes back as its exception so the other topics are still used
+        responses = structured_llm.batch(
+            prompts, config={"max_concurrency": Config.GENERATION_CONCURRENCY}, return_exceptions=True
+        )
+        failed_topics = [topic for topic, res in zip(topics, responses) if isinstance(res, Exception)]
+        if failed_topics and len(failed_topics) == len(topics):
+            raise next(res for res in responses if isinstance(res, Exception))
+        
+        for topic, res in zip(topics, responses):
+            if isinstance(res, Exception):
+                print(f"\nError generating topic '{topic}', skipping it: {res}")
+                continue
+            
             print(f"\nProcessing topic: {topic}")
             
             # Get existing combinations
-            existing_combinations = get_existing_combinations_for_topic(topic)
+            existing_combinations = existing_by_topic.get(topic, frozenset())
             print(f"Found {len(existing_combinations)} existing combinations")
             
-            # Create prompt
-            prompt = f'''You are an expert {language_to_learn} language teacher creating engaging vocabulary content for {topic}.
-
-Generate diverse and interesting {language_to_learn} vocabulary for CEFR level {level.value}:
-
-1. {vocab_per_batch} {language_to_learn} vocabulary words (nouns, verbs, adjectives, adverbs)
-2. {phrasal_verbs_per_batch} {language_to_learn} phrasal verbs/expressions  
-3. {idioms_per_batch} {language_to_learn} idioms/proverbs
-
-Requirements:
-- All words must be relevant to "{topic}"
-- Include clear definitions in {language_to_learn} (the target learning language)
-- Provide example sentences in {language_to_learn}
-- Translate examples to {learners_native_language}
-- Ensure appropriate difficulty for {level.value} level
-- Avoid generic words not specific to the topic
-
-Format as JSON with vocabularies, phrasal_verbs, and idioms arrays.'''
-
-            # Generate vocabulary
-            res = structured_llm.invoke(prompt)
-            
             # Combine all entries
-            all_entries = res.vocabularies + res.phrasal_verbs + res.idioms
+            all_entries = chain(res.vocabularies, res.phrasal_verbs, res.idioms)
             
-            print(f"Generated {len(all_entries)} entries")
+            print(f"Generated {len(res.vocabularies) + len(res.phrasal_verbs) + len(res.idioms)} entries")
             
             # Validate topic relevance
             relevant_entries = validate_topic_relevance(all_entries, topic)
@@ -1087,6 +1121,8 @@ Format as JSON with vocabularies, phrasal_verbs, and idioms arrays.'''
             
             # Filter out duplicates for database storage only
             filtered_entries = filter_duplicates(relevant_entries, existing_combinations)
+            # Identity set, so flagging duplicates below is a hash lookup instead of a list scan
+            filtered_entry_ids = {id(entry) for entry in filtered_entries}
             
             # Save new vocabulary entries to vocab_entries table (but not to user's personal lists)
             inserted_result = None
@@ -1110,7 +1146,7 @@ Format as JSON with vocabularies, phrasal_verbs, and idioms arrays.'''
             
             # Create response entries with duplicate flags
             for entry in relevant_entries:
-                is_duplicate = entry not in filtered_entries
+                is_duplicate = id(entry) not in filtered_entry_ids
                 # Use actual database ID if available, otherwise generate a UUID
                 entry_id = inserted_entries_map.get(entry.word, str(uuid.uuid4()))
                 
@@ -1139,7 +1175,8 @@ Format as JSON with vocabularies, phrasal_verbs, and idioms arrays.'''
             "vocabulary": all_response_entries,
             "total_generated": len(all_response_entries),
             "new_entries_saved": 0,  # No automatic saving
-            "duplicates_found": total_duplicates
+            "duplicates_found": total_duplicates,
+            "failed_topics": failed_topics
         }
                 
     except Exception as e:
@@ -1165,45 +1202,50 @@ def generate_category_sync(
         print(f"Found {len(topics)} topics in category '{category}'")
         
         # Import here to avoid circular imports
-        from vocab_agent import structured_llm, db, filter_duplicates, validate_topic_relevance, get_existing_combinations_for_topic
+        from vocab_agent import structured_llm, db, filter_duplicates, validate_topic_relevance
         
         all_response_entries = []
         total_new_saved = 0
         total_duplicates = 0
         
-        for topic in topics:
+        # Existing combinations for all topics in one round trip
+        existing_by_topic = db.get_existing_combinations_bulk(topics)
+        
+        # Build every topic's prompt, then run the LLM calls concurrently instead of one after another
+        prompt_values = {
+            "language_to_learn": language_to_learn,
+            "learners_native_language": learners_native_language,
+            "level": level.value,
+            "vocab_per_batch": vocab_per_batch,
+            "phrasal_verbs_per_batch": phrasal_verbs_per_batch,
+            "idioms_per_batch": idioms_per_batch
+        }
+        prompts = [TOPIC_PROMPT_TEMPLATE.format(topic=topic, **prompt_values) for topic in topics]
+        
+        # Generate vocabulary (Runnable.batch runs the calls on a thread pool, bounded by max_concurrency);
+        # a failed call comes back as its exception so the other topics are still used
+        responses = structured_llm.batch(
+            prompts, config={"max_concurrency": Config.GENERATION_CONCURRENCY}, return_exceptions=True
+        )
+        failed_topics = [topic for topic, res in zip(topics, responses) if isinstance(res, Exception)]
+        if failed_topics and len(failed_topics) == len(topics):
+            raise next(res for res in responses if isinstance(res, Exception))
+        
+        for topic, res in zip(topics, responses):
+            if isinstance(res, Exception):
+                print(f"\nError generating topic '{topic}', skipping it: {res}")
+                continue
+            
             print(f"\nProcessing topic: {topic}")
             
             # Get existing combinations
-            existing_combinations = get_existing_combinations_for_topic(topic)
+            existing_combinations = existing_by_topic.get(topic, frozenset())
             print(f"Found {len(existing_combinations)} existing combinations")
             
-            # Create prompt
-            prompt = f'''You are an expert {language_to_learn} language teacher creating engaging vocabulary content for {topic}.
-
-Generate diverse and interesting {language_to_learn} vocabulary for CEFR level {level.value}:
-
-1. {vocab_per_batch} {language_to_learn} vocabulary words (nouns, verbs, adjectives, adverbs)
-2. {phrasal_verbs_per_batch} {language_to_learn} phrasal verbs/expressions  
-3. {idioms_per_batch} {language_to_learn} idioms/proverbs
-
-Requirements:
-- All words must be relevant to "{topic}"
-- Include clear definitions in {language_to_learn} (the target learning language)
-- Provide example sentences in {language_to_learn}
-- Translate examples to {learners_native_language}
-- Ensure appropriate difficulty for {level.value} level
-- Avoid generic words not specific to the topic
-
-Format as JSON with vocabularies, phrasal_verbs, and idioms arrays.'''
-
-            # Generate vocabulary
-            res = structured_llm.invoke(prompt)
-            
             # Combine all entries
-            all_entries = res.vocabularies + res.phrasal_verbs + res.idioms
+            all_entries = chain(res.vocabularies, res.phrasal_verbs, res.idioms)
             
-            print(f"Generated {len(all_entries)} entries")
+            print(f"Generated {len(res.vocabularies) + len(res.phrasal_verbs) + len(res.idioms)} entries")
             
             # Validate topic relevance
             relevant_entries = validate_topic_relevance(all_entries, topic)
@@ -1211,6 +1253,8 @@ Format as JSON with vocabularies, phrasal_verbs, and idioms arrays.'''
             
             # Filter out duplicates for database storage only
             filtered_entries = filter_duplicates(relevant_entries, existing_combinations)
+            # Identity set, so flagging duplicates below is a hash lookup instead of a list scan
+            filtered_entry_ids = {id(entry) for entry in filtered_entries}
             
             # Save new vocabulary entries to vocab_entries table (but not to user's personal lists)
             if filtered_entries:
@@ -1226,7 +1270,7 @@ Format as JSON with vocabularies, phrasal_verbs, and idioms arrays.'''
             
             # Create response entries with duplicate flags and include all necessary info
             for entry in relevant_entries:
-                is_duplicate = entry not in filtered_entries
+                is_duplicate = id(entry) not in filtered_entry_ids
                 all_response_entries.append(VocabEntryResponse(
                     id=str(uuid.uuid4()),  # Generate unique ID for frontend
                     word=entry.word,
@@ -1252,7 +1296,8 @@ Format as JSON with vocabularies, phrasal_verbs, and idioms arrays.'''
             "vocabulary": all_response_entries,
             "total_generated": len(all_response_entries),
             "new_entries_saved": total_new_saved,  # Count of new entries saved to vocab_entries
-            "duplicates_found": total_duplicates
+            "duplicates_found": total_duplicates,
+            "failed_topics": failed_topics
         }
                 
     except Exception as e:
@@ -1373,8 +1418,9 @@ async def generate_single_topic(
 async def generate_multiple_topics(request: GenerateMultipleRequest):
     """Generate vocabulary for multiple topics"""
     try:
-        # Generate vocabulary synchronously
-        result = generate_multiple_topics_sync(
+        # Generate vocabulary in a worker thread so the event loop keeps serving other requests
+        result = await asyncio.to_thread(
+            generate_multiple_topics_sync,
             topics=request.topics,
             level=request.level,
             language_to_learn=request.language_to_learn,
@@ -1404,7 +1450,8 @@ async def generate_multiple_topics(request: GenerateMultipleRequest):
                 "level": request.level.value,
                 "language_to_learn": request.language_to_learn,
                 "learners_native_language": request.learners_native_language,
-                "points_awarded": points_result.get("points", 0) if points_result.get("success") else 0
+                "points_awarded": points_result.get("points", 0) if points_result.get("success") else 0,
+                "failed_topics": result["failed_topics"]
             },
             generated_vocabulary=result["vocabulary"],
             total_generated=result["total_generated"],
@@ -1426,8 +1473,9 @@ async def generate_category(request: GenerateCategoryRequest):
                 detail=f"Invalid category '{request.category}'. Available categories: {categories}"
             )
         
-        # Generate vocabulary synchronously
-        result = generate_category_sync(
+        # Generate vocabulary in a worker thread so the event loop keeps serving other requests
+        result = await asyncio.to_thread(
+            generate_category_sync,
             category=request.category,
             level=request.level,
             language_to_learn=request.language_to_learn,
@@ -1455,7 +1503,8 @@ async def generate_category(request: GenerateCategoryRequest):
                 "level": request.level.value,
                 "language_to_learn": request.language_to_learn,
                 "learners_native_language": request.learners_native_language,
-                "points_awarded": points_result.get("points", 0) if points_result.get("success") else 0
+                "points_awarded": points_result.get("points", 0) if points_result.get("success") else 0,
+                "failed_topics": result["failed_topics"]
             },
             generated_vocabulary=result["vocabulary"],
             total_generated=result["total_generated"],
@@ -2586,10 +2635,9 @@ async def get_tts_quota(
         # Use service role client for backend operations to bypass RLS
         try:
             from config import Config
-            from supabase import create_client
             
             if Config.SUPABASE_SERVICE_ROLE_KEY:
-                service_client = create_client(Config.SUPABASE_URL, Config.SUPABASE_SERVICE_ROLE_KEY)
+                service_client = get_service_client()
                 voice_profiles_result = service_client.table("user_voice_profiles").select("*").eq(
                     "user_id", current_user
                 ).eq("is_active", True).execute()
@@ -2650,11 +2698,10 @@ async def delete_voice_profile(
         
         # Use service role client to bypass RLS (same as get_user_voice_profiles)
         from config import Config
-        from supabase import create_client
         
         service_client = None
         if Config.SUPABASE_SERVICE_ROLE_KEY:
-            service_client = create_client(Config.SUPABASE_URL, Config.SUPABASE_SERVICE_ROLE_KEY)
+            service_client = get_service_client()
         
         # Use service client if available, otherwise fall back to regular client
         client_to_use = service_client if service_client else db.client
@@ -2692,6 +2739,7 @@ async def delete_voice_profile(
             "is_active": False,
             "updated_at": datetime.now().isoformat()
         }).eq("id", profile_id).execute()
+        await tts_service.invalidate_user_voice_profile(current_user, result.data[0].get("voice_id"))
         
         print(f"   ✅ Profile deactivated successfully")
         
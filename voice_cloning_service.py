@@ -1,11 +1,10 @@
 import os
 import asyncio
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Union
 from io import BytesIO
 from datetime import datetime
 import httpx
 from elevenlabs.client import ElevenLabs
-from elevenlabs import Voice, VoiceSettings
 
 from config import Config
 from models import (
@@ -14,6 +13,7 @@ from models import (
 )
 from supabase_database import SupabaseVocabDatabase
 from audio_storage import AudioStorageService
+from tts_service import tts_service
 
 
 class VoiceCloningService:
@@ -23,6 +23,8 @@ class VoiceCloningService:
         self.db = db
         self.audio_storage = audio_storage
         self._elevenlabs_client = None
+        # Caps concurrent blocking ElevenLabs SDK calls (each one occupies a worker thread)
+        self._elevenlabs_semaphore = asyncio.Semaphore(Config.ELEVENLABS_CONCURRENCY)
         self._init_elevenlabs()
         self._init_service_role_db()
     
@@ -59,6 +61,15 @@ class VoiceCloningService:
             print(f"❌ Failed to initialize service role database: {e}")
             self.service_db = None
     
+    async def _run_elevenlabs(self, func, **kwargs):
+        """Run a blocking ElevenLabs SDK call in a worker thread"""
+        async with self._elevenlabs_semaphore:
+            return await asyncio.to_thread(func, **kwargs)
+    
+    def _synthesize(self, **kwargs) -> bytes:
+        """Blocking text-to-speech call; the SDK generator is consumed here so the HTTP work stays in the thread"""
+        return b''.join(self._elevenlabs_client.text_to_speech.convert(**kwargs))
+    
     @property
     def is_configured(self) -> bool:
         """Check if ElevenLabs is properly configured"""
@@ -68,7 +79,7 @@ class VoiceCloningService:
         self, 
         user_id: str, 
         voice_name: str, 
-        audio_files: List[bytes],
+        audio_files: List[Union[bytes, str]],
         description: Optional[str] = None
     ) -> VoiceCloneResponse:
         """
@@ -83,7 +94,8 @@ class VoiceCloningService:
         Args:
             user_id: User ID
             voice_name: Name for the cloned voice
-            audio_files: List of audio file bytes for training
+            audio_files: List of audio file bytes or paths to files on disk for training
+                (paths are read one at a time, so only one sample is held in memory)
             description: Optional description for the voice
             
         Returns:
@@ -101,7 +113,13 @@ class VoiceCloningService:
             print(f"📁 Step 1: Saving {len(audio_files)} audio files to Supabase Storage...")
             stored_files = []
             
-            for i, audio_data in enumerate(audio_files):
+            for i, audio_source in enumerate(audio_files):
+                if isinstance(audio_source, str):
+                    with open(audio_source, 'rb') as f:
+                        audio_data = f.read()
+                else:
+                    audio_data = audio_source
+                
                 # Generate very short filename for storage (Supabase has strict key length limits)
                 # Add microseconds to ensure unique timestamps
                 timestamp = datetime.now().strftime("%Y%m%d%H%M%S") + f"{datetime.now().microsecond//1000:03d}"
@@ -218,7 +236,8 @@ class VoiceCloningService:
                 print(f"   📁 Prepared {len(file_objects)} file objects for ElevenLabs")
                 
                 # Create voice clone using IVC API with correct parameters
-                voice = self._elevenlabs_client.voices.ivc.create(
+                voice = await self._run_elevenlabs(
+                    self._elevenlabs_client.voices.ivc.create,
                     name=voice_name,
                     files=file_objects,  # Use prepared file objects
                     description=description or f"Voice clone for {voice_name}",
@@ -235,7 +254,8 @@ class VoiceCloningService:
                 # Try alternative file format - just file paths as strings
                 try:
                     print("🔄 Retrying with file paths as strings...")
-                    voice = self._elevenlabs_client.voices.ivc.create(
+                    voice = await self._run_elevenlabs(
+                        self._elevenlabs_client.voices.ivc.create,
                         name=voice_name,
                         files=temp_files,  # Use file paths directly
                         description=description or f"Voice clone for {voice_name}",
@@ -254,7 +274,8 @@ class VoiceCloningService:
                         for temp_file_path in temp_files:
                             file_handles.append(open(temp_file_path, 'rb'))
                         
-                        voice = self._elevenlabs_client.voices.ivc.create(
+                        voice = await self._run_elevenlabs(
+                            self._elevenlabs_client.voices.ivc.create,
                             name=voice_name,
                             files=file_handles,
                             description=description or f"Voice clone for {voice_name}",
@@ -381,6 +402,7 @@ class VoiceCloningService:
             result = self.db.client.table('user_voice_profiles').update(
                 {'is_active': False}
             ).eq('user_id', user_id).eq('voice_id', voice_id).execute()
+            await tts_service.invalidate_user_voice_profile(user_id, voice_id)
             
             return bool(result.data)
             
@@ -433,16 +455,14 @@ class VoiceCloningService:
                 voice_id = voice_profiles[0].voice_id
             
             # Generate TTS using cloned voice
-            audio_generator = self._elevenlabs_client.text_to_speech.convert(
+            audio_data = await self._run_elevenlabs(
+                self._synthesize,
                 text=text,
                 voice_id=voice_id,
                 model_id="eleven_multilingual_v2",
                 output_format="mp3_44100_128"
             )
             
-            # Convert generator to bytes
-            audio_data = b''.join(audio_generator)
-            
             # Save audio file
             result = await self.audio_storage.save_audio_file(
                 user_id=user_id,
@@ -484,16 +504,14 @@ class VoiceCloningService:
         
         try:
             # Generate test audio
-            audio_generator = self._elevenlabs_client.text_to_speech.convert(
+            audio_data = await self._run_elevenlabs(
+                self._synthesize,
                 text=test_text,
                 voice_id=voice_id,
                 model_id="eleven_multilingual_v2",
                 output_format="mp3_44100_128"
             )
             
-            # Convert generator to bytes
-            audio_data = b''.join(audio_generator)
-            
             # Save test audio
             result = await self.audio_storage.save_audio_file(
                 user_id="test_user",